@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+市场数据基准测试
+
+用固定随机种子生成一个合成股票池的日线和基本面（不访问网络），
+通过 LocalFileProvider 运行 MarketAnalyzer.get_market_data，
+分别统计冷启动（读取本地文件）和命中行情面板缓存时的耗时。
+
+用法:
+  python benchmarks/bench_market.py [股票数] [交易日数] [--format csv|parquet] [--runs 5]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from config import MARKET_CONFIG  # noqa: E402
+from market_providers import LocalFileProvider, export_panel  # noqa: E402
+
+
+def make_dataset(data_dir: str, stock_count: int, days: int, fmt: str) -> list:
+    """生成合成日线（几何随机游走）和基本面，返回股票代码列表"""
+    rng = np.random.default_rng(42)
+    symbols = [f'SYN{i:04d}' for i in range(stock_count)]
+    all_symbols = (list(MARKET_CONFIG.get('indices', {}).values()) +
+                   list(MARKET_CONFIG.get('sectors', {}).values()) +
+                   list(MARKET_CONFIG.get('universe', {}).get('hot_stocks', {}).values()) + symbols)
+    dates = pd.bdate_range(end=datetime.now().date(), periods=days)
+
+    returns = rng.normal(0.0003, 0.02, size=(days, len(all_symbols)))
+    close = 100 * np.exp(np.cumsum(returns, axis=0))
+    open_ = close * (1 + rng.normal(0, 0.005, size=close.shape))
+    fields = {
+        'Open': open_,
+        'High': np.maximum(open_, close) * 1.01,
+        'Low': np.minimum(open_, close) * 0.99,
+        'Close': close,
+        'Volume': rng.integers(1_000_000, 10_000_000, size=close.shape),
+    }
+    panel = pd.concat({field: pd.DataFrame(values, index=dates, columns=all_symbols)
+                       for field, values in fields.items()}, axis=1)
+    panel.columns = panel.columns.set_names(['field', 'symbol'])
+    export_panel(panel, data_dir, fmt)
+
+    hot = list(MARKET_CONFIG.get('universe', {}).get('hot_stocks', {}).values())
+    today = datetime.now().date()
+    pd.DataFrame({
+        'symbol': hot,
+        'earnings_date': [today + timedelta(days=int(d)) for d in rng.integers(1, 30, size=len(hot))],
+        'market_cap': rng.integers(10 ** 11, 3 * 10 ** 12, size=len(hot)),
+        'forward_pe': rng.uniform(15, 60, size=len(hot)).round(1),
+        'price': close[-1, [all_symbols.index(symbol) for symbol in hot]].round(2),
+        'analyst_target': None,
+        'recommendation': 'buy',
+    }).to_csv(os.path.join(data_dir, 'fundamentals.csv'), index=False)
+
+    with open(os.path.join(data_dir, 'universe.csv'), 'w', encoding='utf-8') as f:
+        f.write('symbol,name,sector\n')
+        for i, symbol in enumerate(symbols):
+            f.write(f'{symbol},Synthetic {i},Sector {i % 11}\n')
+    return symbols
+
+
+def timed_run(analyzer) -> float:
+    start = time.perf_counter()
+    market_data = analyzer.get_market_data()
+    elapsed = time.perf_counter() - start
+    if market_data is None:
+        raise RuntimeError('get_market_data 返回 None')
+    return elapsed
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='市场数据基准测试')
+    arg_parser.add_argument('stocks', type=int, nargs='?', default=500, help='合成股票池大小')
+    arg_parser.add_argument('days', type=int, nargs='?', default=260, help='每只股票的交易日数')
+    arg_parser.add_argument('--format', choices=['csv', 'parquet'], default='csv', help='本地文件格式')
+    arg_parser.add_argument('--runs', type=int, default=5, help='重复次数，取中位数')
+    args = arg_parser.parse_args()
+
+    from market_analyzer import MarketAnalyzer
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        make_dataset(data_dir, args.stocks, args.days, args.format)
+        universe = dict(MARKET_CONFIG.get('universe', {}), files=[os.path.join(data_dir, 'universe.csv')])
+        panel_cache = os.path.join(data_dir, 'market_panel.pkl')
+
+        with mock.patch.dict(MARKET_CONFIG, {'universe': universe}), \
+                mock.patch('market_panel.MARKET_PANEL_CACHE', panel_cache), \
+                mock.patch('market_analyzer.MARKET_DATA_CACHE', os.path.join(data_dir, 'market_data.json')):
+            analyzer = MarketAnalyzer(provider=LocalFileProvider(data_dir))
+            cold = []
+            for _ in range(args.runs):
+                if os.path.exists(panel_cache):
+                    os.remove(panel_cache)
+                cold.append(timed_run(analyzer))
+            warm = [timed_run(analyzer) for _ in range(args.runs)]
+
+    print(f"合成股票池 {args.stocks} 只 × {args.days} 个交易日（{args.format}），{args.runs} 次中位数")
+    print(f"读取本地文件:   {statistics.median(cold) * 1000:8.1f} ms")
+    print(f"命中面板缓存:   {statistics.median(warm) * 1000:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
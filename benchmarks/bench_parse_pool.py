@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+进程池解析基准测试
+
+生成一批合成RSS源（不访问网络），分别用 1..N 个进程解析，
+输出耗时和相对单进程的加速比。
+
+用法:
+  python benchmarks/bench_parse_pool.py [源数量] [每个源的条目数]
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from email.utils import format_datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from feed_stream import parse_feed_bytes  # noqa: E402
+
+
+def make_feed(feed_idx: int, entry_count: int) -> bytes:
+    """生成一个合成RSS 2.0源"""
+    now = datetime.now().astimezone()
+    items = []
+    for i in range(entry_count):
+        pub_date = format_datetime(now - timedelta(minutes=i))
+        items.append(
+            f"<item><title>Feed {feed_idx} headline {i}: NVIDIA earnings beat, S&amp;P 500 rallies</title>"
+            f"<link>https://example.com/{feed_idx}/{i}</link>"
+            f"<description>&lt;p&gt;{'Markets moved as AI chip demand surged. ' * 20}&lt;/p&gt;</description>"
+            f"<pubDate>{pub_date}</pubDate></item>"
+        )
+    doc = (f'<?xml version="1.0" encoding="utf-8"?><rss version="2.0"><channel>'
+           f'<title>Synthetic Feed {feed_idx}</title>{"".join(items)}</channel></rss>')
+    return doc.encode('utf-8')
+
+
+def run(feeds, workers: int, cutoff: datetime, max_entries: int) -> float:
+    start = time.perf_counter()
+    if workers == 1:
+        for url, data in feeds:
+            parse_feed_bytes(url, data, cutoff, max_entries)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(parse_feed_bytes, url, data, cutoff, max_entries) for url, data in feeds]
+            for future in futures:
+                future.result()
+    return time.perf_counter() - start
+
+
+def main():
+    feed_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    entry_count = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+
+    feeds = [(f'https://example.com/feed/{i}', make_feed(i, entry_count)) for i in range(feed_count)]
+    total_mb = sum(len(data) for _, data in feeds) / 1024 / 1024
+    cutoff = datetime.now() - timedelta(days=1)
+
+    cpu_count = os.cpu_count() or 1
+    worker_counts = sorted({1, 2, 4, 8, 16, cpu_count} & set(range(1, cpu_count + 1)))
+
+    print(f"{feed_count} 个源 × {entry_count} 条，共 {total_mb:.1f} MB，CPU核心数 {cpu_count}")
+    print(f"{'进程数':>6} {'耗时(s)':>10} {'加速比':>8}")
+
+    baseline = None
+    for workers in worker_counts:
+        elapsed = run(feeds, workers, cutoff, entry_count)
+        baseline = baseline or elapsed
+        print(f"{workers:>6} {elapsed:>10.2f} {baseline / elapsed:>7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
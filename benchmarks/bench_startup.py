@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+启动耗时基准测试
+
+用 `python -X importtime` 统计导入 main 的耗时，列出最慢的模块，
+并检查 requests / feedparser / openai 等重依赖没有在启动时被导入。
+可在CI中加 --max-ms 作为回归门限。
+
+用法:
+  python benchmarks/bench_startup.py [--runs 5] [--top 10] [--max-ms 毫秒]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 启动时不应导入的模块（应在第一次使用时才导入）
+LAZY_MODULES = ['requests', 'feedparser', 'openai', 'yfinance', 'pandas', 'numpy']
+
+
+def import_profile():
+    """执行一次 -X importtime，返回 {模块名: (自身耗时us, 累计耗时us)}"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import main'],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def usage_wall_time() -> float:
+    """`python main.py`（只打印用法）的总耗时，包含解释器启动"""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, 'main.py'], cwd=ROOT, capture_output=True, check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='启动耗时基准测试')
+    arg_parser.add_argument('--runs', type=int, default=5, help='重复次数，取中位数')
+    arg_parser.add_argument('--top', type=int, default=10, help='列出累计耗时最长的模块数')
+    arg_parser.add_argument('--max-ms', type=float, default=None, help='import main 的耗时上限（毫秒）')
+    args = arg_parser.parse_args()
+
+    profiles = [import_profile() for _ in range(args.runs)]
+    main_ms = statistics.median(p['main'][1] for p in profiles) / 1000
+    wall_ms = statistics.median(usage_wall_time() for _ in range(args.runs)) * 1000
+
+    print(f"import main:     {main_ms:8.1f} ms（{args.runs} 次中位数）")
+    print(f"python main.py:  {wall_ms:8.1f} ms（含解释器启动）")
+
+    last = profiles[-1]
+    print(f"\n累计耗时最长的 {args.top} 个模块:")
+    print(f"{'累计(ms)':>10} {'自身(ms)':>10}  模块")
+    slowest = sorted(last.items(), key=lambda item: item[1][1], reverse=True)[:args.top]
+    for name, (self_us, cumulative_us) in slowest:
+        print(f"{cumulative_us / 1000:>10.1f} {self_us / 1000:>10.1f}  {name}")
+
+    eager = [name for name in LAZY_MODULES if name in last]
+    failed = False
+    if eager:
+        print(f"\n❌ 启动时导入了应延迟加载的模块: {', '.join(eager)}")
+        failed = True
+    if args.max_ms is not None and main_ms > args.max_ms:
+        print(f"\n❌ import main 耗时 {main_ms:.1f} ms 超过上限 {args.max_ms:.1f} ms")
+        failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+运行检查点模块
+
+每日任务各阶段的输出按运行日期保存到 DATA_DIR/checkpoints/YYYYMMDD/<阶段>.json。
+任务中途失败后 `main.py run --resume` 从已完成的阶段继续，
+不再重复抓取、排序和调用付费的AI摘要；`main.py resend` 直接重发最近一次渲染好的消息。
+"""
+
+import json
+import logging
+import os
+import shutil
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from config import CHECKPOINT_DIR, RUN_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# 阶段名（按执行顺序）
+MARKET = 'market'          # 市场分析条目
+COLLECT = 'collect'        # 收集到的新闻
+SELECT = 'select'          # 各方案筛选出的新闻
+SUMMARIZE = 'summarize'    # 已生成的摘要（链接 -> 摘要），可能只完成了一部分
+RENDERED = 'rendered'      # 各方案渲染好的推送消息
+PUSHED = 'pushed'          # 已推送（或已放入发件箱）的消息
+
+STAGES = [MARKET, COLLECT, SELECT, SUMMARIZE, RENDERED, PUSHED]
+
+
+class CheckpointStore:
+    """一次运行（按日期）的检查点"""
+
+    def __init__(self, run_date: Optional[str] = None, checkpoint_dir: str = CHECKPOINT_DIR):
+        self.checkpoint_dir = checkpoint_dir
+        self.run_date = run_date or datetime.now().strftime('%Y%m%d')
+        self.run_dir = os.path.join(checkpoint_dir, self.run_date)
+
+    def _path(self, stage: str) -> str:
+        return os.path.join(self.run_dir, f"{stage}.json")
+
+    def has(self, stage: str) -> bool:
+        return os.path.exists(self._path(stage))
+
+    def save(self, stage: str, data):
+        """保存阶段输出（先写临时文件再替换）"""
+        os.makedirs(self.run_dir, exist_ok=True)
+        path = self._path(stage)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'saved_at': datetime.now().isoformat(), 'data': data},
+                      f, ensure_ascii=False, default=str)
+        os.replace(tmp_path, path)
+
+    def load(self, stage: str, default=None):
+        """读取阶段输出，不存在或损坏时返回default"""
+        try:
+            with open(self._path(stage), encoding='utf-8') as f:
+                return json.load(f)['data']
+        except FileNotFoundError:
+            return default
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"检查点 {self.run_date}/{stage} 读取失败: {e}")
+            return default
+
+    def completed_stages(self) -> List[str]:
+        return [stage for stage in STAGES if self.has(stage)]
+
+    def clear(self):
+        """删除本次运行的全部检查点（重新执行时调用）"""
+        shutil.rmtree(self.run_dir, ignore_errors=True)
+
+    @classmethod
+    def latest(cls, stage: str, checkpoint_dir: str = CHECKPOINT_DIR) -> Optional['CheckpointStore']:
+        """包含指定阶段的最近一次运行"""
+        if not os.path.isdir(checkpoint_dir):
+            return None
+        for run_date in sorted(os.listdir(checkpoint_dir), reverse=True):
+            store = cls(run_date, checkpoint_dir)
+            if store.has(stage):
+                return store
+        return None
+
+    @classmethod
+    def prune(cls, keep_days: Optional[int] = None, checkpoint_dir: str = CHECKPOINT_DIR) -> int:
+        """删除超过保留天数的检查点"""
+        keep_days = keep_days if keep_days is not None else RUN_CONFIG.get('checkpoint_keep_days', 7)
+        if not os.path.isdir(checkpoint_dir):
+            return 0
+        cutoff = (datetime.now() - timedelta(days=keep_days)).strftime('%Y%m%d')
+        removed = 0
+        for run_date in os.listdir(checkpoint_dir):
+            if run_date.isdigit() and run_date < cutoff:
+                shutil.rmtree(os.path.join(checkpoint_dir, run_date), ignore_errors=True)
+                removed += 1
+        return removed
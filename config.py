@@ -24,6 +24,30 @@ NEWS_SOURCES = {
         'https://techcrunch.com/feed/',  # TechCrunch
     ],
 
+    # 外部源列表文件（OPML 或 CSV），可携带分类、来源权重、轮询间隔、启用状态
+    # 格式见 feed_registry.py；与 rss_feeds 合并，同一URL以文件中的配置为准
+    'feed_files': [
+        # './data/feeds.opml',
+    ],
+    'default_poll_interval': 0,  # 默认轮询间隔（分钟），距上次成功抓取不到该间隔的源本次跳过，0表示每次都抓取
+
+    # 流式解析：边下载边解析，超过日期截止/条目上限/字节上限即停止
+    # 对XML格式不规范的源会自动回退到feedparser
+    'streaming': {
+        'enabled': True,
+        'max_bytes': 2 * 1024 * 1024,  # 单个源最多读取2MB
+        'max_entries': 100,            # 单个源最多解析100条
+        'chunk_size': 64 * 1024,
+    },
+
+    # 进程池解析：线程池并发下载原始字节，进程池并行解析（源数量很多时开启）
+    # 下载受 streaming.max_bytes 限制，解析受 streaming.max_entries 限制
+    'process_pool': {
+        'enabled': False,
+        'fetch_workers': 16,   # 下载线程数
+        'parse_workers': 0,    # 解析进程数，0表示使用全部CPU核心
+    },
+
     # 可选：NewsAPI (需要API key)
     'newsapi': {
         'enabled': False,
@@ -32,6 +56,22 @@ NEWS_SOURCES = {
     }
 }
 
+# HTTP客户端配置（所有对外请求共用一个连接池）
+HTTP_CONFIG = {
+    'max_per_host': 4,         # 每个主机的最大并发连接数
+    'pool_connections': 32,    # 连接池缓存的主机数
+    'connect_timeout': 5,      # 连接超时（秒）
+    'read_timeout': 15,        # 读取超时（秒）
+    'retries': 2,              # GET请求连接失败时的重试次数
+    'dns_ttl': 300,            # DNS缓存时间（秒），0表示关闭
+    # 个别主机单独设置并发上限（推送接口需要对大量订阅者并发推送）
+    'host_limits': {
+        'sctapi.ftqq.com': 16,
+        'qyapi.weixin.qq.com': 16,
+    },
+    'user_agent': 'news-collector/1.0',
+}
+
 # 关键词配置
 KEYWORDS = {
     'us_stock': [
@@ -48,6 +88,24 @@ KEYWORDS = {
     ]
 }
 
+# 订阅方案（一次运行服务多个团队）
+# 每个方案有自己的关键词分类、来源权重、推送条数和推送目标；
+# 抓取、去重、AI摘要和市场分析在所有方案间共享，只做一次。
+# 留空时使用上面的 KEYWORDS 和下面的 WECHAT_CONFIG 作为唯一的默认方案。
+PROFILES = [
+    # {
+    #     'name': 'robotics',
+    #     'keywords': {
+    #         '具身智能': ['embodied AI', 'humanoid robot', '具身智能', '人形机器人'],
+    #         '自动驾驶': ['autonomous', 'self-driving', '自动驾驶'],
+    #     },
+    #     'source_weights': {'IEEE Spectrum': 1.4},
+    #     'max_news_count': 8,
+    #     'market_analysis': False,  # 是否在第一条附上市场分析
+    #     'wechat': {'serverchan': {'enabled': True, 'sendkey': 'SCTxxx'}},
+    # },
+]
+
 # 微信推送配置
 import os
 
@@ -62,13 +120,63 @@ WECHAT_CONFIG = {
     'work_wechat': {
         'enabled': False,
         'webhook_url': 'YOUR_WEBHOOK_URL',
-    }
+    },
+
+    # 方式3: 多个推送目标（配置后并发推送到全部目标，不再使用上面的方式1/2）
+    # 每个目标可单独设置 retries / timeout
+    'targets': [
+        # {'name': 'alice', 'type': 'serverchan', 'sendkey': 'SCTxxx'},
+        # {'name': 'team-robotics', 'type': 'work_wechat', 'webhook_url': 'https://qyapi.weixin.qq.com/...'},
+    ],
+
+    # 多目标推送的默认参数
+    'delivery': {
+        'max_workers': 16,     # 并发推送线程数
+        'retries': 2,          # 每个目标的重试次数
+        'timeout': 10,         # 每次请求的超时（秒）
+        'retry_backoff': 1.0,  # 重试退避基数（秒），按 1x、2x、4x 递增
+        'page_window': 2,      # 超长消息分页推送时，同时在途的分页数
+        # 单条消息字节上限，超出时按新闻条目分页
+        'max_bytes': {
+            'serverchan': 32 * 1024,
+            'work_wechat': 4096,
+        },
+    },
 }
 
 # 定时任务配置
 SCHEDULE_CONFIG = {
     'daily_time': '20:00',  # 每天晚上8点
+    'timezone': 'Asia/Shanghai',  # daily_time 等每日任务时间所在的时区
     'max_news_count': 10,   # 最多推送10条新闻
+
+    # `main.py schedule` 的任务，多个任务可并发运行（同一任务不会重叠）
+    # at: 每天的运行时间（timezone 指定时区，默认为上面的 timezone）；every: 运行间隔（秒）
+    # misfire: 程序未运行期间错过的运行，catchup 启动后立即补跑一次，skip 跳过
+    'max_workers': 4,
+    'jobs': {
+        'digest': {'enabled': True, 'misfire': 'catchup'},        # 每日推送，时间为 daily_time
+        'collect': {'enabled': False, 'every': 3600, 'misfire': 'skip'},  # 提前采集，推送时直接使用
+        'outbox': {'enabled': True, 'every': 10, 'misfire': 'skip'},      # 投递发件箱
+        # 美股收盘后预热市场数据和分析，推送时直接使用；周末和休市日不会重复获取
+        'market_warmup': {'enabled': True, 'at': '16:30', 'timezone': 'America/New_York', 'misfire': 'catchup'},
+    },
+
+    # 渐进推送：市场分析和前几条摘要完成后先推送一次，其余摘要完成后再推送后续
+    'progressive': {
+        'enabled': False,
+        'first_batch': 3,   # 首批推送的新闻条数（不含市场分析）
+    },
+}
+
+# 运行时间预算：超出预算的阶段降级处理而不是一直等待
+RUN_CONFIG = {
+    'deadline_seconds': 900,  # 一次运行的总时限（秒）
+    'stage_budgets': {
+        'market_analysis': 60,  # 超时后使用已获取/缓存的市场数据生成简单综述
+        'summarize': 120,       # 超时后剩余新闻改用简单摘要
+    },
+    'checkpoint_keep_days': 7,  # 运行检查点保留天数
 }
 
 # AI 摘要配置 (可选)
@@ -94,9 +202,141 @@ AI_CONFIG = {
     # 'api_key': os.environ.get('OPENAI_API_KEY', 'YOUR_AI_API_KEY'),
 
     'max_summary_length': 400,  # 摘要最大字数（增加灵活性）
+    'max_input_tokens': 1000,  # 每条新闻内容放入提示词的token上限（本地估算，超出时截断）
+    'stream': True,  # 逐条摘要时流式接收，达到 max_summary_length 后在段落或句子边界提前结束
+    'batch_size': 4,  # 每次请求总结的新闻条数，1 为逐条请求；批量结果无效的条目会再单独请求
+    'json_mode': True,  # 批量摘要请求JSON输出（response_format），服务商不支持时设为 False
+    'timeout': 60,  # 每次AI请求的超时（秒），调用方指定了更短的超时（如摘要的时间预算）时以调用方为准
+
+    # 多个服务商（可选）：配置后按顺序路由，首选服务商慢或故障时切换到下一个，上面的单个服务商配置不再使用
+    'providers': [
+        # {'name': 'zhipu', 'base_url': 'https://open.bigmodel.cn/api/paas/v4/', 'model': 'glm-4-flash',
+        #  'api_key': os.environ.get('ZHIPU_API_KEY', '')},
+        # {'name': 'deepseek', 'base_url': 'https://api.deepseek.com', 'model': 'deepseek-chat',
+        #  'api_key': os.environ.get('DEEPSEEK_API_KEY', '')},
+        # 不支持 response_format 的服务商加上 'json_mode': False
+    ],
+    'router': {
+        'hedge_percentile': 90,     # 请求超过首选服务商历史延迟的该分位数仍未返回时，向下一个服务商发送对冲请求
+        'hedge_min_delay': 2,       # 对冲等待的下限（秒）
+        'default_hedge_delay': 15,  # 延迟样本不足时的对冲等待（秒）
+        'failure_threshold': 3,     # 连续失败多少次后熔断
+        'reset_timeout': 60,        # 熔断冷却时间（秒），之后放行一次试探请求
+        'request_timeout': 60,      # 每次请求的超时（秒），默认同 AI_CONFIG['timeout']
+    },
+}
+
+# 市场分析配置
+MARKET_CONFIG = {
+    # 主要指数
+    'indices': {
+        'S&P 500': '^GSPC',
+        'Dow Jones': '^DJI',
+        'NASDAQ': '^IXIC',
+        'Russell 2000': '^RUT',
+        'VIX': '^VIX',  # 恐慌指数
+    },
+    # 主要板块ETF
+    'sectors': {
+        '科技': 'XLK',
+        '金融': 'XLF',
+        '医疗': 'XLV',
+        '能源': 'XLE',
+        '消费': 'XLY',
+        '工业': 'XLI',
+        '材料': 'XLB',
+        '公用事业': 'XLU',
+    },
+    # 股票池：异动榜、涨跌家数和行业统计在整个股票池上计算
+    'universe': {
+        # 热门股票（同时用于财报日历）
+        'hot_stocks': {
+            'Apple': 'AAPL',
+            'Microsoft': 'MSFT',
+            'Google': 'GOOGL',
+            'Amazon': 'AMZN',
+            'Tesla': 'TSLA',
+            'NVIDIA': 'NVDA',
+            'Meta': 'META',
+            'Netflix': 'NFLX',
+        },
+        # 成分股CSV文件（列: symbol, name, sector），如标普500、纳指100成分股
+        'files': [
+            # './data/sp500.csv',
+        ],
+        'chunk_size': 100,  # 每次批量下载的股票数
+    },
+    # 行情数据源: 'yfinance' 在线获取；'local' 读取 local_dir 下的 CSV/Parquet（见 market_providers.py）
+    'provider': 'yfinance',
+    'local_dir': './data/market',
+    'history_period': '1y',  # 下载的历史行情长度（技术指标需要约一年日线）
+    'movers_count': 5,       # 涨幅榜/跌幅榜条数
+}
+
+# 股票实体链接：标注新闻提及的股票及当日涨跌
+ENTITY_CONFIG = {
+    'enabled': True,
+    'max_tickers': 3,  # 每条新闻最多标注的股票数
+    # 代码 -> 别名（中文名、常用英文名）；这些代码不带 $ 也会匹配
+    'aliases': {
+        'AAPL': ['苹果公司', '苹果', 'Apple'],
+        'MSFT': ['微软', 'Microsoft'],
+        'GOOGL': ['谷歌', 'Google', 'Alphabet'],
+        'AMZN': ['亚马逊', 'Amazon'],
+        'TSLA': ['特斯拉', 'Tesla'],
+        'NVDA': ['英伟达', 'NVIDIA', 'Nvidia'],
+        'META': ['Meta Platforms', 'Meta', 'Facebook'],
+        'NFLX': ['奈飞', '网飞', 'Netflix'],
+        'AMD': ['超威半导体', 'AMD'],
+        'TSM': ['台积电', 'TSMC'],
+        'AVGO': ['博通', 'Broadcom'],
+        'INTC': ['英特尔', 'Intel'],
+    },
+    # 去掉 Inc./Corp. 等后缀后不单独作为公司名匹配的单词（补充 entity_linker.COMMON_WORDS）
+    'stopwords': [],
+}
+
+# 盘中监控（`main.py monitor`）：美股交易时段内定时批量获取报价，触发规则时推送提醒
+MONITOR_CONFIG = {
+    'interval': 60,   # 轮询间隔（秒）
+    'history': 120,   # 每个代码保留的最近观测数（环形缓冲）
+    'cooldown': 1800,  # 同一规则、同一代码两次提醒的最短间隔（秒）
+    # 监控列表（名称 -> 代码），为空时使用 MARKET_CONFIG 的指数和热门股票
+    'watchlist': {},
+    # 规则 type: change 为相对前收盘的涨跌幅（%），roc 为最近 window 次观测内的涨跌幅（%）
+    # direction: up / down / both；symbols 只对这些代码生效，exclude 排除这些代码
+    'rules': [
+        {'name': 'vix_jump', 'label': 'VIX跳升', 'type': 'change', 'threshold': 10,
+         'direction': 'up', 'symbols': ['^VIX']},
+        {'name': 'big_move', 'label': '大幅波动', 'type': 'change', 'threshold': 5, 'exclude': ['^VIX']},
+        {'name': 'fast_move', 'label': '快速异动', 'type': 'roc', 'window': 5, 'threshold': 2,
+         'exclude': ['^VIX']},
+    ],
 }
 
 # 数据存储
 DATA_DIR = './data'
 CACHE_FILE = f'{DATA_DIR}/news_cache.json'
 LOG_FILE = f'{DATA_DIR}/news_collector.log'
+SHARD_DIR = f'{DATA_DIR}/shards'  # 分片采集输出目录
+OUTBOX_DIR = f'{DATA_DIR}/outbox'  # 推送发件箱目录
+SCHEDULER_STATE_FILE = f'{DATA_DIR}/scheduler_state.json'  # 定时任务上次运行时间
+FEED_POLL_STATE_FILE = f'{DATA_DIR}/feed_poll_state.json'  # 设置了轮询间隔的源上次抓取时间
+CHECKPOINT_DIR = f'{DATA_DIR}/checkpoints'  # 运行检查点目录（按日期）
+MARKET_DATA_CACHE = f'{DATA_DIR}/market_data_cache.json'  # 最近一次成功获取的市场数据
+MARKET_WARM_CACHE = f'{DATA_DIR}/market_warm_cache.json'  # 最近一个交易时段的市场数据和分析（预热）
+MARKET_PANEL_CACHE = f'{DATA_DIR}/market_panel.pkl'  # 股票池行情面板缓存
+MARKET_ANALYSIS_CACHE = f'{DATA_DIR}/market_analysis_cache.json'  # AI市场分析缓存（按市场数据指纹）
+
+# 推送发件箱：消息先持久化再异步投递，推送服务故障时自动重试
+OUTBOX_CONFIG = {
+    'enabled': True,
+    'max_attempts': 8,       # 最大投递次数，超过后移入 outbox/dead
+    'backoff_base': 30,      # 重试退避基数（秒），按 1x、2x、4x... 递增
+    'backoff_max': 3600,     # 单次退避上限（秒）
+    'poll_interval': 10,     # 后台投递器检查间隔（秒）
+    'lease_seconds': 600,    # 投递中的消息超过该时间未完成，视为投递器崩溃并重新入队
+    'deliver_wait': 300,     # `main.py run` / `main.py deliver` 等待重试的最长时间（秒）
+    'sent_keep_days': 7,     # outbox/sent 中已送达消息的保留天数
+    'dead_keep_days': 30,    # outbox/dead 中投递失败消息的保留天数（留作排查）
+}
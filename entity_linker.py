@@ -0,0 +1,133 @@
+"""
+股票实体链接模块
+
+把股票池的代码（$TSLA、热门股票的裸代码 NVDA）、公司名称和中文别名（英伟达、苹果）
+编译成一个关键词匹配器，对每篇新闻的标题和摘要做一次扫描找出提及的股票，
+再用本交易时段已缓存的行情标注当日涨跌，推送和HTML中直接展示，不逐条请求行情。
+"""
+
+import logging
+import re
+from typing import Dict, Iterable, List, Optional
+
+from config import ENTITY_CONFIG, MARKET_CONFIG
+from keyword_matcher import KeywordMatcher
+
+logger = logging.getLogger(__name__)
+
+# 公司名称中去掉的后缀（"Apple Inc." -> "Apple"）
+_NAME_SUFFIX = re.compile(
+    r'(,?\s+(Inc\.?|Incorporated|Corp\.?|Corporation|Co\.?|Company|Ltd\.?|Limited|plc|PLC|'
+    r'Holdings?|Group|N\.V\.|S\.A\.|\(The\)|\(Class [A-C]\)|Class [A-C]))+$'
+)
+# 短于此长度的名称容易误匹配，不参与匹配
+MIN_NAME_LENGTH = 3
+# 去掉后缀后只剩一个常用英文单词的公司名（"Target Corporation" -> "Target"），句首的普通单词就会误匹配；
+# 这些公司只匹配完整名称、$代码和配置的别名。ENTITY_CONFIG['stopwords'] 可以补充
+COMMON_WORDS = frozenset({
+    'ball', 'best', 'block', 'carrier', 'crown', 'dover', 'eaton', 'energy', 'equity', 'everest',
+    'first', 'fox', 'gap', 'general', 'global', 'international', 'live', 'match', 'mosaic',
+    'national', 'news', 'oracle', 'pool', 'progressive', 'public', 'realty', 'regions', 'ross',
+    'southern', 'target', 'tapestry', 'united', 'waters',
+})
+
+
+def clean_company_name(name: str) -> str:
+    return _NAME_SUFFIX.sub('', str(name).strip()).strip()
+
+
+def name_keyword(name: str, stopwords: frozenset = COMMON_WORDS) -> str:
+    """公司名称的匹配关键词：去掉后缀的名称；只剩一个常用单词时使用完整名称"""
+    name = str(name).strip()
+    cleaned = clean_company_name(name)
+    if ' ' not in cleaned and cleaned.lower() in stopwords:
+        return name if name != cleaned else ''
+    return cleaned
+
+
+class EntityLinker:
+    """股票代码、公司名称、中文别名 -> 股票代码"""
+
+    def __init__(self, names: Dict[str, str], aliases: Optional[Dict[str, List[str]]] = None,
+                 bare_tickers: Iterable[str] = (), stopwords: Iterable[str] = ()):
+        """
+        names: 代码 -> 公司名称（股票池）
+        aliases: 代码 -> 别名列表（中文名、常用英文名）
+        bare_tickers: 不带 $ 也匹配的代码（常见单词一样的代码只能用 $ 形式）
+        stopwords: 在 COMMON_WORDS 之外，不单独作为公司名匹配的单词
+        """
+        aliases = aliases or {}
+        stopwords = COMMON_WORDS | {word.lower() for word in stopwords}
+        self.names = dict(names)
+        # 先加入的优先：别名、热门股票、股票池
+        self._symbol_of: Dict[str, str] = {}
+
+        for symbol, alias_list in aliases.items():
+            for alias in alias_list:
+                self._add(alias, symbol)
+            self.names.setdefault(symbol, alias_list[0] if alias_list else symbol)
+        for symbol in bare_tickers:
+            self._add(symbol, symbol)
+        for symbol, name in names.items():
+            self._add(f'${symbol}', symbol)
+            name = name_keyword(name, stopwords)
+            if len(name) >= MIN_NAME_LENGTH and name != symbol:
+                self._add(name, symbol)
+
+        # 代码和英文名区分大小写（避免 "target" 命中 Target），并要求词边界
+        self.matcher = KeywordMatcher(self._symbol_of.keys(), word_boundary=True, case_sensitive=True)
+
+    def _add(self, keyword: str, symbol: str):
+        keyword = keyword.strip()
+        if keyword:
+            self._symbol_of.setdefault(keyword, symbol)
+
+    def link(self, text: str) -> List[str]:
+        """文本中提及的股票代码，按首次出现的顺序"""
+        symbols = []
+        for _, keyword in self.matcher.find_spans(text):
+            symbol = self._symbol_of[keyword]
+            if symbol not in symbols:
+                symbols.append(symbol)
+        return symbols
+
+    def annotate(self, news_list: List[Dict], changes=None, max_tickers: Optional[int] = None) -> int:
+        """
+        为新闻添加 tickers 字段: [{'symbol', 'name', 'price', 'change_pct'}]
+        changes: daily_changes() 的结果（索引为代码），没有行情时只标注代码
+        返回标注了股票的新闻数
+        """
+        max_tickers = max_tickers or ENTITY_CONFIG.get('max_tickers', 3)
+        linked = 0
+        for news in news_list:
+            symbols = self.link(f"{news.get('title', '')}\n{news.get('summary', '')}")[:max_tickers]
+            tickers = []
+            for symbol in symbols:
+                ticker = {'symbol': symbol, 'name': self.names.get(symbol, symbol),
+                          'price': None, 'change_pct': None}
+                if changes is not None and symbol in changes.index:
+                    row = changes.loc[symbol]
+                    ticker['price'] = round(float(row['price']), 2)
+                    ticker['change_pct'] = round(float(row['change_pct']), 2)
+                tickers.append(ticker)
+            news['tickers'] = tickers
+            linked += bool(tickers)
+        return linked
+
+
+def format_ticker(ticker: Dict) -> str:
+    """NVDA +3.21%"""
+    if ticker.get('change_pct') is None:
+        return ticker['symbol']
+    return f"{ticker['symbol']} {ticker['change_pct']:+.2f}%"
+
+
+def build_entity_linker() -> EntityLinker:
+    """按股票池和 ENTITY_CONFIG 创建实体链接器"""
+    from market_panel import load_universe
+
+    universe = load_universe()
+    hot_stocks = MARKET_CONFIG.get('universe', {}).get('hot_stocks', {})
+    aliases = ENTITY_CONFIG.get('aliases', {})
+    bare_tickers = list(hot_stocks.values()) + list(aliases)
+    return EntityLinker(universe['name'].to_dict(), aliases, bare_tickers, ENTITY_CONFIG.get('stopwords', []))
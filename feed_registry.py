@@ -0,0 +1,223 @@
+"""
+RSS源列表模块
+
+除了 config.py 中的 rss_feeds 外，还可以从 OPML / CSV 文件导入大量源。
+每个源带有元数据：分类、来源权重、轮询间隔、是否启用。
+源列表在第一次使用时才加载，并按URL建立索引。
+设置了轮询间隔的源，上次成功抓取的时间和抓到的新闻保存在 FEED_POLL_STATE_FILE，
+未到间隔时收集新闻不再请求它，而是沿用上次抓到的新闻。
+
+OPML 示例（分类取外层 outline 的 text，可选属性 weight / interval / enabled）:
+  <outline text="美股">
+    <outline text="CNBC" xmlUrl="https://..." weight="1.3" interval="30"/>
+  </outline>
+
+CSV 示例（表头必需 url，其余列可选）:
+  url,title,category,weight,interval,enabled
+  https://...,CNBC,美股,1.3,30,true
+"""
+
+import csv
+import json
+import logging
+import os
+import threading
+from typing import Dict, Iterator, List, NamedTuple, Optional
+from xml.etree.ElementTree import iterparse
+
+from config import FEED_POLL_STATE_FILE, NEWS_SOURCES
+
+logger = logging.getLogger(__name__)
+
+
+class FeedInfo(NamedTuple):
+    """单个RSS源及其元数据"""
+    url: str
+    title: str = ''
+    category: str = ''
+    weight: Optional[float] = None  # 覆盖 NewsRanker 中按来源名称匹配的权重
+    interval: int = 0               # 轮询间隔（分钟），0表示每次都抓取
+    enabled: bool = True
+
+
+def _parse_bool(value, default: bool = True) -> bool:
+    if value is None or value == '':
+        return default
+    return str(value).strip().lower() not in ('0', 'false', 'no', 'off', 'disabled')
+
+
+def _parse_float(value) -> Optional[float]:
+    try:
+        return float(value) if value not in (None, '') else None
+    except ValueError:
+        return None
+
+
+def _parse_int(value, default: int = 0) -> int:
+    try:
+        return int(float(value)) if value not in (None, '') else default
+    except ValueError:
+        return default
+
+
+def load_opml(path: str, default_interval: int = 0) -> Iterator[FeedInfo]:
+    """增量解析OPML文件，逐个产出源"""
+    categories = []
+
+    for event, elem in iterparse(path, events=('start', 'end')):
+        if elem.tag != 'outline':
+            continue
+
+        if event == 'start':
+            parent_category = categories[-1] if categories else ''
+            url = elem.get('xmlUrl')
+            if url:
+                yield FeedInfo(
+                    url=url.strip(),
+                    title=elem.get('title') or elem.get('text') or '',
+                    category=elem.get('category') or parent_category,
+                    weight=_parse_float(elem.get('weight')),
+                    interval=_parse_int(elem.get('interval'), default_interval),
+                    enabled=_parse_bool(elem.get('enabled')) and not _parse_bool(elem.get('isDisabled'), False),
+                )
+                categories.append(parent_category)
+            else:
+                # 无 xmlUrl 的 outline 作为分类目录
+                categories.append(elem.get('text') or elem.get('title') or parent_category)
+        else:
+            categories.pop()
+            elem.clear()
+
+
+def load_csv(path: str, default_interval: int = 0) -> Iterator[FeedInfo]:
+    """逐行读取CSV源列表"""
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        for row in csv.DictReader(f):
+            url = (row.get('url') or '').strip()
+            if not url:
+                continue
+            yield FeedInfo(
+                url=url,
+                title=(row.get('title') or '').strip(),
+                category=(row.get('category') or '').strip(),
+                weight=_parse_float(row.get('weight')),
+                interval=_parse_int(row.get('interval'), default_interval),
+                enabled=_parse_bool(row.get('enabled')),
+            )
+
+
+class FeedRegistry:
+    """按URL索引的源列表，首次访问时加载"""
+
+    def __init__(self, rss_feeds: Optional[List[str]] = None, feed_files: Optional[List[str]] = None,
+                 default_interval: int = 0):
+        self._rss_feeds = rss_feeds or []
+        self._feed_files = feed_files or []
+        self._default_interval = default_interval
+        self._index: Optional[Dict[str, FeedInfo]] = None
+        self._lock = threading.Lock()
+
+    @property
+    def index(self) -> Dict[str, FeedInfo]:
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    self._index = self._load()
+        return self._index
+
+    def _load(self) -> Dict[str, FeedInfo]:
+        index = {}
+
+        # config.py 中的源
+        for url in self._rss_feeds:
+            index.setdefault(url, FeedInfo(url=url, interval=self._default_interval))
+
+        # 外部源列表文件，后出现的同URL条目覆盖前面的元数据
+        for path in self._feed_files:
+            if not os.path.exists(path):
+                logger.warning(f"源列表文件不存在: {path}")
+                continue
+
+            loader = load_opml if path.lower().endswith(('.opml', '.xml')) else load_csv
+            try:
+                count = 0
+                for feed in loader(path, self._default_interval):
+                    index[feed.url] = feed
+                    count += 1
+                logger.info(f"从 {path} 导入了 {count} 个源")
+            except Exception as e:
+                logger.error(f"导入源列表失败 {path}: {e}")
+
+        return index
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __contains__(self, url: str) -> bool:
+        return url in self.index
+
+    def get(self, url: str) -> Optional[FeedInfo]:
+        return self.index.get(url)
+
+    def urls(self, enabled_only: bool = True) -> List[str]:
+        """源URL列表（保持导入顺序）"""
+        return [url for url, feed in self.index.items() if feed.enabled or not enabled_only]
+
+    def weight_for(self, url: str) -> Optional[float]:
+        feed = self.index.get(url) if url else None
+        return feed.weight if feed else None
+
+    def due_urls(self, last_polled: Dict[str, float], now: float) -> List[str]:
+        """按轮询间隔筛选到期的源；last_polled 为 URL -> 上次抓取的时间戳"""
+        due = []
+        for url, feed in self.index.items():
+            if not feed.enabled:
+                continue
+            last = last_polled.get(url)
+            if last is None or feed.interval <= 0 or now - last >= feed.interval * 60:
+                due.append(url)
+        return due
+
+
+def load_poll_state(path: str = FEED_POLL_STATE_FILE) -> Dict[str, Dict]:
+    """URL -> {'polled_at': 上次成功抓取的时间戳, 'items': 当时抓到的新闻}"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning(f"读取源抓取状态失败: {e}")
+        return {}
+    # 格式不对的条目视为从未抓取，本次重新抓取
+    return {url: entry for url, entry in state.items() if isinstance(entry, dict) and 'polled_at' in entry}
+
+
+def save_poll_state(polled: Dict[str, Dict], path: str = FEED_POLL_STATE_FILE):
+    """合并保存抓取状态（分片采集时各分片只更新自己负责的源）"""
+    if not polled:
+        return
+    state = load_poll_state(path)
+    state.update(polled)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False, default=str)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"保存源抓取状态失败: {e}")
+
+
+_registry = None
+
+
+def get_feed_registry() -> FeedRegistry:
+    """全局源列表（按 config.py 构建）"""
+    global _registry
+    if _registry is None:
+        _registry = FeedRegistry(
+            rss_feeds=NEWS_SOURCES.get('rss_feeds', []),
+            feed_files=NEWS_SOURCES.get('feed_files', []),
+            default_interval=NEWS_SOURCES.get('default_poll_interval', 0),
+        )
+    return _registry
@@ -0,0 +1,216 @@
+"""
+流式RSS/Atom解析模块
+
+按块读取响应并增量解析条目，遇到超过日期截止时间或条目数上限时提前停止，
+单个源的内存占用受字节上限约束。
+"""
+
+import logging
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional, Tuple
+from xml.etree.ElementTree import XMLPullParser, ParseError
+
+logger = logging.getLogger(__name__)
+
+# 条目元素（去掉命名空间后的本地名）
+ENTRY_TAGS = {'item', 'entry'}
+# 源级容器元素，用于读取源标题
+FEED_TAGS = {'channel', 'feed'}
+
+# 字段映射：本地名 -> 统一字段（按优先级，先出现者优先）
+TITLE_TAGS = ('title',)
+SUMMARY_TAGS = ('description', 'summary', 'encoded', 'content')
+PUBLISHED_TAGS = ('pubDate', 'published', 'date', 'updated', 'issued', 'modified')
+
+
+def _local_name(tag: str) -> str:
+    """去掉 {namespace} 前缀"""
+    if tag and tag[0] == '{':
+        return tag.rsplit('}', 1)[1]
+    return tag
+
+
+def parse_feed_date(value: str) -> Optional[datetime]:
+    """解析RSS/Atom中的日期字符串，失败返回None"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        # RSS 2.0: RFC 822
+        return parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        pass
+    try:
+        # Atom: RFC 3339
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        pass
+    try:
+        from dateutil import parser
+        return parser.parse(value)
+    except Exception:
+        return None
+
+
+class StreamingFeedParser:
+    """增量式RSS/Atom解析器，可逐块喂入字节"""
+
+    def __init__(self, feed_url: str, cutoff: Optional[datetime] = None, max_entries: int = 100):
+        self.feed_url = feed_url
+        self.cutoff = cutoff
+        self.max_entries = max_entries
+
+        self.feed_title = ''
+        self.entries: List[Dict] = []
+        self.stop_reason = None  # 'cutoff' / 'max_entries' / 'max_bytes'
+        self.bytes_read = 0
+
+        self._parser = XMLPullParser(events=('start', 'end'))
+        self._stack = []  # 当前打开的元素链，用于及时释放已处理条目
+        self._in_entry = False
+
+    @property
+    def done(self) -> bool:
+        return self.stop_reason is not None
+
+    def feed(self, chunk: bytes) -> bool:
+        """
+        喂入一块数据
+        返回False表示已满足停止条件，调用方应停止读取
+        """
+        if self.done:
+            return False
+
+        self.bytes_read += len(chunk)
+        self._parser.feed(chunk)
+
+        for event, elem in self._parser.read_events():
+            name = _local_name(elem.tag)
+
+            if event == 'start':
+                self._stack.append(elem)
+                if name in ENTRY_TAGS:
+                    self._in_entry = True
+                continue
+
+            # end 事件
+            self._stack.pop()
+
+            if name in ENTRY_TAGS:
+                self._in_entry = False
+                self._handle_entry(elem)
+                # 从父节点移除已处理的条目，避免整棵树留在内存中
+                if self._stack:
+                    self._stack[-1].remove(elem)
+                if self.done:
+                    return False
+            elif name == 'title' and not self._in_entry and not self.feed_title:
+                parent = _local_name(self._stack[-1].tag) if self._stack else ''
+                if parent in FEED_TAGS:
+                    self.feed_title = (elem.text or '').strip()
+
+        return True
+
+    def _handle_entry(self, elem):
+        """把一个条目元素规范化为新闻字典"""
+        fields = {}
+        link = ''
+
+        for child in elem:
+            name = _local_name(child.tag)
+
+            if name == 'link':
+                # Atom: <link rel="alternate" href="..."/>；RSS: <link>...</link>
+                href = child.get('href')
+                if href:
+                    if not link or child.get('rel', 'alternate') == 'alternate':
+                        link = href
+                elif child.text and not link:
+                    link = child.text.strip()
+                continue
+
+            if name in fields:
+                continue
+            if name in TITLE_TAGS or name in SUMMARY_TAGS or name in PUBLISHED_TAGS:
+                fields[name] = ''.join(child.itertext()).strip()
+
+        published = next((fields[t] for t in PUBLISHED_TAGS if fields.get(t)), '')
+
+        if self.cutoff is not None and published:
+            pub_date = parse_feed_date(published)
+            if pub_date is not None and pub_date.replace(tzinfo=None) < self.cutoff:
+                # 源按时间倒序排列，第一条过期条目之后都是更旧的
+                self.stop_reason = 'cutoff'
+                return
+
+        self.entries.append({
+            'title': fields.get('title', ''),
+            'link': link,
+            'summary': next((fields[t] for t in SUMMARY_TAGS if fields.get(t)), ''),
+            'published': published,
+        })
+
+        if len(self.entries) >= self.max_entries:
+            self.stop_reason = 'max_entries'
+
+
+def parse_feed_stream(feed_url: str, chunks, cutoff: Optional[datetime] = None,
+                      max_entries: int = 100, max_bytes: int = 2 * 1024 * 1024) -> StreamingFeedParser:
+    """
+    从字节块迭代器中增量解析源
+    超过max_bytes后停止读取；XML格式错误且尚未解析出条目时抛出ParseError
+    """
+    parser = StreamingFeedParser(feed_url, cutoff=cutoff, max_entries=max_entries)
+
+    try:
+        for chunk in chunks:
+            if not chunk:
+                continue
+            if parser.bytes_read + len(chunk) > max_bytes:
+                chunk = chunk[:max_bytes - parser.bytes_read]
+                parser.feed(chunk)
+                if not parser.done:
+                    parser.stop_reason = 'max_bytes'
+                break
+            if not parser.feed(chunk):
+                break
+    except ParseError:
+        if not parser.entries:
+            raise
+        logger.warning(f"解析 {feed_url} 时遇到格式错误，保留已解析的 {len(parser.entries)} 条")
+
+    return parser
+
+
+def parse_feed_bytes(feed_url: str, data: bytes, cutoff: Optional[datetime] = None,
+                     max_entries: int = 100) -> Tuple[str, List[Tuple[str, str, str, str]]]:
+    """
+    解析完整的源字节（供进程池调用）
+    返回 (源标题, [(title, link, summary, published), ...])，
+    只传回精简的元组以降低进程间序列化开销
+    """
+    try:
+        parser = parse_feed_stream(feed_url, (data,), cutoff=cutoff,
+                                   max_entries=max_entries, max_bytes=len(data))
+        title = parser.feed_title
+        entries = [(e['title'], e['link'], e['summary'], e['published']) for e in parser.entries]
+        return title, entries
+    except ParseError:
+        pass
+
+    # XML不规范时回退到feedparser
+    import feedparser
+    feed = feedparser.parse(data)
+    entries = []
+    for entry in feed.entries:
+        published = entry.get('published', '')
+        if cutoff is not None and published:
+            pub_date = parse_feed_date(published)
+            if pub_date is not None and pub_date.replace(tzinfo=None) < cutoff:
+                continue
+        entries.append((entry.get('title', ''), entry.get('link', ''),
+                        entry.get('summary', ''), published))
+        if len(entries) >= max_entries:
+            break
+    return feed.feed.get('title', ''), entries
@@ -6,6 +6,8 @@ from typing import List, Dict
 from datetime import datetime
 import logging
 
+from entity_linker import format_ticker
+
 logger = logging.getLogger(__name__)
 
 
@@ -126,6 +128,26 @@ class HTMLGenerator:
             color: #7b1fa2;
         }}
 
+        .ticker-tag {{
+            display: inline-block;
+            background: #f5f5f5;
+            color: #555;
+            padding: 3px 10px;
+            border-radius: 12px;
+            font-size: 12px;
+            margin-right: 8px;
+        }}
+
+        .ticker-tag.up {{
+            background: #ffebee;
+            color: #d32f2f;
+        }}
+
+        .ticker-tag.down {{
+            background: #e8f5e9;
+            color: #2e7d32;
+        }}
+
         .news-summary {{
             color: #34495e;
             font-size: 14px;
@@ -223,6 +245,13 @@ class HTMLGenerator:
                 css_class = "ai" if "AI" in cat or "智能" in cat else ""
                 category_html += f'<span class="category-tag {css_class}">{cat}</span>'
 
+            # 相关股票及当日涨跌（红涨绿跌）
+            for ticker in news.get('tickers', []):
+                change = ticker.get('change_pct')
+                css_class = "" if not change else ("up" if change > 0 else "down")
+                category_html += (f'<span class="ticker-tag {css_class}" title="{ticker["name"]}">'
+                                  f'{format_ticker(ticker)}</span>')
+
             news_item_html = f"""
             <div class="news-item">
                 <div>
@@ -0,0 +1,222 @@
+"""
+共享HTTP客户端模块
+
+所有对外HTTP请求（RSS、NewsAPI、推送等）统一走这里：
+- 全局复用一个Session，保持keep-alive连接池，避免重复TCP/TLS握手
+- 默认声明 gzip/deflate（安装brotli时加上br）压缩
+- 按主机限制并发连接数
+- DNS缓存（只作用于本模块的连接池，不影响 openai 等其它库）
+- 统一的超时设置
+
+requests 在第一次发请求时才导入，不发请求的命令不需要加载它。
+"""
+
+import ipaddress
+import logging
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Dict, Iterator, List
+from urllib.parse import urlsplit
+
+from config import HTTP_CONFIG
+
+if TYPE_CHECKING:
+    import requests
+
+logger = logging.getLogger(__name__)
+
+_session = None
+_session_lock = threading.Lock()
+
+_host_slots: Dict[str, threading.BoundedSemaphore] = {}
+_host_slots_lock = threading.Lock()
+
+_dns_cache: Dict[tuple, tuple] = {}  # (主机, 端口) -> (过期时间, 地址列表)
+_dns_lock = threading.Lock()
+
+
+def _accept_encoding() -> str:
+    """urllib3只有在安装了brotli时才能解码br"""
+    try:
+        import brotli  # noqa: F401
+        return 'gzip, deflate, br'
+    except ImportError:
+        try:
+            import brotlicffi  # noqa: F401
+            return 'gzip, deflate, br'
+        except ImportError:
+            return 'gzip, deflate'
+
+
+def _is_ip(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host.strip('[]'))
+        return True
+    except ValueError:
+        return False
+
+
+def _resolve(host: str, port: int) -> List[str]:
+    """带TTL的DNS解析缓存，返回主机的IP地址列表；只缓存成功的解析结果，过期条目随时清理"""
+    key = (host, port)
+    now = time.monotonic()
+
+    with _dns_lock:
+        cached = _dns_cache.get(key)
+        if cached and cached[0] > now:
+            return cached[1]
+
+    infos = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+    addresses = list(dict.fromkeys(info[4][0] for info in infos))
+    with _dns_lock:
+        for expired in [k for k, (expires, _) in _dns_cache.items() if expires <= now]:
+            del _dns_cache[expired]
+        _dns_cache[key] = (now + HTTP_CONFIG.get('dns_ttl', 300), addresses)
+    return addresses
+
+
+def _evict(host: str, port: int):
+    with _dns_lock:
+        _dns_cache.pop((host, port), None)
+
+
+def _create_adapter(**kwargs):
+    """
+    使用DNS缓存的 HTTPAdapter：连接池创建新连接时按缓存的地址逐个连接（TLS仍校验原主机名），
+    全部地址都连不上时丢弃缓存，下次重新解析
+    """
+    from requests.adapters import HTTPAdapter
+    from urllib3.connection import HTTPConnection, HTTPSConnection
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+    from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+    class CachedDNSMixin:
+        def _new_conn(self):
+            host = self._dns_host
+            if HTTP_CONFIG.get('dns_ttl', 300) <= 0 or _is_ip(host):
+                return super()._new_conn()
+            try:
+                addresses = _resolve(host, self.port)
+            except OSError:
+                # 解析失败交给 urllib3 按原流程报错
+                return super()._new_conn()
+
+            last_error = None
+            try:
+                for address in addresses:
+                    self._dns_host = address
+                    try:
+                        return super()._new_conn()
+                    except (ConnectTimeoutError, NewConnectionError) as e:
+                        last_error = e
+            finally:
+                self._dns_host = host
+            _evict(host, self.port)
+            raise last_error
+
+    class CachedHTTPConnection(CachedDNSMixin, HTTPConnection):
+        pass
+
+    class CachedHTTPSConnection(CachedDNSMixin, HTTPSConnection):
+        pass
+
+    class CachedHTTPConnectionPool(HTTPConnectionPool):
+        ConnectionCls = CachedHTTPConnection
+
+    class CachedHTTPSConnectionPool(HTTPSConnectionPool):
+        ConnectionCls = CachedHTTPSConnection
+
+    class CachedDNSAdapter(HTTPAdapter):
+        def init_poolmanager(self, *args, **pool_kwargs):
+            super().init_poolmanager(*args, **pool_kwargs)
+            self.poolmanager.pool_classes_by_scheme = {
+                'http': CachedHTTPConnectionPool,
+                'https': CachedHTTPSConnectionPool,
+            }
+
+    return CachedDNSAdapter(**kwargs)
+
+
+def get_session() -> 'requests.Session':
+    """获取全局共享的Session（首次调用时创建）"""
+    global _session
+
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                import requests
+                from urllib3.util.retry import Retry
+
+                retries = HTTP_CONFIG.get('retries', 2)
+                adapter = _create_adapter(
+                    pool_connections=HTTP_CONFIG.get('pool_connections', 32),
+                    pool_maxsize=max([HTTP_CONFIG.get('max_per_host', 4)] +
+                                     list(HTTP_CONFIG.get('host_limits', {}).values())),
+                    max_retries=Retry(
+                        total=retries,
+                        connect=retries,
+                        read=0,
+                        status=0,
+                        backoff_factor=0.3,
+                        allowed_methods=frozenset({'GET', 'HEAD'}),
+                    ),
+                )
+
+                session = requests.Session()
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                session.headers.update({
+                    'User-Agent': HTTP_CONFIG.get('user_agent', 'news-collector/1.0'),
+                    'Accept-Encoding': _accept_encoding(),
+                })
+                _session = session
+
+    return _session
+
+
+def _host_slot(url: str) -> threading.BoundedSemaphore:
+    """每个主机一个信号量，限制对同一主机的并发请求数"""
+    host = urlsplit(url).netloc.lower()
+    with _host_slots_lock:
+        slot = _host_slots.get(host)
+        if slot is None:
+            limit = HTTP_CONFIG.get('host_limits', {}).get(host, HTTP_CONFIG.get('max_per_host', 4))
+            slot = threading.BoundedSemaphore(limit)
+            _host_slots[host] = slot
+    return slot
+
+
+def _default_timeout():
+    return (HTTP_CONFIG.get('connect_timeout', 5), HTTP_CONFIG.get('read_timeout', 15))
+
+
+def request(method: str, url: str, **kwargs) -> 'requests.Response':
+    """发送请求（响应体已完整读取，连接已归还连接池）"""
+    kwargs.setdefault('timeout', _default_timeout())
+    with _host_slot(url):
+        return get_session().request(method, url, **kwargs)
+
+
+def get(url: str, **kwargs) -> 'requests.Response':
+    return request('GET', url, **kwargs)
+
+
+def post(url: str, **kwargs) -> 'requests.Response':
+    return request('POST', url, **kwargs)
+
+
+@contextmanager
+def stream(url: str, **kwargs) -> Iterator['requests.Response']:
+    """
+    流式GET请求，主机并发名额在读取响应体期间一直占用
+    退出上下文时关闭响应，未读完的连接会被丢弃而不是放回连接池
+    """
+    kwargs.setdefault('timeout', _default_timeout())
+    with _host_slot(url):
+        response = get_session().get(url, stream=True, **kwargs)
+        try:
+            yield response
+        finally:
+            response.close()
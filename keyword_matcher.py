@@ -0,0 +1,93 @@
+"""
+关键词匹配模块
+
+把大量关键词编译成一个正则，对文本做一次扫描即可找出全部命中的关键词，
+匹配语义与逐个 `keyword.lower() in text` 相同（子串匹配、不区分大小写）。
+
+实现方式：在每个位置用零宽前瞻尝试匹配按长度降序排列的备选项，
+同一位置只会命中最长的关键词，被它包含的较短关键词通过预先计算的
+"包含关系"一并记为命中。
+"""
+
+import re
+from typing import Dict, Iterable, List, Set
+
+
+class KeywordMatcher:
+    """一次扫描匹配多个关键词"""
+
+    def __init__(self, keywords: Iterable[str], word_boundary: bool = False, case_sensitive: bool = False):
+        """
+        keywords: 关键词列表
+        word_boundary: 为True时，以字母/数字开头或结尾的关键词要求两侧不是字母数字
+                       （避免 'Apple' 命中 'Pineapple'），中文关键词不受影响
+        case_sensitive: 是否区分大小写（股票代码等场景）
+        """
+        self.case_sensitive = case_sensitive
+        normalize = (lambda k: k) if case_sensitive else (lambda k: k.lower())
+
+        unique = []
+        seen = set()
+        for keyword in keywords:
+            key = normalize(keyword.strip())
+            if key and key not in seen:
+                seen.add(key)
+                unique.append(key)
+        self.keywords: List[str] = unique
+
+        # 长的在前，保证同一位置优先匹配最长关键词
+        ordered = sorted(unique, key=len, reverse=True)
+
+        # 每个关键词隐含命中的其它（更短的）关键词
+        self._implied: Dict[str, Set[str]] = {}
+        for keyword in ordered:
+            implied = {keyword}
+            for other in unique:
+                if other != keyword and len(other) < len(keyword) and other in keyword:
+                    if not word_boundary or self._bounded_in(other, keyword):
+                        implied.add(other)
+            self._implied[keyword] = implied
+
+        self._pattern = None
+        if ordered:
+            alternatives = '|'.join(self._wrap(k, word_boundary) for k in ordered)
+            self._pattern = re.compile(f'(?=({alternatives}))')
+
+    @staticmethod
+    def _wrap(keyword: str, word_boundary: bool) -> str:
+        escaped = re.escape(keyword)
+        if not word_boundary:
+            return escaped
+        if keyword[0].isascii() and keyword[0].isalnum():
+            escaped = r'(?<![A-Za-z0-9])' + escaped
+        if keyword[-1].isascii() and keyword[-1].isalnum():
+            escaped = escaped + r'(?![A-Za-z0-9])'
+        return escaped
+
+    @staticmethod
+    def _bounded_in(short: str, long: str) -> bool:
+        """short 在 long 中是否存在满足词边界的出现位置"""
+        pattern = KeywordMatcher._wrap(short, True)
+        return re.search(pattern, long) is not None
+
+    def find(self, text: str) -> Set[str]:
+        """返回文本中命中的全部关键词（已规范化大小写）"""
+        if self._pattern is None or not text:
+            return set()
+        if not self.case_sensitive:
+            text = text.lower()
+
+        found = set()
+        for match in self._pattern.finditer(text):
+            keyword = match.group(1)
+            if keyword not in found:
+                found |= self._implied[keyword]
+        return found
+
+    def find_spans(self, text: str) -> List[tuple]:
+        """返回 (起始位置, 命中的最长关键词) 列表"""
+        if self._pattern is None or not text:
+            return []
+        if not self.case_sensitive:
+            text = text.lower()
+        return [(match.start(), match.group(1)) for match in self._pattern.finditer(text)]
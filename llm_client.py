@@ -0,0 +1,175 @@
+"""
+共享AI客户端模块
+
+摘要和市场分析共用一个OpenAI兼容客户端，首次使用时才导入 openai 并创建，
+`main.py test`、打印用法等不需要AI的命令不会产生这部分开销。
+每次调用的提示词/输出token数按用途累计，写入运行报告。
+流式调用在输出达到所需长度后于段落或句子边界提前结束，不等模型写完。
+"""
+
+import logging
+import threading
+from types import SimpleNamespace
+from typing import Dict, Optional
+
+from config import AI_CONFIG
+from prompt_builder import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+_client = None
+_client_failed = False
+_client_lock = threading.Lock()
+
+_usage: Dict[str, Dict] = {}  # 用途 -> 累计token用量
+_usage_lock = threading.Lock()
+
+
+def get_llm_client():
+    """获取共享的AI客户端；未启用、未安装openai或创建失败时返回None"""
+    global _client, _client_failed
+
+    if _client is not None or _client_failed or not AI_CONFIG.get('enabled', False):
+        return _client
+
+    with _client_lock:
+        if _client is None and not _client_failed:
+            try:
+                import openai
+                providers = AI_CONFIG.get('providers')
+                if providers:
+                    # 多个服务商：按延迟对冲、带熔断的路由
+                    from llm_router import LLMRouter, Provider
+                    _client = LLMRouter([
+                        Provider(provider.get('name') or provider.get('base_url') or 'openai',
+                                 _create_openai(openai, provider, max_retries=0),  # 失败由路由换服务商
+                                 provider.get('model', AI_CONFIG.get('model', 'gpt-3.5-turbo')),
+                                 json_mode=provider.get('json_mode', True))
+                        for provider in providers if provider.get('enabled', True)
+                    ])
+                    logger.info(f"AI路由已创建: {', '.join(p.name for p in _client.providers)}")
+                else:
+                    _client = _create_openai(openai, AI_CONFIG)
+                    logger.info("AI客户端已创建")
+            except ImportError:
+                logger.warning("未安装openai库，AI功能将禁用")
+                _client_failed = True
+            except Exception as e:
+                logger.error(f"初始化AI客户端失败: {e}")
+                _client_failed = True
+
+    return _client
+
+
+def _create_openai(openai, config: Dict, **kwargs):
+    # openai 默认超时为600秒，未指定超时的调用（如市场分析）也不能无限等待
+    kwargs.setdefault('timeout', config.get('timeout', AI_CONFIG.get('timeout', 60)))
+    api_key = config.get('api_key')
+    base_url = config.get('base_url')
+    if base_url:
+        # 使用自定义base_url（智谱AI、Deepseek等）
+        return openai.OpenAI(api_key=api_key, base_url=base_url, **kwargs)
+    # 使用OpenAI官方
+    return openai.OpenAI(api_key=api_key, **kwargs)
+
+
+def provider_report() -> Dict[str, Dict]:
+    """多服务商路由时各服务商的请求数、错误率、延迟和熔断状态"""
+    stats = getattr(_client, 'stats', None)
+    return stats() if stats else {}
+
+
+def record_usage(purpose: str, response, estimated_prompt_tokens: Optional[int] = None,
+                 estimated_completion_tokens: Optional[int] = None):
+    """
+    累计一次调用的token用量
+    prompt_tokens / completion_tokens / cached_tokens 只累计服务商返回的 usage（usage_calls 次调用）；
+    本地估算单独累计在 estimated_* 中，不混入服务商的数字：
+    estimated_prompt_tokens: 本地估算的提示词token数，与 prompt_tokens 对比可以核对估算是否准确
+    estimated_completion_tokens: 服务商没有返回 usage 时（如提前结束的流式输出）估算的输出token数
+    """
+    usage = getattr(response, 'usage', None)
+    details = getattr(usage, 'prompt_tokens_details', None)
+    with _usage_lock:
+        totals = _usage.setdefault(purpose, {
+            'calls': 0, 'usage_calls': 0, 'prompt_tokens': 0, 'completion_tokens': 0, 'cached_tokens': 0,
+            'estimated_prompt_tokens': 0, 'estimated_completion_tokens': 0,
+        })
+        totals['calls'] += 1
+        totals['estimated_prompt_tokens'] += estimated_prompt_tokens or 0
+        if usage is None:
+            totals['estimated_completion_tokens'] += estimated_completion_tokens or 0
+            return
+        totals['usage_calls'] += 1
+        totals['prompt_tokens'] += getattr(usage, 'prompt_tokens', 0) or 0
+        totals['completion_tokens'] += getattr(usage, 'completion_tokens', 0) or 0
+        # 命中服务商提示词前缀缓存的token数（不支持的服务商没有这个字段）
+        totals['cached_tokens'] += getattr(details, 'cached_tokens', 0) or 0
+
+
+def usage_report() -> Dict[str, Dict]:
+    """各用途的累计token用量"""
+    with _usage_lock:
+        return {purpose: dict(totals) for purpose, totals in _usage.items()}
+
+
+def reset_usage():
+    with _usage_lock:
+        _usage.clear()
+
+
+def structural_cut(text: str, min_chars: int, overshoot: float = 0.3) -> Optional[int]:
+    """
+    流式输出的截断位置：达到 min_chars 后的第一个段落结尾（空行）；
+    超出 min_chars 的 overshoot 比例仍没有空行时，退而在最后一个句子结尾截断
+    还不能截断时返回None
+    """
+    if len(text) < min_chars:
+        return None
+    paragraph_end = text.find('\n\n', min_chars)
+    if paragraph_end != -1:
+        return paragraph_end
+    if len(text) < min_chars * (1 + overshoot):
+        return None
+    sentence_end = max(text.rfind(ch) for ch in '。！？.!?\n')
+    if sentence_end >= min_chars * 0.7:
+        return sentence_end + 1
+    return len(text)
+
+
+def stream_completion(client, purpose: str, max_chars: Optional[int] = None,
+                      estimated_prompt_tokens: Optional[int] = None, **request_kwargs) -> str:
+    """
+    流式调用并边收边拼接，输出达到 max_chars 后在结构边界处停止读取并关闭连接
+    读完整个流时，服务商在最后一个数据块中返回 usage（stream_options.include_usage）
+    request_kwargs: 传给 chat.completions.create 的参数
+    """
+    stream = client.chat.completions.create(stream=True, stream_options={'include_usage': True}, **request_kwargs)
+    parts = []
+    length = 0
+    usage = None
+    try:
+        for chunk in stream:
+            usage = getattr(chunk, 'usage', None) or usage
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content or ''
+            parts.append(delta)
+            length += len(delta)
+            if max_chars and length >= max_chars:
+                cut = structural_cut(''.join(parts), max_chars)
+                if cut is not None:
+                    text = ''.join(parts)[:cut]
+                    logger.debug(f"流式输出在 {cut} 字处提前结束")
+                    break
+        else:
+            text = ''.join(parts)
+    finally:
+        close = getattr(stream, 'close', None)
+        if close:
+            close()
+
+    # 提前结束时收不到 usage，输出token按已接收的内容估算
+    record_usage(purpose, SimpleNamespace(usage=usage), estimated_prompt_tokens,
+                 estimated_completion_tokens=estimate_tokens(''.join(parts)))
+    return text.strip()
@@ -0,0 +1,259 @@
+"""
+多服务商AI路由模块
+
+AI_CONFIG['providers'] 配置了多个OpenAI兼容服务商时，由 LLMRouter 代替单个客户端：
+- 按配置顺序选择可用的服务商，记录每个服务商最近的延迟和错误率
+- 首选服务商的请求超过其历史延迟的某个分位数仍未返回时，向下一个服务商发送一份对冲请求，
+  先成功返回的结果生效（慢的请求在后台结束，只用于统计，其token用量记为 hedge_discarded）
+- 延迟按 max_tokens 分档统计，短摘要和长篇分析互不影响；流式请求只计到连接建立，不计入延迟
+- 每次请求都带超时，且在守护线程中进行，落选的慢请求不会拖住进程退出
+- 连续失败达到阈值时熔断，冷却期内不再请求该服务商，冷却后放行一次试探请求
+
+LLMRouter 提供与 openai 客户端相同的 `chat.completions.create(...)` 接口，
+摘要和市场分析不需要区分单个客户端还是路由。
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+from config import AI_CONFIG
+from llm_client import record_usage
+
+logger = logging.getLogger(__name__)
+
+# 统计到这么多次成功请求后才按分位数计算对冲延迟，之前使用 default_hedge_delay
+MIN_LATENCY_SAMPLES = 5
+
+
+def latency_bucket(max_tokens: Optional[int]) -> int:
+    """延迟统计的分档：max_tokens 向上取到2的幂（800 -> 1024，3200 -> 4096），未指定为0"""
+    if not max_tokens:
+        return 0
+    return 1 << (int(max_tokens) - 1).bit_length()
+
+
+class Provider:
+    """一个服务商：客户端、模型、延迟/错误统计和熔断状态"""
+
+    def __init__(self, name: str, client, model: str, window: int = 50, json_mode: bool = True):
+        self.name = name
+        self.client = client
+        self.model = model
+        self.json_mode = json_mode  # 是否支持 response_format
+        self.window = window
+        self.latencies: Dict[int, deque] = {}  # 延迟分档 -> 最近成功请求的耗时（秒）
+        self.outcomes = deque(maxlen=window)   # 最近请求是否成功
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None  # 熔断开始时间
+        self.probing = False                    # 冷却后正在进行试探请求
+        self.lock = threading.Lock()
+
+    def add_latency(self, bucket: int, latency: float):
+        """调用方持有 self.lock"""
+        self.latencies.setdefault(bucket, deque(maxlen=self.window)).append(latency)
+
+    def latency_percentile(self, percentile: float, bucket: int) -> Optional[float]:
+        with self.lock:
+            latencies = self.latencies.get(bucket, ())
+            if len(latencies) < MIN_LATENCY_SAMPLES:
+                return None
+            ordered = sorted(latencies)
+        idx = min(int(len(ordered) * percentile / 100), len(ordered) - 1)
+        return ordered[idx]
+
+    def error_rate(self) -> float:
+        with self.lock:
+            if not self.outcomes:
+                return 0.0
+            return 1 - sum(self.outcomes) / len(self.outcomes)
+
+    def stats(self) -> Dict:
+        with self.lock:
+            buckets = sorted(self.latencies)
+        p50 = {bucket: self.latency_percentile(50, bucket) for bucket in buckets}
+        return {
+            'requests': len(self.outcomes),
+            'error_rate': round(self.error_rate(), 3),
+            # max_tokens 分档 -> 延迟中位数
+            'p50_latency': {bucket: round(value, 2) for bucket, value in p50.items() if value is not None},
+            'circuit_open': self.opened_at is not None,
+        }
+
+
+class LLMRouter:
+    """按延迟分位数对冲、带熔断的多服务商路由"""
+
+    def __init__(self, providers: List[Provider], config: Optional[Dict] = None):
+        if not providers:
+            raise ValueError("至少需要配置一个AI服务商")
+        config = config or AI_CONFIG.get('router', {})
+        self.providers = providers
+        self.hedge_percentile = config.get('hedge_percentile', 90)
+        self.hedge_min_delay = config.get('hedge_min_delay', 2)
+        self.default_hedge_delay = config.get('default_hedge_delay', 15)
+        self.failure_threshold = config.get('failure_threshold', 3)
+        self.reset_timeout = config.get('reset_timeout', 60)
+        # 调用方没有指定超时时每次请求的超时（秒）
+        self.request_timeout = config.get('request_timeout', AI_CONFIG.get('timeout', 60))
+
+        # 与 openai 客户端相同的调用方式: router.chat.completions.create(...)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    # 熔断
+
+    def _available(self, provider: Provider, now: float) -> bool:
+        """未熔断，或熔断冷却期已过且没有试探请求在进行"""
+        with provider.lock:
+            if provider.opened_at is None:
+                return True
+            return now - provider.opened_at >= self.reset_timeout and not provider.probing
+
+    def _acquire(self, provider: Provider) -> bool:
+        """实际发送请求前调用：熔断中的服务商冷却期过后只放行一个试探请求"""
+        with provider.lock:
+            if provider.opened_at is None:
+                return True
+            if time.monotonic() - provider.opened_at >= self.reset_timeout and not provider.probing:
+                provider.probing = True
+                return True
+            return False
+
+    def _record(self, provider: Provider, latency: Optional[float], ok: bool, bucket: int = 0):
+        """latency 为None时（流式请求）只记录成败"""
+        with provider.lock:
+            provider.outcomes.append(ok)
+            provider.probing = False
+            if ok:
+                if latency is not None:
+                    provider.add_latency(bucket, latency)
+                provider.consecutive_failures = 0
+                if provider.opened_at is not None:
+                    logger.info(f"AI服务商 {provider.name} 已恢复")
+                provider.opened_at = None
+                return
+            provider.consecutive_failures += 1
+            if provider.consecutive_failures >= self.failure_threshold:
+                if provider.opened_at is None:
+                    logger.warning(f"AI服务商 {provider.name} 连续失败 {provider.consecutive_failures} 次，"
+                                   f"熔断 {self.reset_timeout} 秒")
+                # 试探请求失败时重新开始冷却
+                provider.opened_at = time.monotonic()
+
+    # 请求
+
+    def _call(self, provider: Provider, kwargs: Dict):
+        kwargs = dict(kwargs, model=provider.model, timeout=kwargs.get('timeout') or self.request_timeout)
+        if not provider.json_mode:
+            kwargs.pop('response_format', None)
+        bucket = latency_bucket(kwargs.get('max_tokens'))
+        start = time.monotonic()
+        try:
+            response = provider.client.chat.completions.create(**kwargs)
+        except Exception:
+            self._record(provider, None, False)
+            raise
+        # 流式请求此时只建立了连接，耗时不代表完整请求的延迟
+        latency = None if kwargs.get('stream') else time.monotonic() - start
+        self._record(provider, latency, True, bucket)
+        return response
+
+    def _submit(self, provider: Provider, kwargs: Dict) -> Future:
+        """在守护线程中发送请求：落选的慢请求不会阻止进程退出，也不影响 run_with_timeout"""
+        future = Future()
+
+        def run():
+            try:
+                future.set_result(self._call(provider, kwargs))
+            except Exception as e:
+                future.set_exception(e)
+
+        threading.Thread(target=run, name=f'llm-{provider.name}', daemon=True).start()
+        return future
+
+    @staticmethod
+    def _discard(futures):
+        """对冲中落选的请求完成后仍记录token用量"""
+        def record(future: Future):
+            if future.exception() is None:
+                record_usage('hedge_discarded', future.result())
+
+        for future in futures:
+            future.add_done_callback(record)
+
+    def _hedge_delay(self, provider: Provider, kwargs: Dict) -> float:
+        latency = provider.latency_percentile(self.hedge_percentile, latency_bucket(kwargs.get('max_tokens')))
+        if latency is None:
+            return self.default_hedge_delay
+        return max(latency, self.hedge_min_delay)
+
+    def create(self, **kwargs):
+        """
+        发送请求：首选服务商超过对冲延迟未返回时向下一个服务商发送对冲请求，
+        失败时依次换下一个服务商；全部失败时抛出最后一个异常
+        流式请求不做对冲（只在建立连接失败时换服务商）
+        """
+        now = time.monotonic()
+        candidates = [p for p in self.providers if self._available(p, now)]
+        force = not candidates
+        if force:
+            # 全部熔断时仍然尝试首选服务商，而不是直接失败
+            candidates = self.providers[:1]
+
+        if kwargs.get('stream'):
+            return self._create_sequential(candidates, kwargs, force)
+
+        pending = {}
+        remaining = list(candidates)
+        last_error = RuntimeError("没有可用的AI服务商")
+        while remaining or pending:
+            while remaining and len(pending) < 2:
+                provider = remaining.pop(0)
+                if force or self._acquire(provider):
+                    pending[self._submit(provider, kwargs)] = provider
+                    break
+            if not pending:
+                break
+
+            # 只有一个请求在进行且还有备选时，等到对冲延迟为止
+            timeout = None
+            if len(pending) == 1 and remaining:
+                timeout = self._hedge_delay(next(iter(pending.values())), kwargs)
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+            if not done:
+                slow = next(iter(pending.values()))
+                logger.info(f"AI服务商 {slow.name} 超过 {timeout:.1f} 秒未返回，向 {remaining[0].name} 发送对冲请求")
+                continue
+
+            for future in done:
+                provider = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    last_error = e
+                    logger.warning(f"AI服务商 {provider.name} 请求失败: {e}")
+                    continue
+                self._discard(pending)
+                return result
+
+        raise last_error
+
+    def _create_sequential(self, candidates: List[Provider], kwargs: Dict, force: bool = False):
+        last_error = RuntimeError("没有可用的AI服务商")
+        for provider in candidates:
+            if not force and not self._acquire(provider):
+                continue
+            try:
+                return self._call(provider, kwargs)
+            except Exception as e:
+                last_error = e
+                logger.warning(f"AI服务商 {provider.name} 请求失败: {e}")
+        raise last_error
+
+    def stats(self) -> Dict[str, Dict]:
+        return {provider.name: provider.stats() for provider in self.providers}
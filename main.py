@@ -1,21 +1,27 @@
 #!/usr/bin/env python3
 """
 新闻收集器主程序
+
+各功能模块（及其依赖的 requests、feedparser、openai 等）在第一次使用时才导入，
+打印用法、投递发件箱等命令不需要加载全部模块。
 """
 
+import heapq
 import logging
 import json
 import os
 from datetime import datetime
+from functools import cached_property
 from pathlib import Path
 
-from news_fetcher import NewsCollector
-from news_ranker import NewsRanker
-from summarizer import NewsSummarizer
-from wechat_notifier import WeChatNotifier
-from html_generator import HTMLGenerator
-from market_analyzer import MarketAnalyzer
-from config import DATA_DIR, CACHE_FILE, LOG_FILE, SCHEDULE_CONFIG
+from shard import parse_shard_spec, shard_file_path, write_shard, find_shard_files, merge_shards
+from profiles import Profile, load_profiles
+from outbox import Outbox, OutboxDispatcher
+from run_budget import RunBudget, run_with_timeout
+from llm_client import provider_report, reset_usage, usage_report
+from checkpoint import CheckpointStore, MARKET, COLLECT, SELECT, SUMMARIZE, RENDERED, PUSHED
+from config import (DATA_DIR, CACHE_FILE, LOG_FILE, SCHEDULE_CONFIG, SHARD_DIR, WECHAT_CONFIG, OUTBOX_CONFIG,
+                    ENTITY_CONFIG)
 
 # 设置日志
 Path(DATA_DIR).mkdir(exist_ok=True)
@@ -34,100 +40,147 @@ class NewsCollectorApp:
     """新闻收集器应用"""
 
     def __init__(self):
-        self.collector = NewsCollector()
-        self.ranker = NewsRanker()
-        self.summarizer = NewsSummarizer()
-        self.notifier = WeChatNotifier()
-        self.html_gen = HTMLGenerator()
-        self.market_analyzer = MarketAnalyzer()
-
-    def run_daily_task(self):
-        """执行每日新闻收集任务"""
+        self.profiles = load_profiles()
+
+        self.outbox = None
+        self.dispatcher = None
+        if OUTBOX_CONFIG.get('enabled', False):
+            self.outbox = Outbox()
+            self.dispatcher = OutboxDispatcher(self.outbox, self._notifier_for)
+
+        self.budget = None       # 当前运行的时间预算
+        self.checkpoints = None  # 当前运行的检查点
+
+    # 各功能模块在第一次使用时创建
+
+    @cached_property
+    def collector(self):
+        from news_fetcher import NewsCollector
+        return NewsCollector()
+
+    @cached_property
+    def ranker(self):
+        from news_ranker import NewsRanker
+        return NewsRanker()
+
+    @cached_property
+    def summarizer(self):
+        from summarizer import NewsSummarizer
+        return NewsSummarizer()
+
+    @cached_property
+    def notifier(self):
+        from wechat_notifier import WeChatNotifier
+        return WeChatNotifier()
+
+    @cached_property
+    def html_gen(self):
+        from html_generator import HTMLGenerator
+        return HTMLGenerator()
+
+    @cached_property
+    def market_analyzer(self):
+        from market_analyzer import MarketAnalyzer
+        return MarketAnalyzer()
+
+    def run_daily_task(self, shard_files=None, resume=False):
+        """
+        执行每日新闻收集任务
+        shard_files: 分片采集输出的文件列表，提供时合并分片而不是重新采集
+        resume: 从当天的检查点继续，已完成的阶段不再重复执行
+        """
         logger.info("=" * 60)
         logger.info("开始执行每日新闻收集任务")
         logger.info("=" * 60)
 
+        self.budget = RunBudget()
+        reset_usage()
+        # 定时运行时应用常驻多天，不能沿用上次运行的市场数据和行情面板
+        self.market_analyzer.reset()
+        self.checkpoints = CheckpointStore()
+        if resume:
+            completed = self.checkpoints.completed_stages()
+            logger.info(f"从检查点继续，已完成的阶段: {', '.join(completed) or '无'}")
+        else:
+            self.checkpoints.clear()
+            CheckpointStore.prune()
+
         try:
             # 1. 生成市场分析（第一条）
-            logger.info("步骤 1/6: 生成市场分析报告...")
-            market_analysis = self.market_analyzer.create_market_news_item()
-
-            # 2. 收集新闻
-            logger.info("步骤 2/6: 收集新闻...")
-            news_list = self.collector.collect_news()
+            if self.checkpoints.has(MARKET):
+                logger.info("步骤 1/6: 使用检查点中的市场分析报告")
+                market_analysis = self.checkpoints.load(MARKET)
+            else:
+                logger.info("步骤 1/6: 生成市场分析报告...")
+                with self.budget.stage('market_analysis'):
+                    market_analysis = self._create_market_analysis()
+                # 失败或降级的结果不保存，--resume 时重新生成
+                if market_analysis and not market_analysis.get('degraded'):
+                    self.checkpoints.save(MARKET, market_analysis)
+
+            # 2. 收集新闻（所有订阅方案共享一次抓取）
+            if self.checkpoints.has(COLLECT):
+                logger.info("步骤 2/6: 使用检查点中的新闻")
+                news_list = self.checkpoints.load(COLLECT, [])
+            else:
+                logger.info("步骤 2/6: 收集新闻...")
+                with self.budget.stage('collect'):
+                    if shard_files:
+                        news_list = self._load_shards(shard_files)
+                    else:
+                        news_list = self.collector.collect_news(profiles=self.profiles)
+                self.checkpoints.save(COLLECT, news_list)
 
             if not news_list:
                 logger.warning("未收集到任何新闻")
                 # 即使没有新闻，也可以发送市场分析
-                if market_analysis:
-                    top_news = [market_analysis]
-                else:
-                    return
             else:
                 logger.info(f"收集到 {len(news_list)} 条新闻")
 
-                # 3. 排序和筛选
+            # 3. 排序和筛选（每个订阅方案独立排序）
+            if self.checkpoints.has(SELECT):
+                logger.info("步骤 3/6: 使用检查点中的筛选结果")
+                selections = self.checkpoints.load(SELECT, {})
+            else:
                 logger.info("步骤 3/6: 对新闻进行排序和筛选...")
-                max_count = SCHEDULE_CONFIG.get('max_news_count', 10)
-
-                # 如果有市场分析，减少新闻数量以保持总数为10
-                news_count_needed = max_count - (1 if market_analysis else 0)
-
-                # 先排序，获取足够多的新闻
-                ranked_news = self.ranker.rank_news(news_list, top_n=news_count_needed * 3)
-
-                # 如果新闻数量不足，记录警告
-                if len(ranked_news) < news_count_needed:
-                    logger.warning(f"收集到的新闻数量({len(ranked_news)})少于目标数量({news_count_needed})")
-                    top_news = ranked_news
-                else:
-                    # 在排名靠前的新闻中选择多样性
-                    top_news = self.ranker.diversify_selection(ranked_news, top_n=news_count_needed)
-
-                    # 如果多样性选择后数量不足，补充高分新闻
-                    if len(top_news) < news_count_needed:
-                        logger.info(f"多样性选择后只有 {len(top_news)} 条，补充剩余新闻")
-                        remaining_needed = news_count_needed - len(top_news)
-                        selected_links = {news['link'] for news in top_news}
-                        for news in ranked_news:
-                            if news['link'] not in selected_links:
-                                top_news.append(news)
-                                if len(top_news) >= news_count_needed:
-                                    break
-
-                    # 最终按分数排序，确保降序
-                    top_news = sorted(top_news, key=lambda x: x.get('score', 0), reverse=True)[:news_count_needed]
-
-                logger.info(f"最终筛选出 {len(top_news)} 条高质量新闻")
-
-                # 4. 生成摘要
+                selections = {}
+                for profile in self.profiles:
+                    # 如果有市场分析，减少新闻数量以保持总数不变
+                    with_market = bool(market_analysis) and profile.market_analysis
+                    news_count_needed = profile.max_news_count - (1 if with_market else 0)
+                    selections[profile.name] = (
+                        self._select_top_news(news_list, profile, news_count_needed) if news_list else []
+                    )
+                self._link_entities(selections)
+                self.checkpoints.save(SELECT, selections)
+
+            progressive = SCHEDULE_CONFIG.get('progressive', {})
+            if progressive.get('enabled', False) and any(selections.values()):
+                self._publish_progressive(selections, market_analysis, progressive.get('first_batch', 3))
+                logger.info("=" * 60)
+                logger.info("每日新闻收集任务完成")
+                logger.info("=" * 60)
+                return
+
+            # 4. 生成摘要（同一篇文章只摘要一次）
+            if any(selections.values()):
                 logger.info("步骤 4/6: 生成新闻摘要...")
-                top_news = self.summarizer.batch_summarize(top_news)
+                self._summarize_shared(selections, self.checkpoints.load(SUMMARIZE, {}))
+
+            for profile in self.profiles:
+                top_news = selections.get(profile.name, [])
 
                 # 将市场分析插入到第一位
-                if market_analysis:
+                if market_analysis and profile.market_analysis:
                     top_news.insert(0, market_analysis)
                     logger.info("已将市场分析插入到新闻列表第一位")
 
-            logger.info(f"准备推送 {len(top_news)} 条内容（包括市场分析）")
-
-            # 5. 生成HTML页面
-            logger.info("步骤 5/6: 生成HTML页面...")
-            html_file = os.path.join(DATA_DIR, f"news_{datetime.now().strftime('%Y%m%d')}.html")
-            self.html_gen.generate_html(top_news, html_file)
-            logger.info(f"HTML页面已保存: {html_file}")
-
-            # 6. 推送到微信
-            logger.info("步骤 6/6: 推送新闻到微信...")
-            success = self.notifier.send_news_notification(top_news)
+                if not top_news:
+                    logger.warning(f"[{profile.name}] 没有可推送的内容")
+                    continue
 
-            if success:
-                logger.info("✅ 新闻推送成功!")
-            else:
-                logger.warning("⚠️ 新闻推送失败")
-
-            # 保存缓存
-            self._save_cache(top_news)
+                logger.info(f"[{profile.name}] 准备推送 {len(top_news)} 条内容（包括市场分析）")
+                self._publish(profile, top_news)
 
             logger.info("=" * 60)
             logger.info("每日新闻收集任务完成")
@@ -135,8 +188,355 @@ class NewsCollectorApp:
 
         except Exception as e:
             logger.error(f"执行任务时发生错误: {e}", exc_info=True)
-
-    def _save_cache(self, news_list):
+            self.budget.degrade('run', 'aborted', str(e))
+        finally:
+            self.budget.save_report(
+                os.path.join(DATA_DIR, f"run_report_{datetime.now().strftime('%Y%m%d')}.json"),
+                extra={'llm_usage': usage_report(), 'llm_providers': provider_report()})
+
+    def _create_market_analysis(self):
+        """在时间预算内生成市场分析，超时或失败时降级为不调用AI的简单综述"""
+        timeout = self.budget.stage_remaining('market_analysis')
+        try:
+            done, market_analysis = run_with_timeout(
+                self.market_analyzer.create_market_news_item, timeout, 'market_analysis')
+        except Exception as e:
+            logger.error(f"生成市场分析失败: {e}")
+            done, market_analysis = True, None
+
+        if market_analysis:
+            return market_analysis
+
+        reason = f"超出 {timeout:.0f} 秒时间预算" if not done else "市场数据获取或分析失败"
+        market_analysis = self.market_analyzer.create_fallback_news_item()
+        if market_analysis is None:
+            self.budget.degrade('market_analysis', 'skipped', reason + "，且没有缓存的市场数据")
+        elif market_analysis['stale_market_data']:
+            self.budget.degrade('market_analysis', 'cached_market_data', reason)
+        else:
+            self.budget.degrade('market_analysis', 'simple_summary', reason)
+        return market_analysis
+
+    def _ranker_for(self, profile: Profile):
+        if not profile.source_weights:
+            return self.ranker
+        from news_ranker import NewsRanker
+        return NewsRanker(source_weights=profile.source_weights)
+
+    def _select_top_news(self, news_list, profile: Profile, news_count_needed: int):
+        """为一个订阅方案排序并筛选新闻"""
+        # 各方案的分类、评分互不影响，使用浅拷贝
+        candidates = []
+        for news in news_list:
+            profile_categories = news.get('profile_categories')
+            if profile_categories is not None and profile.name not in profile_categories:
+                continue
+            item = dict(news)
+            if profile_categories is not None:
+                item['categories'] = profile_categories[profile.name]
+            candidates.append(item)
+
+        if not candidates:
+            logger.warning(f"[{profile.name}] 没有命中关键词的新闻")
+            return []
+
+        ranker = self._ranker_for(profile)
+
+        # 先排序，获取足够多的新闻
+        ranked_news = ranker.rank_news(candidates, top_n=news_count_needed * 3)
+
+        # 如果新闻数量不足，记录警告
+        if len(ranked_news) < news_count_needed:
+            logger.warning(f"[{profile.name}] 收集到的新闻数量({len(ranked_news)})少于目标数量({news_count_needed})")
+            top_news = ranked_news
+        else:
+            # 在排名靠前的新闻中选择多样性
+            top_news = ranker.diversify_selection(ranked_news, top_n=news_count_needed,
+                                                  categories=list(profile.categories))
+
+            # 如果多样性选择后数量不足，补充高分新闻
+            if len(top_news) < news_count_needed:
+                logger.info(f"多样性选择后只有 {len(top_news)} 条，补充剩余新闻")
+                selected_links = {news['link'] for news in top_news}
+                for news in ranked_news:
+                    if news['link'] not in selected_links:
+                        top_news.append(news)
+                        if len(top_news) >= news_count_needed:
+                            break
+
+            # 最终按分数排序，确保降序
+            top_news = sorted(top_news, key=lambda x: x.get('score', 0), reverse=True)[:news_count_needed]
+
+        logger.info(f"[{profile.name}] 最终筛选出 {len(top_news)} 条高质量新闻")
+        return top_news
+
+    def _link_entities(self, selections):
+        """标注筛选出的新闻提及的股票及当日涨跌（使用已缓存的行情，不逐条请求）"""
+        if not ENTITY_CONFIG.get('enabled', True) or not any(selections.values()):
+            return
+        try:
+            from entity_linker import build_entity_linker
+            linker = build_entity_linker()
+            changes = self.market_analyzer.get_cached_changes()
+            linked = sum(linker.annotate(top_news, changes) for top_news in selections.values())
+            logger.info(f"{linked} 条新闻标注了相关股票" + ("" if changes is not None else "（没有缓存的行情）"))
+        except Exception as e:
+            logger.warning(f"标注相关股票失败: {e}")
+
+    def _summarize_shared(self, selections, summaries=None):
+        """
+        对所有方案选中的新闻去重后统一生成摘要，再分发回各方案
+        summaries: 本次运行已生成的摘要（链接 -> 摘要），其中的文章不会重复摘要
+        返回更新后的 summaries（同时保存到检查点）
+        """
+        summaries = {} if summaries is None else summaries
+        unique_news = {}
+        for top_news in selections.values():
+            for news in top_news:
+                if news['link'] not in summaries:
+                    unique_news.setdefault(news['link'], news)
+
+        if unique_news:
+            # 渐进推送分两次摘要，共用同一个阶段预算
+            with self.budget.stage('summarize'):
+                summarized = self.summarizer.batch_summarize(list(unique_news.values()),
+                                                             deadline=self.budget.stage_deadline('summarize'))
+            if self.summarizer.fallback_count:
+                self.budget.degrade('summarize', 'simple_summarize',
+                                    f"{self.summarizer.fallback_count} 条新闻超出摘要时间预算")
+            summaries.update({news['link']: news.get('ai_summary') for news in summarized})
+            self.checkpoints.save(SUMMARIZE, summaries)
+
+        for top_news in selections.values():
+            for news in top_news:
+                news['ai_summary'] = summaries.get(news['link'])
+        return summaries
+
+    def _publish_progressive(self, selections, market_analysis, first_batch: int):
+        """
+        渐进式推送：市场分析和每个方案前几条新闻的摘要完成后先推送一次，
+        其余摘要完成后再推送后续内容（Server酱/企业微信都不支持修改已发消息）
+        """
+        # 4a. 先生成首批新闻的摘要
+        logger.info(f"步骤 4/6: 生成前 {first_batch} 条新闻摘要（渐进推送）...")
+        selections = {profile.name: selections.get(profile.name, []) for profile in self.profiles}
+        heads = {name: top_news[:first_batch] for name, top_news in selections.items()}
+        summaries = self._summarize_shared(heads, self.checkpoints.load(SUMMARIZE, {}))
+
+        full_lists = {}
+        for profile in self.profiles:
+            prefix = [market_analysis] if market_analysis and profile.market_analysis else []
+            full_lists[profile.name] = prefix + selections[profile.name]
+            head = prefix + heads[profile.name]
+            if head:
+                logger.info(f"[{profile.name}] 首批推送 {len(head)} 条内容")
+                self._push(profile, head, part='first', total=len(full_lists[profile.name]))
+
+        # 4b. 其余新闻的摘要
+        tails = {name: top_news[first_batch:] for name, top_news in selections.items()}
+        if any(tails.values()):
+            logger.info("生成其余新闻摘要...")
+            self._summarize_shared(tails, summaries)
+
+        for profile in self.profiles:
+            full_list = full_lists[profile.name]
+            if not full_list:
+                logger.warning(f"[{profile.name}] 没有可推送的内容")
+                continue
+
+            self._render_html(profile, full_list)
+            tail = tails[profile.name]
+            if tail:
+                logger.info(f"[{profile.name}] 后续推送 {len(tail)} 条内容")
+                self._push(profile, tail, part='rest', start_index=len(full_list) - len(tail) + 1,
+                           total=len(full_list))
+            self._save_cache(full_list, self._profile_path(CACHE_FILE, profile))
+
+    def _profile_path(self, path: str, profile: Profile) -> str:
+        """默认方案沿用原文件名，其它方案在文件名后加方案名"""
+        if profile.is_default:
+            return path
+        base, ext = os.path.splitext(path)
+        return f"{base}_{profile.name}{ext}"
+
+    def _render_html(self, profile: Profile, top_news):
+        # 5. 生成HTML页面
+        logger.info(f"步骤 5/6: [{profile.name}] 生成HTML页面...")
+        html_file = self._profile_path(
+            os.path.join(DATA_DIR, f"news_{datetime.now().strftime('%Y%m%d')}.html"), profile)
+        self.html_gen.generate_html(top_news, html_file)
+        logger.info(f"HTML页面已保存: {html_file}")
+
+    def _push(self, profile: Profile, news_list, **format_kwargs):
+        """推送（或放入发件箱）一个方案的一条消息"""
+        # 断点续跑时已推送的消息不再重复推送
+        message_key = f"{profile.name}:{format_kwargs.get('part') or 'digest'}"
+        pushed = self.checkpoints.load(PUSHED, [])
+        if message_key in pushed:
+            logger.info(f"[{profile.name}] 消息 {message_key} 已推送过，跳过")
+            return
+
+        notifier = self._notifier_for(profile.name)
+        title, content = notifier.build_notification(news_list, **format_kwargs)
+
+        rendered = self.checkpoints.load(RENDERED, {})
+        rendered[message_key] = {'profile': profile.name, 'title': title, 'content': content}
+        self.checkpoints.save(RENDERED, rendered)
+
+        if self.outbox:
+            # 放入发件箱，由投递器异步推送和重试
+            logger.info(f"步骤 6/6: [{profile.name}] 推送消息放入发件箱...")
+            self.outbox.enqueue(title, content, profile.name)
+            self.dispatcher.wake()
+            self.checkpoints.save(PUSHED, pushed + [message_key])
+            return
+
+        logger.info(f"步骤 6/6: [{profile.name}] 推送新闻到微信...")
+        results = notifier.deliver(title, content)
+
+        if results and all(results.values()):
+            logger.info(f"✅ [{profile.name}] 新闻推送成功!")
+            self.checkpoints.save(PUSHED, pushed + [message_key])
+        else:
+            logger.warning(f"⚠️ [{profile.name}] 新闻推送失败")
+
+    def resend(self) -> bool:
+        """重发最近一次渲染好的消息，不重新抓取、排序和摘要"""
+        store = CheckpointStore.latest(RENDERED)
+        if store is None:
+            logger.warning("没有可重发的消息")
+            return False
+
+        messages = store.load(RENDERED, {})
+        logger.info(f"重发 {store.run_date} 的 {len(messages)} 条消息")
+        success = True
+        for message in messages.values():
+            if self.outbox:
+                self.outbox.enqueue(message['title'], message['content'], message['profile'])
+                continue
+
+            notifier = self._notifier_for(message['profile'])
+            if notifier is None:
+                logger.warning(f"未知的订阅方案: {message['profile']}")
+                success = False
+                continue
+            results = notifier.deliver(message['title'], message['content'])
+            if not results or not all(results.values()):
+                logger.warning(f"⚠️ [{message['profile']}] 重发失败")
+                success = False
+        return success
+
+    def _publish(self, profile: Profile, top_news):
+        """生成HTML页面并推送一个方案的新闻"""
+        self._render_html(profile, top_news)
+
+        # 6. 推送到微信
+        self._push(profile, top_news)
+
+        # 保存缓存
+        self._save_cache(top_news, self._profile_path(CACHE_FILE, profile))
+
+    def _notifier_for(self, profile_name: str):
+        """订阅方案对应的推送器，未知方案返回None"""
+        for profile in self.profiles:
+            if profile.name == profile_name:
+                if profile.wechat is WECHAT_CONFIG:
+                    return self.notifier
+                from wechat_notifier import WeChatNotifier
+                return WeChatNotifier(profile.wechat)
+        return None
+
+    def deliver_outbox(self, max_wait: float = 0) -> int:
+        """投递发件箱中的消息"""
+        if not self.dispatcher:
+            logger.info("发件箱未启用")
+            return 0
+        delivered = self.dispatcher.drain(max_wait=max_wait)
+        remaining = self.outbox.pending_count()
+        logger.info(f"发件箱投递完成: 成功 {delivered} 条，剩余 {remaining} 条待重试")
+        return delivered
+
+    def collect_shard(self, shard_spec: str, output_file: str = None) -> str:
+        """采集一个分片的新闻并写入分片文件"""
+        shard = parse_shard_spec(shard_spec)
+        if output_file is None:
+            output_file = shard_file_path(SHARD_DIR, datetime.now().strftime('%Y%m%d'), shard)
+
+        news_list = self.collector.collect_news(shard=shard)
+        write_shard(news_list, output_file)
+        return output_file
+
+    def collect_snapshot(self) -> str:
+        """采集一次全部新闻源写入当天的分片文件，定时推送时直接合并使用"""
+        return self.collect_shard('0/1')
+
+    def _scheduled_digest(self):
+        """定时推送：开启了提前采集时使用当天已采集的分片"""
+        shard_files = None
+        if SCHEDULE_CONFIG.get('jobs', {}).get('collect', {}).get('enabled', False):
+            shard_files = find_shard_files(
+                os.path.join(SHARD_DIR, f"news_{datetime.now().strftime('%Y%m%d')}_*.jsonl")) or None
+        self.run_daily_task(shard_files=shard_files)
+
+    def build_scheduler(self):
+        """按 SCHEDULE_CONFIG['jobs'] 创建调度器"""
+        from scheduler import Job, Scheduler
+
+        job_funcs = {
+            'digest': self._scheduled_digest,
+            'collect': self.collect_snapshot,
+            'outbox': self.dispatcher.drain_once if self.dispatcher else None,
+            'market_warmup': self.market_analyzer.warm_cache,
+        }
+        scheduler = Scheduler()
+        for name, job_config in SCHEDULE_CONFIG.get('jobs', {}).items():
+            if not job_config.get('enabled', False):
+                continue
+            if name not in job_funcs:
+                logger.warning(f"未知的定时任务: {name}")
+                continue
+            if job_funcs[name] is None:
+                continue
+
+            at = job_config.get('at')
+            if name == 'digest' and at is None and job_config.get('every') is None:
+                at = SCHEDULE_CONFIG.get('daily_time', '20:00')
+            scheduler.add_job(Job(name, job_funcs[name], at=at, every=job_config.get('every'),
+                                  misfire=job_config.get('misfire', 'skip'), timezone=job_config.get('timezone')))
+        return scheduler
+
+    def _load_shards(self, shard_files):
+        """
+        流式合并分片文件
+        合并过程中每个订阅方案只保留排名靠前的候选新闻，内存占用与分片规模无关
+        """
+        logger.info(f"合并 {len(shard_files)} 个分片文件...")
+        heaps = {profile.name: [] for profile in self.profiles}
+        rankers = {profile.name: self._ranker_for(profile) for profile in self.profiles}
+        limits = {profile.name: profile.max_news_count * 3 for profile in self.profiles}
+
+        count = 0
+        for seq, news in enumerate(merge_shards(shard_files)):
+            count += 1
+            profile_names = news.get('profile_categories') or heaps.keys()
+            for name in profile_names:
+                if name not in heaps:
+                    continue
+                entry = (rankers[name].calculate_score(news), -seq, news)
+                if len(heaps[name]) < limits[name]:
+                    heapq.heappush(heaps[name], entry)
+                elif entry[:2] > heaps[name][0][:2]:
+                    heapq.heapreplace(heaps[name], entry)
+
+        # 合并各方案的候选，保持分片合并顺序
+        candidates = {}
+        for heap in heaps.values():
+            for _, neg_seq, news in heap:
+                candidates[-neg_seq] = news
+        logger.info(f"分片共 {count} 条新闻，保留 {len(candidates)} 条候选")
+        return [candidates[seq] for seq in sorted(candidates)]
+
+    def _save_cache(self, news_list, cache_file=CACHE_FILE):
         """保存新闻缓存"""
         try:
             cache_data = {
@@ -145,10 +545,10 @@ class NewsCollectorApp:
                 'news': news_list
             }
 
-            with open(CACHE_FILE, 'w', encoding='utf-8') as f:
+            with open(cache_file, 'w', encoding='utf-8') as f:
                 json.dump(cache_data, f, ensure_ascii=False, indent=2, default=str)
 
-            logger.info(f"新闻缓存已保存: {CACHE_FILE}")
+            logger.info(f"新闻缓存已保存: {cache_file}")
 
         except Exception as e:
             logger.error(f"保存缓存失败: {e}")
@@ -192,41 +592,99 @@ def main():
     """主函数"""
     import sys
 
-    app = NewsCollectorApp()
-
-    if len(sys.argv) > 1:
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
         command = sys.argv[1]
+        args = sys.argv[2:]
+        app = NewsCollectorApp()
 
         if command == 'test':
             # 测试模式
             app.test_system()
         elif command == 'run':
             # 立即执行一次
-            app.run_daily_task()
+            shard_pattern = _get_option(args, '--from-shards')
+            shard_files = None
+            if shard_pattern is not None:
+                # 默认合并当天的全部分片
+                shard_pattern = shard_pattern or os.path.join(
+                    SHARD_DIR, f"news_{datetime.now().strftime('%Y%m%d')}_*.jsonl")
+                shard_files = find_shard_files(shard_pattern)
+                if not shard_files:
+                    print(f"未找到分片文件: {shard_pattern}")
+                    return
+            deliver = app.dispatcher is not None and '--no-deliver' not in args
+            if deliver:
+                # 后台投递，渐进推送的首批消息入队后即可送出
+                app.dispatcher.start()
+            app.run_daily_task(shard_files=shard_files, resume='--resume' in args)
+            # 任务本身不等待推送；命令退出前投递发件箱，失败的消息留待下次重试
+            if deliver:
+                app.dispatcher.stop(wait=True)
+                app.deliver_outbox(max_wait=OUTBOX_CONFIG.get('deliver_wait', 300))
+        elif command == 'resend':
+            # 重发最近一次渲染好的消息
+            app.resend()
+            if app.dispatcher:
+                app.deliver_outbox(max_wait=OUTBOX_CONFIG.get('deliver_wait', 300))
+        elif command == 'warmup':
+            # 预热市场数据和分析
+            app.market_analyzer.warm_cache(force='--force' in args)
+        elif command == 'deliver':
+            # 投递发件箱
+            app.deliver_outbox(max_wait=OUTBOX_CONFIG.get('deliver_wait', 300))
+        elif command == 'collect':
+            # 分片采集
+            shard_spec = _get_option(args, '--shard') or '0/1'
+            try:
+                output_file = app.collect_shard(shard_spec, _get_option(args, '--output'))
+            except ValueError as e:
+                print(e)
+                return
+            print(f"分片输出: {output_file}")
+        elif command == 'monitor':
+            # 盘中监控
+            from market_monitor import MarketMonitor
+            monitor = MarketMonitor(app.market_analyzer, app.notifier)
+            logger.info("按 Ctrl+C 退出")
+
+            try:
+                monitor.run_forever()
+            except KeyboardInterrupt:
+                monitor.stop()
+                logger.info("\n程序已退出")
         elif command == 'schedule':
             # 定时任务模式
-            import schedule
-            import time
-
-            schedule_time = SCHEDULE_CONFIG.get('daily_time', '20:00')
-            schedule.every().day.at(schedule_time).do(app.run_daily_task)
-
-            logger.info(f"定时任务已设置，每天 {schedule_time} 执行")
+            scheduler = app.build_scheduler()
             logger.info("按 Ctrl+C 退出")
 
             try:
-                while True:
-                    schedule.run_pending()
-                    time.sleep(60)
+                scheduler.run_forever()
             except KeyboardInterrupt:
+                scheduler.stop(wait=False)
                 logger.info("\n程序已退出")
-        else:
-            print("未知命令")
-            print_usage()
+    elif len(sys.argv) > 1:
+        print("未知命令")
+        print_usage()
     else:
         print_usage()
 
 
+COMMANDS = ('test', 'run', 'resend', 'warmup', 'deliver', 'collect', 'schedule', 'monitor')
+
+
+def _get_option(args, name):
+    """
+    读取命令行选项的值
+    选项不存在返回None；存在但没有值时返回空字符串
+    """
+    if name not in args:
+        return None
+    idx = args.index(name)
+    if idx + 1 < len(args) and not args[idx + 1].startswith('--'):
+        return args[idx + 1]
+    return ''
+
+
 def print_usage():
     """打印使用说明"""
     print("""
@@ -237,6 +695,17 @@ def print_usage():
   python main.py run       - 立即执行一次新闻收集
   python main.py schedule  - 启动定时任务（每天20:00执行）
 
+  python main.py deliver   - 投递发件箱中未送达的消息（失败自动退避重试）
+  python main.py run --no-deliver - 只生成并放入发件箱，不立即投递
+  python main.py run --resume     - 从当天的检查点继续上次中断的任务
+  python main.py resend           - 重发最近一次生成的消息（不重新抓取和摘要）
+  python main.py warmup [--force] - 美股收盘后预热市场数据和分析（已是最新时跳过）
+  python main.py monitor          - 美股交易时段内监控指数和热门股票，异动时推送提醒
+
+分片采集（多台机器）:
+  python main.py collect --shard i/N [--output 文件]  - 只采集第i个分片的源
+  python main.py run --from-shards [目录或通配符]      - 合并分片后排序推送
+
 配置文件:
   config.py - 修改新闻源、关键词、微信推送等配置
 
@@ -2,249 +2,30 @@
 市场分析模块 - 获取和分析每日股市波动
 """
 
+import hashlib
+import json
 import logging
+import os
 from typing import Dict, List, Optional
 from datetime import datetime, timedelta
-from config import AI_CONFIG
+from config import AI_CONFIG, MARKET_CONFIG, MARKET_DATA_CACHE, MARKET_WARM_CACHE, MARKET_ANALYSIS_CACHE
+from llm_client import get_llm_client, record_usage
+from prompt_builder import build_messages, estimate_tokens
+from market_calendar import NY_TZ, last_session_close
 
 logger = logging.getLogger(__name__)
 
+# 市场分析提示词版本：修改提示词或数据格式后递增，使缓存的分析失效
+PROMPT_VERSION = 2
+# 分析缓存最多保留的条数
+ANALYSIS_CACHE_SIZE = 30
+# 计算指纹时忽略的字段（不影响分析内容）
+_VOLATILE_FIELDS = ('date', 'cached_at')
 
-class MarketAnalyzer:
-    """市场分析器"""
-
-    def __init__(self):
-        self.ai_enabled = AI_CONFIG.get('enabled', False)
-
-        if self.ai_enabled:
-            try:
-                import openai
-                api_key = AI_CONFIG.get('api_key')
-                base_url = AI_CONFIG.get('base_url')
-
-                if base_url:
-                    self.client = openai.OpenAI(api_key=api_key, base_url=base_url)
-                else:
-                    self.client = openai.OpenAI(api_key=api_key)
-
-                logger.info("AI市场分析功能已启用")
-            except Exception as e:
-                logger.error(f"初始化AI客户端失败: {e}")
-                self.ai_enabled = False
-
-    def get_market_data(self) -> Dict:
-        """获取当日市场数据"""
-        try:
-            import yfinance as yf
-            import time
-
-            # 主要指数
-            indices = {
-                'S&P 500': '^GSPC',
-                'Dow Jones': '^DJI',
-                'NASDAQ': '^IXIC',
-                'Russell 2000': '^RUT',
-                'VIX': '^VIX'  # 恐慌指数
-            }
-
-            # 主要板块ETF
-            sectors = {
-                '科技': 'XLK',
-                '金融': 'XLF',
-                '医疗': 'XLV',
-                '能源': 'XLE',
-                '消费': 'XLY',
-                '工业': 'XLI',
-                '材料': 'XLB',
-                '公用事业': 'XLU'
-            }
-
-            market_data = {
-                'indices': {},
-                'sectors': {},
-                'top_gainers': [],
-                'top_losers': [],
-                'earnings_calendar': [],  # 财报日历
-                'date': datetime.now().strftime('%Y-%m-%d')
-            }
-
-            # 获取指数数据
-            logger.info("获取主要指数数据...")
-            for name, symbol in indices.items():
-                try:
-                    ticker = yf.Ticker(symbol)
-                    hist = ticker.history(period='2d')
-
-                    if len(hist) >= 2:
-                        current = hist['Close'].iloc[-1]
-                        previous = hist['Close'].iloc[-2]
-                        change_pct = ((current - previous) / previous) * 100
-
-                        market_data['indices'][name] = {
-                            'current': round(current, 2),
-                            'change_pct': round(change_pct, 2),
-                            'volume': int(hist['Volume'].iloc[-1]) if 'Volume' in hist else 0
-                        }
-                        logger.info(f"  {name}: {change_pct:+.2f}%")
-                    time.sleep(0.5)  # 避免限流
-                except Exception as e:
-                    logger.warning(f"获取{name}数据失败: {e}")
-                    time.sleep(1)  # 失败后等待更久
-
-            # 获取板块数据
-            logger.info("获取板块数据...")
-            for name, symbol in sectors.items():
-                try:
-                    ticker = yf.Ticker(symbol)
-                    hist = ticker.history(period='2d')
-
-                    if len(hist) >= 2:
-                        current = hist['Close'].iloc[-1]
-                        previous = hist['Close'].iloc[-2]
-                        change_pct = ((current - previous) / previous) * 100
-
-                        market_data['sectors'][name] = {
-                            'current': round(current, 2),
-                            'change_pct': round(change_pct, 2)
-                        }
-                        logger.info(f"  {name}板块: {change_pct:+.2f}%")
-                    time.sleep(0.5)  # 避免限流
-                except Exception as e:
-                    logger.warning(f"获取{name}板块数据失败: {e}")
-                    time.sleep(1)
-
-            # 获取热门股票异动（简化版，使用固定的大公司列表）
-            hot_stocks = {
-                'Apple': 'AAPL',
-                'Microsoft': 'MSFT',
-                'Google': 'GOOGL',
-                'Amazon': 'AMZN',
-                'Tesla': 'TSLA',
-                'NVIDIA': 'NVDA',
-                'Meta': 'META',
-                'Netflix': 'NFLX'
-            }
-
-            logger.info("获取热门股票数据...")
-            stock_changes = []
-            for name, symbol in hot_stocks.items():
-                try:
-                    ticker = yf.Ticker(symbol)
-                    hist = ticker.history(period='2d')
-
-                    if len(hist) >= 2:
-                        current = hist['Close'].iloc[-1]
-                        previous = hist['Close'].iloc[-2]
-                        change_pct = ((current - previous) / previous) * 100
-
-                        stock_changes.append({
-                            'name': name,
-                            'symbol': symbol,
-                            'price': round(current, 2),
-                            'change_pct': round(change_pct, 2)
-                        })
-                    time.sleep(0.5)  # 避免限流
-                except Exception as e:
-                    logger.warning(f"获取{name}数据失败: {e}")
-                    time.sleep(1)
-
-            # 如果没有成功获取到任何数据，返回None
-            if not market_data['indices'] and not market_data['sectors'] and not stock_changes:
-                logger.error("未能获取任何市场数据")
-                return None
-
-            # 排序获取涨跌幅最大的
-            if stock_changes:
-                stock_changes.sort(key=lambda x: x['change_pct'], reverse=True)
-                market_data['top_gainers'] = stock_changes[:3]
-                market_data['top_losers'] = stock_changes[-3:]
-
-            # 获取财报日历（未来2周内的财报）
-            logger.info("获取财报日历...")
-            market_data['earnings_calendar'] = self._get_earnings_calendar(hot_stocks)
+MARKET_SYSTEM_PROMPT = "你是一位拥有20年经验的美股首席策略师，曾在高盛、摩根士丹利、桥水基金担任要职。你不仅精通技术分析和基本面分析，更擅长追溯市场波动的深层逻辑——从宏观经济周期、产业竞争格局、公司战略变化到市场预期管理。你的分析报告以'深度'著称：不满足于表面现象，而是层层剖析，直击本质。你善于用清晰的逻辑链条、具体的数据和可操作的建议帮助投资者做出明智决策。重要：你必须给出具体的股票名称、代码和买入价格区间，不使用模糊表述。"
 
-            return market_data
-
-        except ImportError:
-            logger.error("未安装yfinance库，无法获取市场数据")
-            return None
-        except Exception as e:
-            logger.error(f"获取市场数据失败: {e}")
-            return None
-
-    def _get_earnings_calendar(self, stocks: Dict) -> List[Dict]:
-        """获取未来2周内的财报日历"""
-        try:
-            import yfinance as yf
-            import time
-            from datetime import timedelta
-
-            earnings_list = []
-            today = datetime.now()
-            two_weeks_later = today + timedelta(days=14)
-
-            for name, symbol in stocks.items():
-                try:
-                    ticker = yf.Ticker(symbol)
-
-                    # 获取公司信息
-                    info = ticker.info
-
-                    # 尝试从calendar获取财报日期
-                    calendar = ticker.calendar
-                    if calendar is not None and 'Earnings Date' in calendar:
-                        earnings_date = calendar['Earnings Date']
-
-                        # 如果是DataFrame或Series，取第一个值
-                        if hasattr(earnings_date, 'iloc'):
-                            earnings_date = earnings_date.iloc[0] if len(earnings_date) > 0 else None
-
-                        # 检查日期是否在未来2周内
-                        if earnings_date and earnings_date < two_weeks_later:
-                            earnings_list.append({
-                                'name': name,
-                                'symbol': symbol,
-                                'date': earnings_date.strftime('%Y-%m-%d') if hasattr(earnings_date, 'strftime') else str(earnings_date),
-                                'market_cap': info.get('marketCap', 0),
-                                'forward_pe': info.get('forwardPE', None),
-                                'price': info.get('currentPrice', 0),
-                                'analyst_target': info.get('targetMeanPrice', None),
-                                'recommendation': info.get('recommendationKey', 'hold')
-                            })
-                            logger.info(f"  {name} 财报日期: {earnings_date}")
-
-                    time.sleep(0.5)  # 避免限流
-
-                except Exception as e:
-                    logger.warning(f"获取{name}财报信息失败: {e}")
-                    time.sleep(1)
-
-            # 按财报日期排序
-            earnings_list.sort(key=lambda x: x['date'])
-            return earnings_list
-
-        except Exception as e:
-            logger.error(f"获取财报日历失败: {e}")
-            return []
-
-    def generate_market_analysis(self, market_data: Dict) -> Optional[str]:
-        """生成市场分析报告"""
-        if not market_data:
-            return None
-
-        # 如果没有启用AI，返回简单的数据摘要
-        if not self.ai_enabled:
-            return self._generate_simple_summary(market_data)
-
-        try:
-            # 构建数据摘要
-            data_summary = self._format_market_data(market_data)
-
-            prompt = f"""
-你是一位资深的美股市场分析师，拥有深刻的宏观经济洞察力和基本面分析能力。请基于今日市场数据撰写一份专业且深入的市场分析报告。
-
-【今日市场数据】
-{data_summary}
+MARKET_INSTRUCTIONS = """
+你是一位资深的美股市场分析师，拥有深刻的宏观经济洞察力和基本面分析能力。请基于文末的今日市场数据撰写一份专业且深入的市场分析报告。
 
 【撰写要求】
 请按以下结构完整输出分析报告（约700-800字）：
@@ -316,27 +97,261 @@ class MarketAnalyzer:
 **重要：投资建议部分必须给出具体的股票名称、代码和价格区间，不要使用'可以考虑'等模糊表述。**
 """
 
+
+class MarketAnalyzer:
+    """市场分析器"""
+
+    def __init__(self, provider=None):
+        self._provider = provider     # MarketDataProvider，未指定时按 MARKET_CONFIG['provider'] 创建
+        # 定时运行时同一个实例会用好几天，市场数据和行情面板都和所属的交易时段一起保存
+        self._market_data = None      # (交易时段, 本次运行获取到的市场数据)
+        self._panel = None            # (交易时段, 行情面板（字段 × 代码）)
+        self._prev_close = None       # 盘中报价用的 (交易日, 前收盘价)
+
+    def reset(self):
+        """每次运行开始时清除上次运行留下的市场数据和行情面板"""
+        self._market_data = None
+        self._panel = None
+
+    def current_market_data(self) -> Optional[Dict]:
+        """本次运行获取到的最近一个交易时段的市场数据；没有或属于之前的交易时段时返回None"""
+        state = self._market_data
+        if state is None or state[0] != last_session_close().date().isoformat():
+            return None
+        return state[1]
+
+    @property
+    def provider(self):
+        """行情数据源（首次使用时创建，避免启动时导入 pandas）"""
+        if self._provider is None:
+            from market_providers import get_provider
+            self._provider = get_provider()
+        return self._provider
+
+    @property
+    def client(self):
+        """共享的AI客户端（首次使用时创建）"""
+        return get_llm_client()
+
+    @property
+    def ai_enabled(self) -> bool:
+        """AI_CONFIG 启用且客户端创建成功"""
+        return self.client is not None
+
+    def get_market_data(self) -> Dict:
+        """获取当日市场数据"""
+        try:
+            from market_panel import load_universe, load_panel, compute_market_snapshot
+            from market_indicators import compute_indicators, summarize_indicators
+
+            universe = load_universe()
+            symbols = list(dict.fromkeys(
+                list(MARKET_CONFIG.get('indices', {}).values()) +
+                list(MARKET_CONFIG.get('sectors', {}).values()) +
+                list(universe.index)
+            ))
+
+            # 指数、板块ETF和股票池在一个行情面板里批量获取
+            logger.info(f"获取行情数据（{len(symbols)} 个代码）...")
+            session = last_session_close().date().isoformat()
+            panel = load_panel(symbols, session, self.provider)
+            if panel is None:
+                logger.error("未能获取任何市场数据")
+                return None
+            self._panel = (session, panel)
+
+            market_data = {
+                'indices': {},
+                'sectors': {},
+                'top_gainers': [],
+                'top_losers': [],
+                'earnings_calendar': [],  # 财报日历
+                'date': datetime.now().strftime('%Y-%m-%d')
+            }
+            market_data.update(compute_market_snapshot(panel, universe))
+            # 技术指标在同一个面板上计算，不产生额外请求
+            market_data['indicators'] = summarize_indicators(compute_indicators(panel), universe)
+
+            # 如果没有成功获取到任何数据，返回None
+            if not market_data['indices'] and not market_data['sectors'] and not market_data['top_gainers']:
+                logger.error("未能获取任何市场数据")
+                return None
+
+            for name, data in market_data['indices'].items():
+                logger.info(f"  {name}: {data['change_pct']:+.2f}%")
+            breadth = market_data.get('breadth')
+            if breadth:
+                logger.info(f"  股票池 {market_data['universe_size']} 只: "
+                            f"上涨 {breadth['advancers']} / 下跌 {breadth['decliners']}")
+
+            # 获取财报日历（未来2周内的财报）
+            logger.info("获取财报日历...")
+            hot_stocks = MARKET_CONFIG.get('universe', {}).get('hot_stocks', {})
+            market_data['earnings_calendar'] = self._get_earnings_calendar(hot_stocks)
+
+            self._market_data = (session, market_data)
+            self._save_market_data_cache(market_data)
+            return market_data
+
+        except ImportError as e:
+            logger.error(f"缺少依赖库，无法获取市场数据: {e}")
+            return None
+        except Exception as e:
+            logger.error(f"获取市场数据失败: {e}")
+            return None
+
+    def get_quotes(self, symbols: List[str]):
+        """
+        盘中报价：DataFrame（索引为代码），列为 price、prev_close、change_pct
+        前收盘价每个交易日只获取一次
+        """
+        today = datetime.now(NY_TZ).date()
+        if self._prev_close is None or self._prev_close[0] != today:
+            history = self.provider.get_history(symbols, '5d')
+            if history is None:
+                return None
+            close = history['Close'].dropna(how='all')
+            # 盘中的日线包含当天尚未收盘的K线
+            close = close[[day < today for day in close.index.date]]
+            if close.empty:
+                return None
+            self._prev_close = (today, close.ffill().iloc[-1])
+
+        prices = self.provider.get_quotes(symbols)
+        if prices is None or prices.empty:
+            return None
+
+        import pandas as pd
+        quotes = pd.DataFrame({'price': prices, 'prev_close': self._prev_close[1]}).reindex(symbols)
+        quotes['change_pct'] = (quotes['price'] / quotes['prev_close'] - 1) * 100
+        return quotes
+
+    def get_cached_changes(self):
+        """
+        最近一个交易时段每个代码的收盘价和涨跌幅（索引为代码）
+        只使用本交易时段已获取的或已缓存的行情面板，不发起请求；都没有时返回None
+        """
+        from market_panel import load_cached_panel, daily_changes
+
+        session = last_session_close().date().isoformat()
+        state = self._panel
+        panel = state[1] if state is not None and state[0] == session else None
+        if panel is None:
+            panel = load_cached_panel(session)
+        if panel is None:
+            return None
+        return daily_changes(panel)
+
+    def _get_earnings_calendar(self, stocks: Dict) -> List[Dict]:
+        """获取未来2周内的财报日历"""
+        earnings_list = []
+        two_weeks_later = (datetime.now() + timedelta(days=14)).date()
+
+        for name, symbol in stocks.items():
+            try:
+                info = self.provider.get_fundamentals(symbol)
+                earnings_date = info.get('earnings_date') if info else None
+
+                # 检查日期是否在未来2周内
+                if earnings_date and earnings_date < two_weeks_later:
+                    earnings_list.append({
+                        'name': name,
+                        'symbol': symbol,
+                        'date': earnings_date.strftime('%Y-%m-%d'),
+                        'market_cap': info.get('market_cap') or 0,
+                        'forward_pe': info.get('forward_pe'),
+                        'price': info.get('price') or 0,
+                        'analyst_target': info.get('analyst_target'),
+                        'recommendation': info.get('recommendation') or 'hold'
+                    })
+                    logger.info(f"  {name} 财报日期: {earnings_date}")
+            except Exception as e:
+                logger.warning(f"获取{name}财报信息失败: {e}")
+            self.provider.pause()
+
+        # 按财报日期排序
+        earnings_list.sort(key=lambda x: x['date'])
+        return earnings_list
+
+    def generate_market_analysis(self, market_data: Dict) -> Optional[str]:
+        """生成市场分析报告"""
+        if not market_data:
+            return None
+
+        # 如果没有启用AI，返回简单的数据摘要
+        if not self.ai_enabled:
+            return self._generate_simple_summary(market_data)
+
+        # 市场数据没有变化（周末、同一天重跑）时直接使用缓存的分析
+        cache_key = self._analysis_cache_key(market_data)
+        cached = self._load_cached_analysis(cache_key)
+        if cached:
+            logger.info("市场数据未变化，使用缓存的市场分析")
+            return cached
+
+        try:
+            # 构建数据摘要
+            data_summary = self._format_market_data(market_data)
+
+            # 固定的写作要求在前、当天的市场数据在最后，便于服务商缓存提示词前缀
+            messages = build_messages(MARKET_SYSTEM_PROMPT, MARKET_INSTRUCTIONS, f"【今日市场数据】\n{data_summary}")
             response = self.client.chat.completions.create(
                 model=AI_CONFIG.get('model', 'gpt-3.5-turbo'),
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "你是一位拥有20年经验的美股首席策略师，曾在高盛、摩根士丹利、桥水基金担任要职。你不仅精通技术分析和基本面分析，更擅长追溯市场波动的深层逻辑——从宏观经济周期、产业竞争格局、公司战略变化到市场预期管理。你的分析报告以'深度'著称：不满足于表面现象，而是层层剖析，直击本质。你善于用清晰的逻辑链条、具体的数据和可操作的建议帮助投资者做出明智决策。重要：你必须给出具体的股票名称、代码和买入价格区间，不使用模糊表述。"
-                    },
-                    {"role": "user", "content": prompt}
-                ],
+                messages=messages,
                 max_tokens=2000,  # 增加到2000以支持更详细的具体建议
                 temperature=0.8  # 稍微提高创造性，给出更具体的建议
             )
+            record_usage('market_analysis', response,
+                         sum(estimate_tokens(message['content']) for message in messages))
 
             analysis = response.choices[0].message.content.strip()
             logger.info("市场分析报告生成成功")
+            self._save_cached_analysis(cache_key, analysis)
             return analysis
 
         except Exception as e:
             logger.error(f"生成市场分析失败: {e}")
             return self._generate_simple_summary(market_data)
 
+    def _analysis_cache_key(self, market_data: Dict) -> str:
+        """市场数据（去掉日期等字段，键排序）+ 模型 + 提示词版本 的指纹"""
+        payload = {key: value for key, value in market_data.items() if key not in _VOLATILE_FIELDS}
+        fingerprint = json.dumps({
+            'market_data': payload,
+            'model': AI_CONFIG.get('model', 'gpt-3.5-turbo'),
+            'prompt_version': PROMPT_VERSION,
+        }, ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.sha256(fingerprint.encode('utf-8')).hexdigest()
+
+    def _read_analysis_cache(self) -> Dict:
+        try:
+            with open(MARKET_ANALYSIS_CACHE, encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"读取市场分析缓存失败: {e}")
+            return {}
+
+    def _load_cached_analysis(self, key: str) -> Optional[str]:
+        entry = self._read_analysis_cache().get(key)
+        return entry.get('analysis') if entry else None
+
+    def _save_cached_analysis(self, key: str, analysis: str):
+        """保存分析，只保留最近的 ANALYSIS_CACHE_SIZE 条"""
+        cache = self._read_analysis_cache()
+        cache[key] = {'analysis': analysis, 'created_at': datetime.now().isoformat()}
+        newest = sorted(cache.items(), key=lambda item: item[1].get('created_at', ''), reverse=True)
+        cache = dict(newest[:ANALYSIS_CACHE_SIZE])
+        try:
+            os.makedirs(os.path.dirname(MARKET_ANALYSIS_CACHE) or '.', exist_ok=True)
+            tmp_path = MARKET_ANALYSIS_CACHE + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(cache, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, MARKET_ANALYSIS_CACHE)
+        except Exception as e:
+            logger.warning(f"保存市场分析缓存失败: {e}")
+
     def _format_market_data(self, market_data: Dict) -> str:
         """格式化市场数据为文本"""
         lines = []
@@ -346,13 +361,26 @@ class MarketAnalyzer:
         for name, data in market_data.get('indices', {}).items():
             lines.append(f"  {name}: {data['current']} ({data['change_pct']:+.2f}%)")
 
-        # 板块数据
+        # 板块数据（已按涨跌幅降序）
         lines.append("\n【板块表现】")
-        sectors = market_data.get('sectors', {})
-        sorted_sectors = sorted(sectors.items(), key=lambda x: x[1]['change_pct'], reverse=True)
-        for name, data in sorted_sectors:
+        for name, data in market_data.get('sectors', {}).items():
             lines.append(f"  {name}: {data['change_pct']:+.2f}%")
 
+        # 股票池涨跌分布
+        breadth = market_data.get('breadth')
+        if breadth:
+            lines.append(f"\n【市场宽度】（股票池 {market_data.get('universe_size', 0)} 只）")
+            lines.append(f"  上涨 {breadth['advancers']} 只，下跌 {breadth['decliners']} 只，平盘 {breadth['unchanged']} 只，"
+                         f"涨跌幅中位数 {breadth['median_change']:+.2f}%，涨跌超5% {breadth['big_movers']} 只")
+
+        sector_breadth = market_data.get('sector_breadth')
+        if sector_breadth:
+            lines.append("\n【行业表现】（股票池内平均涨跌幅 / 上涨比例）")
+            for name, data in sector_breadth.items():
+                lines.append(f"  {name}: {data['change_pct']:+.2f}% / {data['advancers_pct']:.0f}%（{data['count']} 只）")
+
+        lines.extend(self._format_indicators(market_data.get('indicators')))
+
         # 个股异动
         lines.append("\n【个股涨幅榜】")
         for stock in market_data.get('top_gainers', []):
@@ -373,6 +401,57 @@ class MarketAnalyzer:
 
         return '\n'.join(lines)
 
+    def _format_indicators(self, indicators: Optional[Dict]) -> List[str]:
+        """格式化技术指标"""
+        if not indicators:
+            return []
+
+        def position(data: Dict) -> str:
+            parts = []
+            if 'dist_ma50' in data:
+                parts.append(f"距50日线 {data['dist_ma50']:+.1f}%")
+            if 'dist_ma200' in data:
+                parts.append(f"距200日线 {data['dist_ma200']:+.1f}%")
+            if 'dist_52w_high' in data:
+                parts.append(f"距52周高点 {data['dist_52w_high']:+.1f}%")
+            if 'vol20' in data:
+                parts.append(f"20日波动率 {data['vol20']:.0f}%")
+            if data.get('volume_z', 0) >= 2:
+                parts.append(f"成交量Z值 {data['volume_z']:.1f}")
+            return '，'.join(parts)
+
+        lines = ["\n【技术面】"]
+        for name, data in indicators.get('indices', {}).items():
+            lines.append(f"  {name}: {position(data)}")
+
+        breadth = indicators.get('breadth', {})
+        if breadth:
+            parts = []
+            if 'above_ma50_pct' in breadth:
+                parts.append(f"{breadth['above_ma50_pct']:.0f}% 站上50日线")
+            if 'above_ma200_pct' in breadth:
+                parts.append(f"{breadth['above_ma200_pct']:.0f}% 站上200日线")
+            parts.append(f"接近52周新高 {breadth['new_52w_highs']} 只，接近52周新低 {breadth['new_52w_lows']} 只")
+            lines.append(f"  股票池: {'，'.join(parts)}")
+
+        hot_stocks = indicators.get('hot_stocks', {})
+        if hot_stocks:
+            lines.append("\n【热门股票技术位置】")
+            for name, data in hot_stocks.items():
+                lines.append(f"  {name}: {position(data)}")
+
+        if indicators.get('volume_spikes'):
+            lines.append("\n【异常放量】")
+            for stock in indicators['volume_spikes']:
+                lines.append(f"  {stock['name']} ({stock['symbol']}): 成交量Z值 {stock['volume_z']:.1f}")
+
+        if indicators.get('gaps'):
+            lines.append("\n【跳空缺口】")
+            for stock in indicators['gaps']:
+                lines.append(f"  {stock['name']} ({stock['symbol']}): 开盘跳空 {stock['gap_pct']:+.2f}%")
+
+        return lines
+
     def _generate_simple_summary(self, market_data: Dict) -> str:
         """生成简单的数据摘要（无AI版本）"""
         lines = []
@@ -385,8 +464,7 @@ class MarketAnalyzer:
             lines.append(f"{emoji} **{name}**: {data['current']} ({data['change_pct']:+.2f}%)")
 
         lines.append("\n## 板块表现\n")
-        sectors = market_data.get('sectors', {})
-        sorted_sectors = sorted(sectors.items(), key=lambda x: x[1]['change_pct'], reverse=True)
+        sorted_sectors = list(market_data.get('sectors', {}).items())  # 已按涨跌幅降序
 
         lines.append("**领涨板块：**")
         for name, data in sorted_sectors[:3]:
@@ -396,6 +474,11 @@ class MarketAnalyzer:
         for name, data in sorted_sectors[-3:]:
             lines.append(f"- {name}: {data['change_pct']:+.2f}%")
 
+        breadth = market_data.get('breadth')
+        if breadth:
+            lines.append(f"\n**市场宽度：** 上涨 {breadth['advancers']} 只 / 下跌 {breadth['decliners']} 只，"
+                         f"中位数 {breadth['median_change']:+.2f}%")
+
         lines.append("\n## 个股异动\n")
         lines.append("**涨幅榜：**")
         for stock in market_data.get('top_gainers', []):
@@ -416,8 +499,19 @@ class MarketAnalyzer:
         logger.info("开始生成市场分析报告...")
         logger.info("=" * 60)
 
+        # 优先使用收盘后预热的数据和分析
+        warm = self.load_warm_cache()
+        if warm and warm.get('analysis'):
+            logger.info(f"使用预热的市场分析（交易时段 {warm['session']}）")
+            self._market_data = (warm['session'], warm['market_data'])
+            return self._build_news_item(warm['market_data'], warm['analysis'])
+
         # 获取市场数据
-        market_data = self.get_market_data()
+        if warm:
+            market_data = warm['market_data']
+            self._market_data = (warm['session'], market_data)
+        else:
+            market_data = self.get_market_data()
         if not market_data:
             logger.error("无法获取市场数据")
             return None
@@ -427,9 +521,16 @@ class MarketAnalyzer:
         if not analysis:
             logger.error("无法生成市场分析")
             return None
+        self._save_warm_cache(last_session_close().date().isoformat(), market_data, analysis)
+
+        news_item = self._build_news_item(market_data, analysis)
+
+        logger.info("✅ 市场分析报告生成完成")
+        return news_item
 
-        # 构造新闻条目格式
-        news_item = {
+    def _build_news_item(self, market_data: Dict, analysis: str) -> Dict:
+        """构造新闻条目格式"""
+        return {
             'title': f'📊 {market_data["date"]} 美股市场全景分析',
             'link': '#market-analysis',  # 占位链接
             'summary': '今日市场整体波动分析、板块异动、个股表现及投资建议',
@@ -441,5 +542,94 @@ class MarketAnalyzer:
             'is_market_analysis': True  # 标记为市场分析
         }
 
-        logger.info("✅ 市场分析报告生成完成")
+    def create_fallback_news_item(self) -> Optional[Dict]:
+        """
+        市场分析超时时的降级版本：不调用AI，
+        用本次已获取的市场数据生成简单综述，数据也未取到时使用上次缓存的数据（stale_market_data 为True）
+        """
+        market_data = self.current_market_data()
+        stale_note = ''
+        if not market_data:
+            market_data = self.load_cached_market_data()
+            if not market_data:
+                return None
+            stale_note = f"⚠️ 今日市场数据获取超时，以下为 {market_data.get('cached_at', market_data['date'])} 的缓存数据\n\n"
+
+        news_item = self._build_news_item(market_data, stale_note + self._generate_simple_summary(market_data))
+        news_item['degraded'] = True
+        news_item['stale_market_data'] = bool(stale_note)
         return news_item
+
+    def _save_market_data_cache(self, market_data: Dict):
+        """保存最近一次成功获取的市场数据，供超时降级使用"""
+        try:
+            os.makedirs(os.path.dirname(MARKET_DATA_CACHE) or '.', exist_ok=True)
+            with open(MARKET_DATA_CACHE, 'w', encoding='utf-8') as f:
+                json.dump(dict(market_data, cached_at=datetime.now().strftime('%Y-%m-%d %H:%M')),
+                          f, ensure_ascii=False, indent=2, default=str)
+        except Exception as e:
+            logger.warning(f"保存市场数据缓存失败: {e}")
+
+    def load_cached_market_data(self) -> Optional[Dict]:
+        """读取缓存的市场数据"""
+        try:
+            with open(MARKET_DATA_CACHE, encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"读取市场数据缓存失败: {e}")
+            return None
+
+    def warm_cache(self, force: bool = False) -> bool:
+        """
+        预热：最近一个交易时段收盘后获取市场数据（含财报日历）并生成分析，供推送时直接使用
+        该时段已缓存时跳过，周末和休市日不会重复获取
+        """
+        session = last_session_close().date().isoformat()
+        if not force:
+            warm = self.load_warm_cache()
+            if warm and warm.get('analysis'):
+                logger.info(f"交易时段 {session} 的市场数据已预热，跳过")
+                return True
+
+        logger.info(f"预热交易时段 {session} 的市场数据...")
+        market_data = self.get_market_data()
+        if not market_data:
+            logger.error("预热失败：无法获取市场数据")
+            return False
+
+        analysis = self.generate_market_analysis(market_data)
+        self._save_warm_cache(session, market_data, analysis)
+        logger.info("✅ 市场数据预热完成")
+        return True
+
+    def load_warm_cache(self) -> Optional[Dict]:
+        """读取预热缓存，只返回最近一个交易时段的缓存"""
+        try:
+            with open(MARKET_WARM_CACHE, encoding='utf-8') as f:
+                warm = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"读取市场预热缓存失败: {e}")
+            return None
+
+        if warm.get('session') != last_session_close().date().isoformat():
+            return None
+        return warm
+
+    def _save_warm_cache(self, session: str, market_data: Dict, analysis: Optional[str]):
+        try:
+            os.makedirs(os.path.dirname(MARKET_WARM_CACHE) or '.', exist_ok=True)
+            tmp_path = MARKET_WARM_CACHE + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'session': session,
+                    'warmed_at': datetime.now().isoformat(),
+                    'market_data': market_data,
+                    'analysis': analysis,
+                }, f, ensure_ascii=False, indent=2, default=str)
+            os.replace(tmp_path, MARKET_WARM_CACHE)
+        except Exception as e:
+            logger.warning(f"保存市场预热缓存失败: {e}")
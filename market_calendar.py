@@ -0,0 +1,134 @@
+"""
+美股交易日历模块
+
+按纽交所规则推算休市日（含复活节前的耶稣受难日）和提前收盘日，
+用于判断最近一个交易时段何时收盘（市场数据预热任务据此决定是否需要重新获取）
+以及当前是否在交易时段内（盘中监控只在交易时段内轮询）。
+不包含临时休市（如国葬日、极端天气），遇到时最多多获取一次数据。
+"""
+
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import Optional, Set
+from zoneinfo import ZoneInfo
+
+NY_TZ = ZoneInfo('America/New_York')
+MARKET_OPEN = time(9, 30)
+MARKET_CLOSE = time(16, 0)
+EARLY_CLOSE = time(13, 0)
+
+
+def _easter(year: int) -> date:
+    """复活节日期（格里高利历，匿名算法）"""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """某月第n个星期几（weekday: 周一为0）；n=-1 表示最后一个"""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(day: date) -> date:
+    """固定日期假日：周六提前到周五，周日顺延到周一"""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+@lru_cache(maxsize=16)
+def nyse_holidays(year: int) -> Set[date]:
+    """纽交所全天休市日"""
+    holidays = {
+        _nth_weekday(year, 1, 0, 3),           # 马丁·路德·金纪念日
+        _nth_weekday(year, 2, 0, 3),           # 总统日
+        _easter(year) - timedelta(days=2),     # 耶稣受难日
+        _nth_weekday(year, 5, 0, -1),          # 阵亡将士纪念日
+        _observed(date(year, 7, 4)),           # 独立日
+        _nth_weekday(year, 9, 0, 1),           # 劳动节
+        _nth_weekday(year, 11, 3, 4),          # 感恩节
+        _observed(date(year, 12, 25)),         # 圣诞节
+    }
+    # 元旦落在周六时不在前一年12月31日补休
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:
+        holidays.add(_observed(new_year))
+    if year >= 2022:
+        holidays.add(_observed(date(year, 6, 19)))  # 六月节
+    return holidays
+
+
+def is_trading_day(day: date) -> bool:
+    return day.weekday() < 5 and day not in nyse_holidays(day.year)
+
+
+def close_time(day: date) -> time:
+    """交易日的收盘时间（独立日前一天、感恩节次日、平安夜 13:00 提前收盘）"""
+    early_close_days = {
+        date(day.year, 7, 3),
+        _nth_weekday(day.year, 11, 3, 4) + timedelta(days=1),
+        date(day.year, 12, 24),
+    }
+    if day in early_close_days:
+        return EARLY_CLOSE
+    return MARKET_CLOSE
+
+
+def last_session_close(now: Optional[datetime] = None) -> datetime:
+    """now 之前（含）最近一个交易时段的收盘时间（纽约时区）"""
+    now = (now or datetime.now(NY_TZ)).astimezone(NY_TZ)
+    day = now.date()
+    while True:
+        if is_trading_day(day):
+            close = datetime.combine(day, close_time(day), tzinfo=NY_TZ)
+            if close <= now:
+                return close
+        day -= timedelta(days=1)
+
+
+def next_session_close(now: Optional[datetime] = None) -> datetime:
+    """now 之后下一个交易时段的收盘时间（纽约时区）"""
+    now = (now or datetime.now(NY_TZ)).astimezone(NY_TZ)
+    day = now.date()
+    while True:
+        if is_trading_day(day):
+            close = datetime.combine(day, close_time(day), tzinfo=NY_TZ)
+            if close > now:
+                return close
+        day += timedelta(days=1)
+
+
+def is_market_open(now: Optional[datetime] = None) -> bool:
+    """now 是否在常规交易时段内（9:30 至收盘，纽约时区）"""
+    now = (now or datetime.now(NY_TZ)).astimezone(NY_TZ)
+    day = now.date()
+    if not is_trading_day(day):
+        return False
+    return MARKET_OPEN <= now.time() < close_time(day)
+
+
+def next_session_open(now: Optional[datetime] = None) -> datetime:
+    """now 之后下一个交易时段的开盘时间（纽约时区）"""
+    now = (now or datetime.now(NY_TZ)).astimezone(NY_TZ)
+    day = now.date()
+    while True:
+        if is_trading_day(day):
+            open_time = datetime.combine(day, MARKET_OPEN, tzinfo=NY_TZ)
+            if open_time > now:
+                return open_time
+        day += timedelta(days=1)
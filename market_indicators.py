@@ -0,0 +1,109 @@
+"""
+技术指标模块
+
+在缓存的行情面板（约一年日线）上为所有代码一次性向量化计算技术指标：
+均线、20日已实现波动率、距52周高低点、成交量Z分数和跳空缺口，
+汇总后并入 market_data 提供给市场分析，不产生额外的网络请求。
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from config import MARKET_CONFIG
+
+TRADING_DAYS = 252
+
+
+def compute_indicators(panel: pd.DataFrame) -> pd.DataFrame:
+    """每个代码最新一天的技术指标（索引为代码）"""
+    close = panel['Close'].dropna(how='all').ffill()
+    if len(close) < 2:
+        return pd.DataFrame()
+    last = close.iloc[-1]
+
+    indicators = pd.DataFrame(index=close.columns)
+    for window in (20, 50, 200):
+        # 历史不足时不计算，避免短历史的均线误导
+        ma = close.rolling(window, min_periods=window).mean().iloc[-1]
+        indicators[f'ma{window}'] = ma
+        indicators[f'dist_ma{window}'] = (last / ma - 1) * 100
+
+    # 20日已实现波动率（对数收益率标准差，年化，%）
+    log_returns = np.log(close / close.shift(1))
+    indicators['vol20'] = log_returns.iloc[-20:].std() * np.sqrt(TRADING_DAYS) * 100
+
+    # 距52周最高/最低收盘价
+    year = close.iloc[-TRADING_DAYS:]
+    indicators['dist_52w_high'] = (last / year.max() - 1) * 100
+    indicators['dist_52w_low'] = (last / year.min() - 1) * 100
+
+    # 成交量Z分数：最新成交量相对前20个交易日的偏离
+    if 'Volume' in panel:
+        volume = panel['Volume'].reindex(close.index)
+        prior = volume.iloc[-21:-1]
+        std = prior.std().replace(0, np.nan)
+        indicators['volume_z'] = (volume.iloc[-1] - prior.mean()) / std
+
+    # 跳空：今日开盘相对昨日收盘
+    if 'Open' in panel:
+        open_last = panel['Open'].reindex(close.index).iloc[-1]
+        indicators['gap_pct'] = (open_last / close.iloc[-2] - 1) * 100
+
+    return indicators.replace([np.inf, -np.inf], np.nan)
+
+
+def _top_records(frame: pd.DataFrame, column: str, names: pd.Series, top_n: int, threshold: float) -> list:
+    """按 |column| 降序取超过阈值的前 top_n 个"""
+    values = frame[column].dropna()
+    values = values[values.abs() >= threshold]
+    top = values.abs().nlargest(top_n).index
+    return [{'name': names.get(symbol, symbol), 'symbol': symbol, column: round(float(values[symbol]), 2)}
+            for symbol in top]
+
+
+def summarize_indicators(indicators: pd.DataFrame, universe: pd.DataFrame, top_n: Optional[int] = None) -> Dict:
+    """把指标汇总为市场分析用的结构：指数/热门股票的技术位置、股票池宽度、放量和跳空个股"""
+    if indicators.empty:
+        return {}
+    top_n = top_n or MARKET_CONFIG.get('movers_count', 5)
+    columns = ['dist_ma50', 'dist_ma200', 'vol20', 'dist_52w_high', 'dist_52w_low', 'volume_z']
+
+    def rows(symbols: Dict[str, str]) -> Dict:
+        frame = indicators.reindex(list(symbols.values()))[[c for c in columns if c in indicators]].round(2)
+        result = {}
+        for name, symbol in symbols.items():
+            values = frame.loc[symbol].dropna()
+            if not values.empty:
+                result[name] = {key: float(value) for key, value in values.items()}
+        return result
+
+    stocks = indicators.reindex(universe.index)
+    names = universe['name']
+    summary = {
+        'indices': rows(MARKET_CONFIG.get('indices', {})),
+        'hot_stocks': rows(MARKET_CONFIG.get('universe', {}).get('hot_stocks', {})),
+        'breadth': {},
+        'volume_spikes': [],
+        'gaps': [],
+    }
+
+    breadth = {}
+    for window in (50, 200):
+        dist = stocks[f'dist_ma{window}'].dropna()
+        if not dist.empty:
+            breadth[f'above_ma{window}_pct'] = round(float((dist > 0).mean() * 100), 1)
+    near_high = stocks['dist_52w_high'].dropna()
+    near_low = stocks['dist_52w_low'].dropna()
+    breadth['new_52w_highs'] = int((near_high >= -0.5).sum())   # 距52周最高收盘价0.5%以内
+    breadth['new_52w_lows'] = int((near_low <= 0.5).sum())
+    summary['breadth'] = breadth
+
+    if 'volume_z' in stocks:
+        spikes = stocks[stocks['volume_z'] > 0]
+        summary['volume_spikes'] = _top_records(spikes, 'volume_z', names, top_n, threshold=2.0)
+    if 'gap_pct' in stocks:
+        summary['gaps'] = _top_records(stocks, 'gap_pct', names, top_n, threshold=2.0)
+
+    return summary
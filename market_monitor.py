@@ -0,0 +1,211 @@
+"""
+盘中行情监控模块
+
+美股交易时段内按固定间隔批量获取监控列表的报价，每个代码的最近N次观测保存在
+固定大小的NumPy环形缓冲中（内存占用不随运行时间增长）。阈值规则和变化率规则
+对所有代码一次向量化计算，触发的提醒按 (规则, 代码) 去抖后合并成一条消息推送。
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from config import MARKET_CONFIG, MONITOR_CONFIG
+from market_calendar import NY_TZ, is_market_open, next_session_open
+
+logger = logging.getLogger(__name__)
+
+# 休市期间最长等待时间：到点后重新检查
+MAX_WAIT = 300
+
+
+class RingBuffer:
+    """固定大小的环形缓冲：每行是一次观测，每列是一个代码"""
+
+    def __init__(self, columns: int, size: int):
+        self.size = size
+        self.times = np.full(size, np.nan)
+        self.values = np.full((size, columns), np.nan)
+        self.count = 0  # 累计写入次数
+
+    def __len__(self) -> int:
+        return min(self.count, self.size)
+
+    def append(self, timestamp: float, values: np.ndarray):
+        idx = self.count % self.size
+        self.times[idx] = timestamp
+        self.values[idx] = values
+        self.count += 1
+
+    def latest(self) -> np.ndarray:
+        return self.values[(self.count - 1) % self.size]
+
+    def ago(self, steps: int) -> Optional[np.ndarray]:
+        """steps 次观测之前的一行；缓冲中还没有这么多观测时返回None"""
+        if steps >= len(self):
+            return None
+        return self.values[(self.count - 1 - steps) % self.size]
+
+
+class Rule:
+    """一条提醒规则（对应 MONITOR_CONFIG['rules'] 中的一项）"""
+
+    def __init__(self, config: Dict, symbols: List[str]):
+        self.name = config['name']
+        self.label = config.get('label', self.name)
+        self.type = config.get('type', 'change')
+        if self.type not in ('change', 'roc'):
+            raise ValueError(f"规则 {self.name} 的类型无效: {self.type}")
+        self.threshold = float(config['threshold'])
+        self.window = int(config.get('window', 5))
+        self.direction = config.get('direction', 'both')
+
+        # 规则适用的代码，预先算成布尔掩码
+        only = config.get('symbols')
+        exclude = set(config.get('exclude', []))
+        self.mask = np.array([(only is None or symbol in only) and symbol not in exclude
+                              for symbol in symbols])
+
+    def evaluate(self, buffer: RingBuffer, prev_close: np.ndarray) -> np.ndarray:
+        """每个代码的指标值（%），未触发的为NaN"""
+        latest = buffer.latest()
+        if self.type == 'change':
+            base = prev_close
+        else:
+            base = buffer.ago(self.window)
+            if base is None:
+                return np.full(latest.shape, np.nan)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            value = (latest / base - 1) * 100
+
+        if self.direction == 'up':
+            triggered = value >= self.threshold
+        elif self.direction == 'down':
+            triggered = value <= -self.threshold
+        else:
+            triggered = np.abs(value) >= self.threshold
+        return np.where(triggered & self.mask, value, np.nan)
+
+
+class AlertDebouncer:
+    """同一 (规则, 代码) 在冷却时间内只提醒一次"""
+
+    def __init__(self, cooldown: float):
+        self.cooldown = cooldown
+        self._last = {}
+
+    def allow(self, key, now: float) -> bool:
+        last = self._last.get(key)
+        if last is not None and now - last < self.cooldown:
+            return False
+        self._last[key] = now
+        return True
+
+
+class MarketMonitor:
+    """盘中监控：轮询报价、评估规则、推送提醒"""
+
+    def __init__(self, analyzer, notifier, config: Optional[Dict] = None):
+        self.analyzer = analyzer
+        self.notifier = notifier
+        self.config = config or MONITOR_CONFIG
+
+        watchlist = self.config.get('watchlist') or {
+            **MARKET_CONFIG.get('indices', {}),
+            **MARKET_CONFIG.get('universe', {}).get('hot_stocks', {}),
+        }
+        self.names = {symbol: name for name, symbol in watchlist.items()}
+        self.symbols = list(self.names)
+        self.rules = [Rule(rule, self.symbols) for rule in self.config.get('rules', [])]
+        self.debouncer = AlertDebouncer(self.config.get('cooldown', 1800))
+
+        self.buffer = None
+        self.session = None  # 当前缓冲所属的交易日，换日后重建
+        self._stop = threading.Event()
+
+    def poll_once(self, now: Optional[float] = None) -> List[Dict]:
+        """获取一次报价并评估规则，返回去抖后的提醒"""
+        now = now or time.time()
+        session = datetime.fromtimestamp(now, NY_TZ).date()
+        if session != self.session:
+            # 新交易日：隔夜的观测不参与变化率计算
+            self.buffer = RingBuffer(len(self.symbols), self.config.get('history', 120))
+            self.session = session
+
+        quotes = self.analyzer.get_quotes(self.symbols)
+        if quotes is None:
+            logger.warning("未获取到报价")
+            return []
+
+        prices = quotes['price'].to_numpy(dtype=float)
+        prev_close = quotes['prev_close'].to_numpy(dtype=float)
+        self.buffer.append(now, prices)
+
+        alerts = []
+        for rule in self.rules:
+            values = rule.evaluate(self.buffer, prev_close)
+            for idx in np.flatnonzero(~np.isnan(values)):
+                symbol = self.symbols[idx]
+                if not self.debouncer.allow((rule.name, symbol), now):
+                    continue
+                alerts.append({
+                    'rule': rule,
+                    'symbol': symbol,
+                    'name': self.names[symbol],
+                    'value': float(values[idx]),
+                    'price': float(prices[idx]),
+                    'change_pct': float(quotes['change_pct'].iloc[idx]),
+                })
+        return alerts
+
+    def format_alerts(self, alerts: List[Dict]) -> tuple:
+        """提醒合并成一条消息的 (标题, Markdown内容)"""
+        now = datetime.now(NY_TZ)
+        title = f"⚠️ 盘中异动 {now:%m-%d %H:%M} ET"
+        lines = [f"# {title}\n"]
+        for alert in alerts:
+            rule = alert['rule']
+            if rule.type == 'roc':
+                detail = f"最近{rule.window}次观测 {alert['value']:+.2f}%（当日 {alert['change_pct']:+.2f}%）"
+            else:
+                detail = f"当日 {alert['value']:+.2f}%"
+            lines.append(f"- **{rule.label}** {alert['name']} ({alert['symbol']}): "
+                         f"{detail}，现价 {alert['price']:.2f}")
+        return title, '\n'.join(lines) + '\n'
+
+    def check(self) -> int:
+        """轮询一次并推送，返回提醒数"""
+        alerts = self.poll_once()
+        if alerts:
+            for alert in alerts:
+                logger.info(f"  {alert['rule'].label}: {alert['name']} {alert['value']:+.2f}%")
+            title, content = self.format_alerts(alerts)
+            results = self.notifier.deliver(title, content)
+            if not results or not all(results.values()):
+                logger.warning("盘中提醒推送失败")
+        return len(alerts)
+
+    def run_forever(self):
+        """交易时段内按间隔轮询，休市时等待到下一次开盘，直到 stop()"""
+        interval = self.config.get('interval', 60)
+        logger.info(f"盘中监控已启动：{len(self.symbols)} 个代码，{len(self.rules)} 条规则，每 {interval} 秒轮询")
+        while not self._stop.is_set():
+            if not is_market_open():
+                wait = (next_session_open() - datetime.now(NY_TZ)).total_seconds()
+                self._stop.wait(min(max(wait, 0), MAX_WAIT))
+                continue
+
+            start = time.time()
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"盘中监控轮询失败: {e}")
+            self._stop.wait(max(interval - (time.time() - start), 0))
+
+    def stop(self):
+        self._stop.set()
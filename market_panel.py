@@ -0,0 +1,224 @@
+"""
+市场行情面板模块
+
+指数、板块ETF和整个股票池的行情从数据源（market_providers.py）批量获取，合并成一个面板
+（列为 行情字段 × 股票代码），按交易时段缓存到本地。涨跌幅、排名、涨跌家数和行业统计都在面板上向量化计算，
+不逐只股票请求、也不在Python循环里排序。
+"""
+
+import logging
+import os
+import pickle
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from config import MARKET_CONFIG, MARKET_PANEL_CACHE
+
+logger = logging.getLogger(__name__)
+
+# 成分股文件中可能出现的列名（如维基百科标普500列表的 Symbol / Security / GICS Sector）
+_COLUMN_ALIASES = {
+    'symbol': ('symbol', 'ticker', 'code'),
+    'name': ('name', 'security', 'company'),
+    'sector': ('sector', 'gics sector', 'industry'),
+}
+
+
+def _normalize_symbol(symbol: str) -> str:
+    """BRK.B -> BRK-B（yfinance 的代码格式）"""
+    return str(symbol).strip().upper().replace('.', '-')
+
+
+def _read_universe_file(path: str) -> pd.DataFrame:
+    df = pd.read_csv(path)
+    lower = {col.strip().lower(): col for col in df.columns}
+    columns = {}
+    for field, aliases in _COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in lower:
+                columns[field] = df[lower[alias]]
+                break
+    if 'symbol' not in columns:
+        raise ValueError(f"成分股文件缺少 symbol 列: {path}")
+
+    universe = pd.DataFrame(columns)
+    universe['symbol'] = universe['symbol'].map(_normalize_symbol)
+    return universe
+
+
+def load_universe(universe_config: Optional[Dict] = None) -> pd.DataFrame:
+    """股票池：索引为股票代码，列为 name、sector；热门股票的名称优先"""
+    universe_config = universe_config or MARKET_CONFIG.get('universe', {})
+
+    frames = []
+    for path in universe_config.get('files', []):
+        try:
+            frames.append(_read_universe_file(path))
+        except Exception as e:
+            logger.warning(f"读取成分股文件失败 {path}: {e}")
+
+    hot_stocks = universe_config.get('hot_stocks', {})
+    hot = pd.DataFrame({'symbol': [_normalize_symbol(s) for s in hot_stocks.values()],
+                        'name': list(hot_stocks.keys())})
+
+    universe = pd.concat([hot] + frames, ignore_index=True)
+    for column in ('name', 'sector'):
+        if column not in universe:
+            universe[column] = None
+    # 同一代码出现多次时，每列取第一个非空值（名称用热门股票的，行业用成分股文件的）
+    universe = universe.groupby('symbol', sort=False)[['name', 'sector']].first()
+    universe['name'] = universe['name'].fillna(pd.Series(universe.index, index=universe.index))
+    return universe
+
+
+def load_panel(symbols: List[str], session: str, provider, period: Optional[str] = None,
+               cache_file: Optional[str] = None) -> Optional[pd.DataFrame]:
+    """
+    读取行情面板：缓存来自同一数据源、同一交易时段、覆盖全部代码且长度相同时直接使用，否则重新获取
+    session: 最近一个交易时段的日期
+    provider: MarketDataProvider
+    """
+    period = period or MARKET_CONFIG.get('history_period', '1y')
+    cache_file = cache_file or MARKET_PANEL_CACHE
+    try:
+        with open(cache_file, 'rb') as f:
+            cached = pickle.load(f)
+        if (cached.get('provider') == provider.name and cached['session'] == session
+                and cached['period'] == period and set(symbols) <= set(cached['symbols'])):
+            logger.info(f"使用缓存的行情面板（交易时段 {session}，{len(cached['symbols'])} 个代码）")
+            return cached['panel']
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning(f"读取行情面板缓存失败: {e}")
+
+    panel = provider.get_history(symbols, period)
+    if panel is None:
+        return None
+
+    try:
+        os.makedirs(os.path.dirname(cache_file) or '.', exist_ok=True)
+        tmp_path = cache_file + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({'provider': provider.name, 'session': session, 'period': period,
+                         'symbols': list(symbols), 'panel': panel},
+                        f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_file)
+    except Exception as e:
+        logger.warning(f"保存行情面板缓存失败: {e}")
+    return panel
+
+
+def load_cached_panel(session: str, cache_file: Optional[str] = None) -> Optional[pd.DataFrame]:
+    """只读取缓存：属于 session 交易时段的行情面板，没有时返回None（不发起请求）"""
+    try:
+        with open(cache_file or MARKET_PANEL_CACHE, 'rb') as f:
+            cached = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"读取行情面板缓存失败: {e}")
+        return None
+    return cached['panel'] if cached.get('session') == session else None
+
+
+def daily_changes(panel: pd.DataFrame) -> pd.DataFrame:
+    """
+    每个代码最新收盘价、涨跌幅（%）和成交量
+    最后一个交易日停牌的代码沿用前一收盘价
+    """
+    close = panel['Close'].dropna(how='all').ffill()
+    if len(close) < 2:
+        return pd.DataFrame(columns=['price', 'change_pct', 'volume'])
+
+    last = close.iloc[-1]
+    change_pct = (last / close.iloc[-2] - 1) * 100
+    volume = panel['Volume'].reindex(close.index).iloc[-1] if 'Volume' in panel else np.nan
+    changes = pd.DataFrame({'price': last, 'change_pct': change_pct, 'volume': volume})
+    return changes.replace([np.inf, -np.inf], np.nan).dropna(subset=['price', 'change_pct'])
+
+
+def _quotes(changes: pd.DataFrame, symbols: Dict[str, str]) -> Dict:
+    """名称 -> 行情；按配置顺序，缺数据的跳过"""
+    names = pd.Series(list(symbols.keys()), index=list(symbols.values()))
+    rows = changes.reindex(names.index).dropna(subset=['price'])
+    return {
+        names[symbol]: {
+            'current': round(float(row.price), 2),
+            'change_pct': round(float(row.change_pct), 2),
+            'volume': int(row.volume) if pd.notna(row.volume) else 0,
+        }
+        for symbol, row in rows.iterrows()
+    }
+
+
+def _stock_records(changes: pd.DataFrame, universe: pd.DataFrame) -> List[Dict]:
+    records = pd.DataFrame({
+        'name': universe['name'].reindex(changes.index),
+        'symbol': changes.index,
+        'price': changes['price'].round(2),
+        'change_pct': changes['change_pct'].round(2),
+    })
+    return records.to_dict('records')
+
+
+def compute_market_snapshot(panel: pd.DataFrame, universe: pd.DataFrame, top_n: Optional[int] = None) -> Dict:
+    """
+    在行情面板上计算指数、板块、异动榜、涨跌家数和行业统计
+    返回可以直接并入 market_data 的字段
+    """
+    top_n = top_n or MARKET_CONFIG.get('movers_count', 5)
+    changes = daily_changes(panel)
+
+    indices = _quotes(changes, MARKET_CONFIG.get('indices', {}))
+    sectors = _quotes(changes, MARKET_CONFIG.get('sectors', {}))
+    # 板块按涨跌幅降序，格式化时不用再排序
+    sectors = dict(sorted(sectors.items(), key=lambda item: item[1]['change_pct'], reverse=True))
+    for data in sectors.values():
+        data.pop('volume', None)
+
+    stocks = changes.reindex(universe.index).dropna(subset=['change_pct'])
+    stock_change = stocks['change_pct']
+
+    snapshot = {
+        'indices': indices,
+        'sectors': sectors,
+        'top_gainers': _stock_records(stocks.loc[stock_change.nlargest(top_n).index], universe),
+        'top_losers': _stock_records(stocks.loc[stock_change.nsmallest(top_n).index], universe),
+        'universe_size': int(len(stocks)),
+        'breadth': {},
+        'sector_breadth': {},
+    }
+    if stock_change.empty:
+        return snapshot
+
+    snapshot['breadth'] = {
+        'advancers': int((stock_change > 0).sum()),
+        'decliners': int((stock_change < 0).sum()),
+        'unchanged': int((stock_change == 0).sum()),
+        'median_change': round(float(stock_change.median()), 2),
+        'big_movers': int((stock_change.abs() >= 5).sum()),  # 涨跌幅超过5%的股票数
+    }
+
+    # 按行业聚合（股票池文件提供行业时）
+    sector_of = universe['sector'].reindex(stocks.index)
+    if sector_of.notna().any():
+        grouped = pd.DataFrame({
+            'change_pct': stock_change,
+            'advancing': stock_change > 0,
+            'sector': sector_of,
+        }).dropna(subset=['sector']).groupby('sector')
+        stats = pd.DataFrame({
+            'change_pct': grouped['change_pct'].mean().round(2),
+            'advancers_pct': (grouped['advancing'].mean() * 100).round(1),
+            'count': grouped.size(),
+        }).sort_values('change_pct', ascending=False)
+        snapshot['sector_breadth'] = {
+            sector: {'change_pct': float(row.change_pct), 'advancers_pct': float(row.advancers_pct),
+                     'count': int(row['count'])}
+            for sector, row in stats.iterrows()
+        }
+
+    return snapshot
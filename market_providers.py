@@ -0,0 +1,255 @@
+"""
+行情数据源模块
+
+MarketAnalyzer 通过 MarketDataProvider 获取行情和基本面，不直接依赖具体数据源：
+- YFinanceProvider: 通过 yfinance 在线获取
+- LocalFileProvider: 从本地目录读取 CSV/Parquet（离线重跑、可复现的基准测试）
+
+本地目录结构:
+  <local_dir>/bars/<代码>.csv 或 .parquet   日线，列: Date, Open, High, Low, Close, Volume
+  <local_dir>/fundamentals.csv              基本面，列: symbol, earnings_date, market_cap, forward_pe,
+                                            price, analyst_target, recommendation
+"""
+
+import logging
+import os
+import re
+import time
+from abc import ABC, abstractmethod
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from config import MARKET_CONFIG
+
+logger = logging.getLogger(__name__)
+
+BAR_FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+class MarketDataProvider(ABC):
+    """行情数据源接口"""
+
+    name = 'base'
+
+    @abstractmethod
+    def get_history(self, symbols: List[str], period: str) -> Optional[pd.DataFrame]:
+        """日线行情面板，列为 (字段, 代码) 两层；没有任何数据时返回None"""
+
+    def get_quotes(self, symbols: List[str]) -> Optional[pd.Series]:
+        """最新价（索引为代码）；默认取日线的最后一个收盘价"""
+        history = self.get_history(symbols, '5d')
+        if history is None:
+            return None
+        return history['Close'].ffill().iloc[-1].dropna()
+
+    @abstractmethod
+    def get_fundamentals(self, symbol: str) -> Optional[Dict]:
+        """
+        基本面和下一次财报日期，字段:
+        earnings_date, market_cap, forward_pe, price, analyst_target, recommendation
+        """
+
+    def pause(self):
+        """逐只请求基本面之间的间隔（在线数据源用于避免限流）"""
+
+
+class YFinanceProvider(MarketDataProvider):
+    """yfinance 在线数据源"""
+
+    name = 'yfinance'
+
+    def __init__(self, chunk_size: Optional[int] = None, request_interval: float = 0.5):
+        self.chunk_size = chunk_size or MARKET_CONFIG.get('universe', {}).get('chunk_size', 100)
+        self.request_interval = request_interval
+
+    def get_history(self, symbols: List[str], period: str) -> Optional[pd.DataFrame]:
+        """分批批量下载"""
+        import yfinance as yf
+
+        frames = []
+        for start in range(0, len(symbols), self.chunk_size):
+            chunk = symbols[start:start + self.chunk_size]
+            logger.info(f"  批量下载行情 {start + 1}-{start + len(chunk)} / {len(symbols)}")
+            try:
+                data = yf.download(chunk, period=period, group_by='column', auto_adjust=False,
+                                   threads=True, progress=False)
+            except Exception as e:
+                logger.warning(f"批量下载行情失败: {e}")
+                continue
+            if data is None or data.empty:
+                continue
+            if not isinstance(data.columns, pd.MultiIndex):
+                # 旧版yfinance单个代码时返回单层列
+                data.columns = pd.MultiIndex.from_product([data.columns, chunk])
+            frames.append(data)
+
+        if not frames:
+            return None
+        panel = pd.concat(frames, axis=1).sort_index()
+        panel.columns = panel.columns.set_names(['field', 'symbol'])
+        return panel
+
+    def get_quotes(self, symbols: List[str]) -> Optional[pd.Series]:
+        """当天1分钟线的最新成交价，一次请求获取全部代码"""
+        import yfinance as yf
+
+        data = yf.download(symbols, period='1d', interval='1m', group_by='column', auto_adjust=False,
+                           threads=True, progress=False)
+        if data is None or data.empty:
+            return None
+        close = data['Close']
+        if isinstance(close, pd.Series):
+            close = close.to_frame(symbols[0])
+        return close.ffill().iloc[-1].dropna()
+
+    def get_fundamentals(self, symbol: str) -> Optional[Dict]:
+        import yfinance as yf
+
+        ticker = yf.Ticker(symbol)
+        info = ticker.info
+
+        earnings_date = None
+        calendar = ticker.calendar
+        if calendar is not None and 'Earnings Date' in calendar:
+            earnings_date = calendar['Earnings Date']
+            # 如果是DataFrame或Series，取第一个值
+            if hasattr(earnings_date, 'iloc'):
+                earnings_date = earnings_date.iloc[0] if len(earnings_date) > 0 else None
+            elif isinstance(earnings_date, list):
+                earnings_date = earnings_date[0] if earnings_date else None
+
+        return {
+            'earnings_date': _to_date(earnings_date),
+            'market_cap': info.get('marketCap', 0),
+            'forward_pe': info.get('forwardPE', None),
+            'price': info.get('currentPrice', 0),
+            'analyst_target': info.get('targetMeanPrice', None),
+            'recommendation': info.get('recommendationKey', 'hold'),
+        }
+
+    def pause(self):
+        time.sleep(self.request_interval)  # 避免限流
+
+
+def _to_date(value) -> Optional[date]:
+    """财报日期统一为 date（yfinance 可能返回 date、datetime 或 Timestamp）"""
+    if value is None or (not isinstance(value, date) and pd.isna(value)):
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return pd.Timestamp(value).date()
+
+
+def _period_rows(period: str) -> Optional[int]:
+    """yfinance 风格的时间长度（5d / 6mo / 1y / max）换算为交易日行数"""
+    match = re.fullmatch(r'(\d+)(d|wk|mo|y)', period.strip().lower())
+    if not match:
+        return None
+    count, unit = int(match.group(1)), match.group(2)
+    return count * {'d': 1, 'wk': 5, 'mo': 21, 'y': 252}[unit]
+
+
+class LocalFileProvider(MarketDataProvider):
+    """本地 CSV/Parquet 数据源"""
+
+    name = 'local'
+
+    def __init__(self, data_dir: Optional[str] = None):
+        self.data_dir = data_dir or MARKET_CONFIG.get('local_dir', './data/market')
+        self._fundamentals = None
+
+    def _bar_path(self, symbol: str) -> Optional[str]:
+        for ext in ('.parquet', '.csv'):
+            path = os.path.join(self.data_dir, 'bars', f"{symbol}{ext}")
+            if os.path.exists(path):
+                return path
+        return None
+
+    def _read_bars(self, path: str) -> pd.DataFrame:
+        if path.endswith('.parquet'):
+            bars = pd.read_parquet(path)
+        else:
+            bars = pd.read_csv(path)
+        date_column = next((c for c in bars.columns if c.lower() in ('date', 'datetime')), None)
+        if date_column is not None:
+            bars = bars.set_index(date_column)
+        bars.index = pd.to_datetime(bars.index)
+        bars.columns = [c.capitalize() for c in bars.columns]
+        return bars.reindex(columns=BAR_FIELDS)
+
+    def get_history(self, symbols: List[str], period: str) -> Optional[pd.DataFrame]:
+        bars = {}
+        for symbol in symbols:
+            path = self._bar_path(symbol)
+            if path is None:
+                continue
+            try:
+                bars[symbol] = self._read_bars(path)
+            except Exception as e:
+                logger.warning(f"读取本地行情失败 {path}: {e}")
+
+        if not bars:
+            logger.warning(f"本地目录中没有行情数据: {self.data_dir}")
+            return None
+        missing = len(symbols) - len(bars)
+        if missing:
+            logger.info(f"本地目录缺少 {missing} 个代码的行情")
+
+        panel = pd.concat(bars, axis=1).swaplevel(axis=1).sort_index(axis=1).sort_index()
+        panel.columns = panel.columns.set_names(['field', 'symbol'])
+        rows = _period_rows(period)
+        if rows is not None:
+            panel = panel.iloc[-rows:]
+        return panel
+
+    def get_fundamentals(self, symbol: str) -> Optional[Dict]:
+        if self._fundamentals is None:
+            path = os.path.join(self.data_dir, 'fundamentals.csv')
+            try:
+                fundamentals = pd.read_csv(path, parse_dates=['earnings_date'])
+                self._fundamentals = fundamentals.set_index('symbol')
+            except FileNotFoundError:
+                self._fundamentals = pd.DataFrame()
+        if symbol not in self._fundamentals.index:
+            return None
+
+        row = self._fundamentals.loc[symbol]
+        # numpy 标量转为 Python 类型，市场数据需要能写入JSON缓存
+        fundamentals = {key: (None if pd.isna(value) else getattr(value, 'item', lambda: value)())
+                        for key, value in row.items()}
+        fundamentals['earnings_date'] = _to_date(fundamentals.get('earnings_date'))
+        return fundamentals
+
+
+def export_panel(panel: pd.DataFrame, data_dir: str, fmt: str = 'csv') -> int:
+    """把行情面板按代码导出为 LocalFileProvider 的目录格式，返回导出的代码数"""
+    bars_dir = os.path.join(data_dir, 'bars')
+    os.makedirs(bars_dir, exist_ok=True)
+    symbols = panel.columns.get_level_values('symbol').unique()
+    for symbol in symbols:
+        bars = panel.xs(symbol, axis=1, level='symbol').dropna(how='all')
+        bars.index.name = 'Date'
+        path = os.path.join(bars_dir, f"{symbol}.{fmt}")
+        if fmt == 'parquet':
+            bars.to_parquet(path)
+        else:
+            bars.to_csv(path)
+    return len(symbols)
+
+
+PROVIDERS = {
+    YFinanceProvider.name: YFinanceProvider,
+    LocalFileProvider.name: LocalFileProvider,
+}
+
+
+def get_provider(name: Optional[str] = None) -> MarketDataProvider:
+    """按 MARKET_CONFIG['provider'] 创建数据源"""
+    name = name or MARKET_CONFIG.get('provider', 'yfinance')
+    if name not in PROVIDERS:
+        raise ValueError(f"未知的行情数据源: {name}（可选: {', '.join(PROVIDERS)}）")
+    return PROVIDERS[name]()
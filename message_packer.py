@@ -0,0 +1,78 @@
+"""
+消息分页模块
+
+推送渠道对单条消息有字节上限（Server酱约32KB，企业微信markdown 4096字节）。
+把摘要按新闻条目边界切分后，按顺序装入尽可能少的分页，不丢弃任何条目。
+每个条目的UTF-8字节数只计算一次。
+"""
+
+from typing import List
+
+# format_news_markdown 中每个条目（以及标题区）都以分隔线结尾
+ITEM_SEPARATOR = '---\n\n'
+
+
+def split_blocks(content: str) -> List[str]:
+    """在条目分隔线之后切分，拼接所有块可还原原文"""
+    blocks = []
+    start = 0
+    while True:
+        idx = content.find(ITEM_SEPARATOR, start)
+        if idx < 0:
+            break
+        end = idx + len(ITEM_SEPARATOR)
+        blocks.append(content[start:end])
+        start = end
+    if start < len(content):
+        blocks.append(content[start:])
+    return blocks
+
+
+def _split_oversized(block: str, max_bytes: int) -> List[str]:
+    """单个条目超过上限时，按行切分；单行仍超限时按字符切分"""
+    pieces = []
+    for line in block.splitlines(keepends=True):
+        encoded = line.encode('utf-8')
+        if len(encoded) <= max_bytes:
+            pieces.append(line)
+            continue
+        # 按字节切分，避免截断多字节字符
+        while encoded:
+            chunk = encoded[:max_bytes].decode('utf-8', errors='ignore')
+            if not chunk:
+                break
+            pieces.append(chunk)
+            encoded = encoded[len(chunk.encode('utf-8')):]
+    return pieces
+
+
+def pack_pages(content: str, max_bytes: int) -> List[str]:
+    """
+    按顺序把条目装入分页，每页不超过max_bytes字节
+    顺序装箱时贪心填充即可得到最少页数
+    """
+    if len(content.encode('utf-8')) <= max_bytes:
+        return [content]
+
+    blocks = []
+    for block in split_blocks(content):
+        size = len(block.encode('utf-8'))
+        if size <= max_bytes:
+            blocks.append((block, size))
+        else:
+            blocks.extend((piece, len(piece.encode('utf-8'))) for piece in _split_oversized(block, max_bytes))
+
+    pages = []
+    current = []
+    current_size = 0
+    for block, size in blocks:
+        if current and current_size + size > max_bytes:
+            pages.append(''.join(current))
+            current = []
+            current_size = 0
+        current.append(block)
+        current_size += size
+    if current:
+        pages.append(''.join(current))
+
+    return pages
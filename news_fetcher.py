@@ -2,16 +2,22 @@
 新闻收集模块
 """
 
-import feedparser
-import requests
 from datetime import datetime, timedelta
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 import logging
-from config import NEWS_SOURCES, KEYWORDS
+import time
+from config import NEWS_SOURCES
+from feed_stream import parse_feed_stream, parse_feed_bytes
+import http_client
+from shard import in_shard
+from feed_registry import get_feed_registry, load_poll_state, save_poll_state
+from profiles import Profile, ProfileMatcher, load_profiles
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+NEWSAPI_SHARD_KEY = 'newsapi://top-headlines'
+
 
 class NewsCollector:
     """新闻收集器"""
@@ -19,14 +25,33 @@ class NewsCollector:
     def __init__(self):
         self.collected_news = []
 
-    def fetch_rss_feeds(self) -> List[Dict]:
+    def fetch_rss_feeds(self, days: int = 1, feed_urls: Optional[List[str]] = None) -> List[Dict]:
         """从RSS源获取新闻"""
         all_news = []
+        if feed_urls is None:
+            feed_urls = get_feed_registry().urls()
+        stream_config = NEWS_SOURCES.get('streaming', {})
+        cutoff_date = datetime.now() - timedelta(days=days)
+
+        pool_config = NEWS_SOURCES.get('process_pool', {})
+        if pool_config.get('enabled', False):
+            return self._fetch_rss_process_pool(feed_urls, cutoff_date, stream_config, pool_config)
+
+        for feed_url in feed_urls:
+            if stream_config.get('enabled', False):
+                try:
+                    logger.info(f"正在流式获取RSS源: {feed_url}")
+                    all_news.extend(self._fetch_rss_streaming(feed_url, cutoff_date, stream_config))
+                    continue
+                except Exception as e:
+                    logger.warning(f"流式解析失败 {feed_url}: {e}，回退到feedparser")
 
-        for feed_url in NEWS_SOURCES['rss_feeds']:
             try:
                 logger.info(f"正在获取RSS源: {feed_url}")
-                feed = feedparser.parse(feed_url)
+                response = http_client.get(feed_url)
+                response.raise_for_status()
+                import feedparser
+                feed = feedparser.parse(response.content, response_headers=dict(response.headers))
 
                 for entry in feed.entries:
                     news_item = {
@@ -34,7 +59,8 @@ class NewsCollector:
                         'link': entry.get('link', ''),
                         'summary': entry.get('summary', ''),
                         'published': entry.get('published', ''),
-                        'source': feed.feed.get('title', feed_url),
+                        'source': feed.feed.get('title') or self._feed_title(feed_url),
+                        'feed_url': feed_url,
                         'timestamp': datetime.now()
                     }
                     all_news.append(news_item)
@@ -46,6 +72,107 @@ class NewsCollector:
 
         return all_news
 
+    def _fetch_rss_streaming(self, feed_url: str, cutoff_date: datetime, stream_config: Dict) -> List[Dict]:
+        """边下载边解析RSS源，达到截止时间、条目上限或字节上限即停止读取"""
+        with http_client.stream(feed_url) as response:
+            response.raise_for_status()
+            parser = parse_feed_stream(
+                feed_url,
+                response.iter_content(chunk_size=stream_config.get('chunk_size', 64 * 1024)),
+                cutoff=cutoff_date,
+                max_entries=stream_config.get('max_entries', 100),
+                max_bytes=stream_config.get('max_bytes', 2 * 1024 * 1024),
+            )
+
+        source = parser.feed_title or self._feed_title(feed_url)
+        now = datetime.now()
+        news_items = []
+        for entry in parser.entries:
+            entry['source'] = source
+            entry['feed_url'] = feed_url
+            entry['timestamp'] = now
+            news_items.append(entry)
+
+        stop_info = f"，提前停止: {parser.stop_reason}" if parser.stop_reason else ""
+        logger.info(f"从 {feed_url} 获取了 {len(news_items)} 条新闻（读取 {parser.bytes_read} 字节{stop_info}）")
+        return news_items
+
+    def _fetch_rss_process_pool(self, feed_urls: List[str], cutoff_date: datetime,
+                                stream_config: Dict, pool_config: Dict) -> List[Dict]:
+        """
+        线程池并发下载原始字节，进程池并行解析
+        XML解析是CPU密集型的，进程池可绕开GIL用满所有核心
+        """
+        from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+
+        max_entries = stream_config.get('max_entries', 100)
+        parse_futures = {}
+
+        with ProcessPoolExecutor(max_workers=pool_config.get('parse_workers') or None) as parse_pool, \
+                ThreadPoolExecutor(max_workers=pool_config.get('fetch_workers', 16)) as fetch_pool:
+            fetch_futures = {
+                fetch_pool.submit(self._download_feed, url, stream_config): url
+                for url in feed_urls
+            }
+
+            # 下载完成一个就提交解析一个，下载与解析重叠进行
+            for future in as_completed(fetch_futures):
+                feed_url = fetch_futures[future]
+                try:
+                    data = future.result()
+                except Exception as e:
+                    logger.error(f"获取RSS源失败 {feed_url}: {str(e)}")
+                    continue
+                parse_futures[feed_url] = parse_pool.submit(
+                    parse_feed_bytes, feed_url, data, cutoff_date, max_entries)
+
+            # 按配置顺序汇总，保证去重结果稳定
+            all_news = []
+            for feed_url in feed_urls:
+                future = parse_futures.get(feed_url)
+                if future is None:
+                    continue
+                try:
+                    feed_title, entries = future.result()
+                except Exception as e:
+                    logger.error(f"解析RSS源失败 {feed_url}: {str(e)}")
+                    continue
+
+                source = feed_title or self._feed_title(feed_url)
+                now = datetime.now()
+                for title, link, summary, published in entries:
+                    all_news.append({
+                        'title': title,
+                        'link': link,
+                        'summary': summary,
+                        'published': published,
+                        'source': source,
+                        'feed_url': feed_url,
+                        'timestamp': now
+                    })
+                logger.info(f"从 {feed_url} 获取了 {len(entries)} 条新闻")
+
+        return all_news
+
+    def _feed_title(self, feed_url: str) -> str:
+        """源自身没有标题时，使用源列表中的标题，再退回到URL"""
+        feed = get_feed_registry().get(feed_url)
+        return (feed.title if feed else '') or feed_url
+
+    def _download_feed(self, feed_url: str, stream_config: Dict) -> bytes:
+        """下载源的原始字节，超过字节上限即停止读取"""
+        max_bytes = stream_config.get('max_bytes', 2 * 1024 * 1024)
+        buffer = bytearray()
+
+        with http_client.stream(feed_url) as response:
+            response.raise_for_status()
+            for chunk in response.iter_content(chunk_size=stream_config.get('chunk_size', 64 * 1024)):
+                buffer += chunk
+                if len(buffer) >= max_bytes:
+                    break
+
+        return bytes(buffer[:max_bytes])
+
     def fetch_newsapi(self) -> List[Dict]:
         """从NewsAPI获取新闻（可选）"""
         if not NEWS_SOURCES['newsapi']['enabled']:
@@ -64,7 +191,7 @@ class NewsCollector:
                 'pageSize': 50
             }
 
-            response = requests.get(url, params=params, timeout=10)
+            response = http_client.get(url, params=params)
             if response.status_code == 200:
                 articles = response.json().get('articles', [])
                 for article in articles:
@@ -81,7 +208,7 @@ class NewsCollector:
             # AI新闻
             params['q'] = 'artificial intelligence OR AI OR robotics'
             params['category'] = 'technology'
-            response = requests.get(url, params=params, timeout=10)
+            response = http_client.get(url, params=params)
             if response.status_code == 200:
                 articles = response.json().get('articles', [])
                 for article in articles:
@@ -102,30 +229,27 @@ class NewsCollector:
 
         return all_news
 
-    def filter_by_keywords(self, news_list: List[Dict]) -> List[Dict]:
-        """根据关键词过滤新闻"""
-        filtered_news = []
-
-        all_keywords = (
-            KEYWORDS['us_stock'] +
-            KEYWORDS['ai_robotics']
-        )
+    def filter_by_keywords(self, news_list: List[Dict], profiles: Optional[List[Profile]] = None) -> List[Dict]:
+        """
+        根据关键词过滤新闻
+        所有订阅方案的关键词合并为一个匹配器，每条新闻只扫描一次；
+        命中任一方案即保留，并在 profile_categories 中记录各方案命中的分类
+        """
+        if profiles is None:
+            profiles = load_profiles()
+        matcher = ProfileMatcher(profiles)
+        primary = profiles[0].name
 
+        filtered_news = []
         for news in news_list:
-            text = (news['title'] + ' ' + news['summary']).lower()
-
-            # 检查是否包含关键词
-            for keyword in all_keywords:
-                if keyword.lower() in text:
-                    # 标记新闻类型
-                    news['categories'] = []
-                    if any(kw.lower() in text for kw in KEYWORDS['us_stock']):
-                        news['categories'].append('美股')
-                    if any(kw.lower() in text for kw in KEYWORDS['ai_robotics']):
-                        news['categories'].append('AI/具身智能')
-
-                    filtered_news.append(news)
-                    break
+            text = (news.get('title') or '') + ' ' + (news.get('summary') or '')
+            profile_categories = matcher.match(text)
+
+            if profile_categories:
+                # 标记新闻类型
+                news['profile_categories'] = profile_categories
+                news['categories'] = profile_categories.get(primary, [])
+                filtered_news.append(news)
 
         logger.info(f"关键词过滤后保留 {len(filtered_news)} 条新闻")
         return filtered_news
@@ -152,16 +276,49 @@ class NewsCollector:
 
         return filtered
 
-    def collect_news(self) -> List[Dict]:
-        """收集所有新闻"""
+    def collect_news(self, shard: Optional[Tuple[int, int]] = None,
+                     profiles: Optional[List[Profile]] = None) -> List[Dict]:
+        """
+        收集所有新闻
+        shard=(i, N) 时只采集按URL稳定哈希分配到第i个分片的源
+        profiles: 订阅方案列表，默认读取配置
+        """
         logger.info("开始收集新闻...")
 
+        registry = get_feed_registry()
+        feed_urls = registry.urls()
+        fetch_api = True
+        if shard is not None:
+            feed_urls = [url for url in feed_urls if in_shard(url, shard)]
+            # NewsAPI 视为一个源，只由一个分片负责
+            fetch_api = in_shard(NEWSAPI_SHARD_KEY, shard)
+            logger.info(f"分片 {shard[0]}/{shard[1]}: 负责 {len(feed_urls)} 个RSS源")
+
+        # 设置了轮询间隔的源，距上次成功抓取未到间隔时不再请求，沿用上次抓到的新闻
+        now = time.time()
+        poll_state = load_poll_state()
+        due = set(registry.due_urls({url: entry['polled_at'] for url, entry in poll_state.items()}, now))
+        skipped = [url for url in feed_urls if url not in due]
+        feed_urls = [url for url in feed_urls if url in due]
+        cached_news = [news for url in skipped for news in poll_state[url].get('items', [])]
+        if skipped:
+            logger.info(f"{len(skipped)} 个源未到轮询间隔，沿用上次抓取的 {len(cached_news)} 条新闻")
+
         # 从各个源获取新闻
-        rss_news = self.fetch_rss_feeds()
-        api_news = self.fetch_newsapi()
+        rss_news = self.fetch_rss_feeds(days=1, feed_urls=feed_urls)
+        api_news = self.fetch_newsapi() if fetch_api else []
+
+        # 返回了新闻的源记为已抓取并保存这些新闻；失败或没有新内容的源下次仍会抓取
+        fetched = {}
+        for news in rss_news:
+            url = news.get('feed_url')
+            feed = registry.get(url) if url else None
+            if feed and feed.interval > 0:
+                fetched.setdefault(url, []).append(news)
+        save_poll_state({url: {'polled_at': now, 'items': items} for url, items in fetched.items()})
 
         # 合并新闻
-        all_news = rss_news + api_news
+        all_news = rss_news + cached_news + api_news
         logger.info(f"总共获取 {len(all_news)} 条新闻")
 
         # 去重
@@ -169,7 +326,7 @@ class NewsCollector:
         logger.info(f"去重后保留 {len(unique_news)} 条新闻")
 
         # 过滤
-        filtered_news = self.filter_by_keywords(unique_news)
+        filtered_news = self.filter_by_keywords(unique_news, profiles)
         filtered_news = self.filter_by_date(filtered_news, days=1)
 
         self.collected_news = filtered_news
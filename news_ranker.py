@@ -2,18 +2,21 @@
 新闻排序和评分模块
 """
 
-from typing import List, Dict
+from typing import List, Dict, Optional
 import logging
 from datetime import datetime
 import re
 
+from feed_registry import get_feed_registry
+
 logger = logging.getLogger(__name__)
 
 
 class NewsRanker:
     """新闻排序器"""
 
-    def __init__(self):
+    def __init__(self, source_weights: Optional[Dict[str, float]] = None):
+        """source_weights: 额外的来源权重，覆盖同名的默认权重"""
         # 高质量来源权重
         self.source_weights = {
             # 顶级财经媒体
@@ -41,6 +44,8 @@ class NewsRanker:
             'Wired': 1.25,
             'VentureBeat': 1.3,  # AI专注
         }
+        if source_weights:
+            self.source_weights.update(source_weights)
 
         # 关键词重要性权重
         self.keyword_weights = {
@@ -64,12 +69,16 @@ class NewsRanker:
         """计算新闻分数"""
         score = 1.0
 
-        # 1. 来源权重
-        source = news.get('source', '')
-        for source_name, weight in self.source_weights.items():
-            if source_name.lower() in source.lower():
-                score *= weight
-                break
+        # 1. 来源权重（源列表中为该源单独配置的权重优先）
+        feed_weight = get_feed_registry().weight_for(news.get('feed_url'))
+        if feed_weight is not None:
+            score *= feed_weight
+        else:
+            source = news.get('source', '')
+            for source_name, weight in self.source_weights.items():
+                if source_name.lower() in source.lower():
+                    score *= weight
+                    break
 
         # 2. 关键词权重
         text = (news.get('title', '') + ' ' + news.get('summary', '')).lower()
@@ -240,10 +249,11 @@ class NewsRanker:
         # 返回前N条
         return sorted_news[:top_n]
 
-    def diversify_selection(self, news_list: List[Dict], top_n: int = 10) -> List[Dict]:
+    def diversify_selection(self, news_list: List[Dict], top_n: int = 10,
+                            categories: Optional[List[str]] = None) -> List[Dict]:
         """确保新闻多样性"""
         selected = []
-        category_counts = {'美股': 0, 'AI/具身智能': 0}
+        category_counts = {cat: 0 for cat in (categories or ['美股', 'AI/具身智能'])}
 
         # 先按分数排序
         sorted_news = sorted(news_list, key=lambda x: x.get('score', 0), reverse=True)
@@ -0,0 +1,271 @@
+"""
+推送发件箱模块
+
+渲染好的消息先持久化到 DATA_DIR/outbox，再由后台投递器异步推送：
+- 每条消息一个JSON文件，按状态放在 pending / inflight / sent / dead 子目录
+- 投递器通过原子重命名认领消息，多个进程同时投递也不会重复发送
+- 每个推送目标和超长消息的每个分页送达后都会记录，重试时只补发失败的目标和分页
+- 失败后按指数退避重试，超过最大次数移入 dead
+- sent / dead 中的消息超过保留天数后删除
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from config import OUTBOX_CONFIG, OUTBOX_DIR
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+INFLIGHT = 'inflight'
+SENT = 'sent'
+DEAD = 'dead'
+
+# 投递器清理过期消息的最短间隔（秒）
+PRUNE_INTERVAL = 3600
+
+
+def _write_json(path: str, data: Dict):
+    """先写临时文件再替换，避免留下写了一半的消息"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+class Outbox:
+    """基于文件的持久化消息队列"""
+
+    def __init__(self, outbox_dir: str = OUTBOX_DIR):
+        self.outbox_dir = outbox_dir
+        for state in (PENDING, INFLIGHT, SENT, DEAD):
+            os.makedirs(os.path.join(outbox_dir, state), exist_ok=True)
+
+    def _path(self, state: str, message_id: str) -> str:
+        return os.path.join(self.outbox_dir, state, f"{message_id}.json")
+
+    def enqueue(self, title: str, content: str, profile: str = 'default') -> str:
+        """消息入队，返回消息ID"""
+        now = time.time()
+        message_id = f"{datetime.now().strftime('%Y%m%d%H%M%S')}_{profile}_{uuid.uuid4().hex[:8]}"
+        message = {
+            'id': message_id,
+            'profile': profile,
+            'title': title,
+            'content': content,
+            'created_at': now,
+            'attempts': 0,
+            'next_attempt_at': now,
+            'delivered': [],    # 已送达的目标名和分页
+            'last_error': None,
+        }
+        _write_json(self._path(PENDING, message_id), message)
+        logger.info(f"消息已进入发件箱: {message_id}")
+        return message_id
+
+    def due_messages(self, now: Optional[float] = None) -> List[str]:
+        """到期待投递的消息ID（按入队顺序）"""
+        now = now if now is not None else time.time()
+        due = []
+        pending_dir = os.path.join(self.outbox_dir, PENDING)
+        for filename in sorted(os.listdir(pending_dir)):
+            if not filename.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(pending_dir, filename), encoding='utf-8') as f:
+                    message = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if message.get('next_attempt_at', 0) <= now:
+                due.append(message['id'])
+        return due
+
+    def pending_count(self) -> int:
+        return len([f for f in os.listdir(os.path.join(self.outbox_dir, PENDING)) if f.endswith('.json')])
+
+    def claim(self, message_id: str) -> Optional[Dict]:
+        """认领一条消息（pending -> inflight），已被其它投递器认领时返回None"""
+        src = self._path(PENDING, message_id)
+        dst = self._path(INFLIGHT, message_id)
+        try:
+            os.rename(src, dst)
+        except FileNotFoundError:
+            return None
+        # 记录认领时间，用于回收崩溃投递器留下的消息
+        os.utime(dst)
+        with open(dst, encoding='utf-8') as f:
+            return json.load(f)
+
+    def checkpoint(self, message: Dict):
+        """保存投递进度（已送达的目标），投递器崩溃后不会重复发送"""
+        _write_json(self._path(INFLIGHT, message['id']), message)
+
+    def complete(self, message: Dict):
+        message['sent_at'] = time.time()
+        _write_json(self._path(INFLIGHT, message['id']), message)
+        os.replace(self._path(INFLIGHT, message['id']), self._path(SENT, message['id']))
+
+    def release(self, message: Dict, error: str):
+        """投递失败，按指数退避放回 pending；超过最大次数移入 dead"""
+        message['attempts'] += 1
+        message['last_error'] = error
+        inflight_path = self._path(INFLIGHT, message['id'])
+
+        if message['attempts'] >= OUTBOX_CONFIG.get('max_attempts', 8):
+            _write_json(inflight_path, message)
+            os.replace(inflight_path, self._path(DEAD, message['id']))
+            logger.error(f"消息 {message['id']} 多次投递失败，已移入 dead: {error}")
+            return
+
+        delay = min(OUTBOX_CONFIG.get('backoff_base', 30) * (2 ** (message['attempts'] - 1)),
+                    OUTBOX_CONFIG.get('backoff_max', 3600))
+        message['next_attempt_at'] = time.time() + delay
+        _write_json(inflight_path, message)
+        os.replace(inflight_path, self._path(PENDING, message['id']))
+        logger.warning(f"消息 {message['id']} 第 {message['attempts']} 次投递失败，{delay:.0f} 秒后重试: {error}")
+
+    def prune(self, sent_keep_days: Optional[int] = None, dead_keep_days: Optional[int] = None) -> int:
+        """删除超过保留天数的 sent / dead 消息（按文件修改时间，即送达或移入 dead 的时间）"""
+        keep_days = {
+            SENT: sent_keep_days if sent_keep_days is not None else OUTBOX_CONFIG.get('sent_keep_days', 7),
+            DEAD: dead_keep_days if dead_keep_days is not None else OUTBOX_CONFIG.get('dead_keep_days', 30),
+        }
+        now = time.time()
+        removed = 0
+        for state, days in keep_days.items():
+            state_dir = os.path.join(self.outbox_dir, state)
+            for filename in os.listdir(state_dir):
+                path = os.path.join(state_dir, filename)
+                try:
+                    if now - os.path.getmtime(path) > days * 86400:
+                        os.remove(path)
+                        removed += 1
+                except FileNotFoundError:
+                    continue
+        if removed:
+            logger.info(f"清理了 {removed} 条过期的发件箱消息")
+        return removed
+
+    def recover_stale(self, lease_seconds: Optional[float] = None) -> int:
+        """把超过租期仍停留在 inflight 的消息放回 pending（投递器崩溃的情况）"""
+        lease_seconds = lease_seconds or OUTBOX_CONFIG.get('lease_seconds', 600)
+        inflight_dir = os.path.join(self.outbox_dir, INFLIGHT)
+        now = time.time()
+        recovered = 0
+        for filename in os.listdir(inflight_dir):
+            if not filename.endswith('.json'):
+                continue
+            path = os.path.join(inflight_dir, filename)
+            try:
+                if now - os.path.getmtime(path) > lease_seconds:
+                    os.replace(path, os.path.join(self.outbox_dir, PENDING, filename))
+                    recovered += 1
+            except FileNotFoundError:
+                continue
+        if recovered:
+            logger.warning(f"回收了 {recovered} 条超时未完成的消息")
+        return recovered
+
+
+class OutboxDispatcher:
+    """发件箱投递器"""
+
+    def __init__(self, outbox: Outbox, notifier_for: Callable[[str], object]):
+        """notifier_for: 方案名 -> WeChatNotifier"""
+        self.outbox = outbox
+        self.notifier_for = notifier_for
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+        self._last_prune = 0.0
+
+    def deliver_message(self, message: Dict) -> bool:
+        notifier = self.notifier_for(message['profile'])
+        if notifier is None:
+            self.outbox.release(message, f"未知的订阅方案: {message['profile']}")
+            return False
+
+        # 已送达的目标名和分页（"目标名#page2/5"），推送时原地加入本次送达的分页
+        delivered = set(message['delivered'])
+        try:
+            results = notifier.deliver(message['title'], message['content'], delivered=delivered)
+        except Exception as e:
+            message['delivered'] = sorted(delivered)
+            self.outbox.release(message, str(e))
+            return False
+
+        for name, ok in results.items():
+            if ok:
+                delivered.add(name)
+        message['delivered'] = sorted(delivered)
+        self.outbox.checkpoint(message)
+
+        failed = [name for name, ok in results.items() if not ok]
+        if failed:
+            self.outbox.release(message, f"推送失败的目标: {', '.join(failed)}")
+            return False
+
+        self.outbox.complete(message)
+        logger.info(f"✅ 消息 {message['id']} 投递完成")
+        return True
+
+    def drain_once(self) -> int:
+        """投递当前所有到期的消息，返回成功条数"""
+        self.outbox.recover_stale()
+        if time.time() - self._last_prune >= PRUNE_INTERVAL:
+            self._last_prune = time.time()
+            self.outbox.prune()
+        delivered = 0
+        for message_id in self.outbox.due_messages():
+            message = self.outbox.claim(message_id)
+            if message is None:
+                continue
+            if self.deliver_message(message):
+                delivered += 1
+        return delivered
+
+    def drain(self, max_wait: float = 0) -> int:
+        """
+        投递到期消息；max_wait > 0 时在该时间内等待退避中的消息到期继续重试，
+        直到发件箱清空或超时
+        """
+        deadline = time.time() + max_wait
+        delivered = self.drain_once()
+        while self.outbox.pending_count() and time.time() < deadline:
+            time.sleep(min(OUTBOX_CONFIG.get('poll_interval', 10), max(deadline - time.time(), 0)))
+            delivered += self.drain_once()
+        return delivered
+
+    def start(self):
+        """启动后台投递线程"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='outbox-dispatcher', daemon=True)
+        self._thread.start()
+        logger.info("发件箱后台投递已启动")
+
+    def wake(self):
+        """有新消息入队时唤醒后台线程立即投递"""
+        self._wake.set()
+
+    def stop(self, wait: bool = False):
+        self._stop.set()
+        self._wake.set()
+        if wait and self._thread:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.drain_once()
+            except Exception as e:
+                logger.error(f"发件箱投递异常: {e}", exc_info=True)
+            self._wake.wait(OUTBOX_CONFIG.get('poll_interval', 10))
+            self._wake.clear()
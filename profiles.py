@@ -0,0 +1,100 @@
+"""
+订阅方案模块
+
+一次运行服务多个团队：每个方案有自己的关键词分类、来源权重、推送条数和推送目标，
+抓取、去重和AI摘要在所有方案间共享。所有方案的关键词合并成一个匹配器，
+每条新闻只扫描一次。
+"""
+
+import logging
+from typing import Dict, List, Optional
+
+from config import KEYWORDS, PROFILES, SCHEDULE_CONFIG, WECHAT_CONFIG
+from keyword_matcher import KeywordMatcher
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROFILE = 'default'
+
+
+class Profile:
+    """单个订阅方案"""
+
+    def __init__(self, name: str, categories: Dict[str, List[str]], source_weights: Optional[Dict] = None,
+                 max_news_count: int = 10, wechat: Optional[Dict] = None, market_analysis: bool = True):
+        self.name = name
+        self.categories = categories          # 分类名 -> 关键词列表
+        self.source_weights = source_weights or {}
+        self.max_news_count = max_news_count
+        self.wechat = wechat if wechat is not None else WECHAT_CONFIG
+        self.market_analysis = market_analysis
+
+    @property
+    def is_default(self) -> bool:
+        return self.name == DEFAULT_PROFILE
+
+    @classmethod
+    def from_config(cls, config: Dict) -> 'Profile':
+        return cls(
+            name=config['name'],
+            categories=config.get('keywords', {}),
+            source_weights=config.get('source_weights'),
+            max_news_count=config.get('max_news_count', SCHEDULE_CONFIG.get('max_news_count', 10)),
+            wechat=config.get('wechat'),
+            market_analysis=config.get('market_analysis', True),
+        )
+
+
+def default_profile() -> Profile:
+    """由 KEYWORDS / WECHAT_CONFIG / SCHEDULE_CONFIG 构成的默认方案"""
+    return Profile(
+        name=DEFAULT_PROFILE,
+        categories={
+            '美股': KEYWORDS['us_stock'],
+            'AI/具身智能': KEYWORDS['ai_robotics'],
+        },
+        max_news_count=SCHEDULE_CONFIG.get('max_news_count', 10),
+    )
+
+
+def load_profiles() -> List[Profile]:
+    """读取配置中的订阅方案，未配置时只有默认方案"""
+    if not PROFILES:
+        return [default_profile()]
+
+    profiles = [Profile.from_config(config) for config in PROFILES]
+    names = [profile.name for profile in profiles]
+    if len(set(names)) != len(names):
+        raise ValueError(f"订阅方案名称重复: {names}")
+    return profiles
+
+
+class ProfileMatcher:
+    """所有方案的关键词合并为一个匹配器，一次扫描得到每个方案命中的分类"""
+
+    def __init__(self, profiles: List[Profile]):
+        self.profiles = profiles
+
+        # 关键词（小写）-> [(方案名, 分类名), ...]
+        self._targets: Dict[str, List[tuple]] = {}
+        for profile in profiles:
+            for category, keywords in profile.categories.items():
+                for keyword in keywords:
+                    targets = self._targets.setdefault(keyword.strip().lower(), [])
+                    if (profile.name, category) not in targets:
+                        targets.append((profile.name, category))
+
+        self._matcher = KeywordMatcher(self._targets.keys())
+
+    def match(self, text: str) -> Dict[str, List[str]]:
+        """返回 方案名 -> 命中的分类列表（按方案配置中的分类顺序）"""
+        hits: Dict[str, set] = {}
+        for keyword in self._matcher.find(text):
+            for profile_name, category in self._targets[keyword]:
+                hits.setdefault(profile_name, set()).add(category)
+
+        result = {}
+        for profile in self.profiles:
+            if profile.name in hits:
+                result[profile.name] = [c for c in profile.categories if c in hits[profile.name]]
+        return result
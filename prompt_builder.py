@@ -0,0 +1,99 @@
+"""
+提示词构建模块
+
+- 清理RSS摘要中的HTML标签、跟踪像素、链接和"阅读全文"之类的样板文字
+- 用本地估算的token数把新闻内容截断到预算内（不依赖具体模型的分词器）
+- 消息按"固定的系统提示和写作要求在前、每次不同的新闻内容在后"排列，
+  服务商的提示词前缀缓存可以命中固定部分
+"""
+
+import html
+import math
+import re
+from typing import Dict, List
+
+from config import AI_CONFIG
+
+_SCRIPT_STYLE = re.compile(r'<(script|style)\b.*?</\1\s*>', re.S | re.I)
+_BLOCK_END = re.compile(r'<br\s*/?>|</(p|div|li|h[1-6])\s*>', re.I)
+_TAG = re.compile(r'<[^>]*>')
+_URL = re.compile(r'https?://\S+')
+_SPACES = re.compile(r'[ \t\r\f\v 　]+')
+# 整行都是样板文字时删除该行
+_BOILERPLATE = re.compile(
+    r'^(the post .* appeared first on .*|(continue|keep) reading.*|read (the )?(full|more).*|click here.*|'
+    r'(subscribe|sign up) (to|for) .*|all rights reserved.*|©.*|copyright .*|阅读原文.*|点击.*查看.*|'
+    r'\[(…|\.\.\.)\]|(…|\.\.\.))$',
+    re.I,
+)
+_CJK = re.compile(r'[⺀-鿿가-힯豈-﫿＀-￯]')
+_SENTENCE_END = '。！？.!?\n'
+
+# 非中日韩字符平均每个token的字符数（英文约4个字符一个token）
+CHARS_PER_TOKEN = 4
+
+
+def clean_text(text: str) -> str:
+    """去掉HTML标签、实体、链接和样板行，合并空白"""
+    if not text:
+        return ''
+    text = _SCRIPT_STYLE.sub(' ', text)
+    text = _BLOCK_END.sub('\n', text)
+    text = _TAG.sub(' ', text)
+    text = html.unescape(text)
+    text = _URL.sub('', text)
+
+    lines = []
+    for line in text.split('\n'):
+        line = _SPACES.sub(' ', line).strip()
+        if line and not _BOILERPLATE.match(line):
+            lines.append(line)
+    return '\n'.join(lines)
+
+
+def estimate_tokens(text: str) -> int:
+    """估算token数：中日韩字符按每字1个token，其余按每 CHARS_PER_TOKEN 个字符1个token"""
+    if not text:
+        return 0
+    cjk = len(_CJK.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / CHARS_PER_TOKEN)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """截断到约 max_tokens 个token，尽量在句子边界处截断"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    # 估算的token数随长度单调增加，二分查找最长的前缀
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if estimate_tokens(text[:mid]) <= max_tokens:
+            low = mid
+        else:
+            high = mid - 1
+    truncated = text[:low]
+
+    boundary = max(truncated.rfind(ch) for ch in _SENTENCE_END)
+    if boundary > len(truncated) * 0.7:
+        truncated = truncated[:boundary + 1]
+    return truncated.rstrip() + '…'
+
+
+def article_text(news: Dict, max_tokens: int = None) -> str:
+    """新闻的标题和清理、截断后的内容"""
+    max_tokens = max_tokens or AI_CONFIG.get('max_input_tokens', 1000)
+    title = clean_text(news.get('title', ''))
+    content = truncate_to_tokens(clean_text(news.get('summary', '')), max_tokens)
+    return f"标题: {title}\n内容: {content}"
+
+
+def build_messages(system: str, instructions: str, variable: str) -> List[Dict]:
+    """
+    固定部分（系统提示、写作要求）在前，本次的数据在最后
+    instructions 中不要放日期、数量等每次变化的内容，否则前缀缓存无法命中
+    """
+    return [
+        {"role": "system", "content": system},
+        {"role": "user", "content": f"{instructions.strip()}\n\n{variable.strip()}\n"},
+    ]
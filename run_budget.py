@@ -0,0 +1,115 @@
+"""
+运行时间预算模块
+
+一次运行有总截止时间，各阶段（市场分析、摘要生成等）有各自的时间预算。
+阶段超出预算时由调用方降级处理（如改用简单摘要、使用缓存的市场数据），
+降级记录写入运行报告。
+"""
+
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from config import RUN_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+def run_with_timeout(func: Callable, timeout: float, name: str = 'stage') -> Tuple[bool, object]:
+    """
+    在后台线程中执行func，最多等待timeout秒
+    返回 (是否按时完成, 结果)；超时的线程是守护线程，不会阻塞进程退出
+    """
+    result = {}
+
+    def target():
+        try:
+            result['value'] = func()
+        except Exception as e:
+            result['error'] = e
+
+    thread = threading.Thread(target=target, name=f'budget-{name}', daemon=True)
+    thread.start()
+    thread.join(max(timeout, 0))
+
+    if thread.is_alive():
+        return False, None
+    if 'error' in result:
+        raise result['error']
+    return True, result.get('value')
+
+
+class RunBudget:
+    """一次运行的总截止时间和分阶段预算"""
+
+    def __init__(self, deadline_seconds: Optional[float] = None, stage_budgets: Optional[Dict[str, float]] = None):
+        self.started_at = datetime.now()
+        self._start = time.monotonic()
+        self.deadline = self._start + (deadline_seconds or RUN_CONFIG.get('deadline_seconds', 900))
+        self.stage_budgets = stage_budgets if stage_budgets is not None else RUN_CONFIG.get('stage_budgets', {})
+
+        self._stage_deadlines: Dict[str, float] = {}
+        self.stage_timings: Dict[str, float] = {}
+        self.degradations: List[Dict] = []
+
+    def remaining(self) -> float:
+        """距总截止时间的剩余秒数"""
+        return self.deadline - time.monotonic()
+
+    def stage_deadline(self, stage: str) -> float:
+        """
+        阶段截止时间（time.monotonic 时钟）
+        第一次调用时开始计时，同一阶段分多次执行时共用一个截止时间；不会晚于总截止时间
+        """
+        if stage not in self._stage_deadlines:
+            budget = self.stage_budgets.get(stage)
+            deadline = self.deadline if budget is None else min(time.monotonic() + budget, self.deadline)
+            self._stage_deadlines[stage] = deadline
+        return self._stage_deadlines[stage]
+
+    def stage_remaining(self, stage: str) -> float:
+        return self.stage_deadline(stage) - time.monotonic()
+
+    def degrade(self, stage: str, action: str, reason: str):
+        """记录一次降级"""
+        self.degradations.append({
+            'stage': stage,
+            'action': action,
+            'reason': reason,
+            'elapsed': round(time.monotonic() - self._start, 1),
+        })
+        logger.warning(f"⏱️ 阶段 {stage} 降级: {action}（{reason}）")
+
+    @contextmanager
+    def stage(self, name: str):
+        """记录阶段耗时"""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.stage_timings[name] = round(self.stage_timings.get(name, 0) + time.monotonic() - start, 2)
+
+    def report(self) -> Dict:
+        return {
+            'started_at': self.started_at.isoformat(),
+            'elapsed': round(time.monotonic() - self._start, 1),
+            'deadline_exceeded': self.remaining() < 0,
+            'stage_timings': self.stage_timings,
+            'degradations': self.degradations,
+        }
+
+    def save_report(self, report_file: str, extra: Optional[Dict] = None):
+        """写出运行报告"""
+        report = self.report()
+        if extra:
+            report.update(extra)
+        try:
+            with open(report_file, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+            logger.info(f"运行报告已保存: {report_file}")
+        except Exception as e:
+            logger.error(f"保存运行报告失败: {e}")
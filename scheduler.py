@@ -0,0 +1,187 @@
+"""
+事件驱动的任务调度模块
+
+- 按下次运行时间维护一个最小堆，主线程一直等待到最早到期的任务，没有轮询抖动
+- 任务在线程池中运行，长任务不会阻塞其它任务；同一任务不会重叠运行
+- 每个任务的上次运行时间保存在状态文件中，重启后按错过策略补跑（catchup）或跳过（skip）
+- 每日任务按配置的时区计算运行时间
+"""
+
+import heapq
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+from zoneinfo import ZoneInfo
+
+from config import SCHEDULE_CONFIG, SCHEDULER_STATE_FILE
+
+logger = logging.getLogger(__name__)
+
+CATCHUP = 'catchup'  # 错过的运行在启动后立即补跑一次（多次错过只补一次）
+SKIP = 'skip'        # 错过的运行直接跳过，等下一个周期
+
+# 最长等待时间：系统时间被调整或机器休眠后也能及时重新计算
+MAX_WAIT = 300
+
+
+class Job:
+    """一个定时任务：每天固定时间（at）或固定间隔（every 秒）运行"""
+
+    def __init__(self, name: str, func: Callable, at: Optional[str] = None, every: Optional[float] = None,
+                 misfire: str = SKIP, timezone: Optional[str] = None):
+        if (at is None) == (every is None):
+            raise ValueError(f"任务 {name} 需要且只能设置 at 或 every 之一")
+        if misfire not in (CATCHUP, SKIP):
+            raise ValueError(f"任务 {name} 的错过策略无效: {misfire}")
+
+        self.name = name
+        self.func = func
+        self.every = every
+        self.misfire = misfire
+        self.tz = ZoneInfo(timezone or SCHEDULE_CONFIG.get('timezone', 'Asia/Shanghai'))
+        self.at = None
+        if at is not None:
+            hour, minute = at.split(':')
+            self.at = (int(hour), int(minute))
+
+    def next_run_after(self, timestamp: float) -> float:
+        """timestamp 之后的下一次运行时间"""
+        if self.every is not None:
+            return timestamp + self.every
+
+        now = datetime.fromtimestamp(timestamp, self.tz)
+        hour, minute = self.at
+        run_date = now.date()
+        # 按日期和时区组合，夏令时切换日也能得到正确的时刻
+        candidate = datetime(run_date.year, run_date.month, run_date.day, hour, minute, tzinfo=self.tz)
+        if candidate.timestamp() <= timestamp:
+            run_date += timedelta(days=1)
+            candidate = datetime(run_date.year, run_date.month, run_date.day, hour, minute, tzinfo=self.tz)
+        return candidate.timestamp()
+
+    def describe(self) -> str:
+        if self.every is not None:
+            return f"每 {self.every:g} 秒"
+        return f"每天 {self.at[0]:02d}:{self.at[1]:02d} ({self.tz.key})"
+
+
+class Scheduler:
+    """事件驱动调度器"""
+
+    def __init__(self, state_file: str = SCHEDULER_STATE_FILE, max_workers: Optional[int] = None):
+        self.state_file = state_file
+        self.jobs: Dict[str, Job] = {}
+        self.state = self._load_state()
+
+        self._heap = []  # (下次运行时间, 序号, 任务名)
+        self._seq = 0
+        self._running = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or SCHEDULE_CONFIG.get('max_workers', 4), thread_name_prefix='job')
+
+    def _load_state(self) -> Dict:
+        try:
+            with open(self.state_file, encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取调度状态失败: {e}")
+            return {}
+
+    def _save_state(self):
+        tmp_path = self.state_file + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.state_file)
+
+    def _push(self, run_at: float, name: str):
+        self._seq += 1
+        heapq.heappush(self._heap, (run_at, self._seq, name))
+
+    def add_job(self, job: Job):
+        """添加任务，按上次运行时间和错过策略计算首次运行时间"""
+        now = time.time()
+        last_run = self.state.get(job.name, {}).get('last_run')
+        run_at = job.next_run_after(last_run if last_run is not None else now)
+
+        if run_at <= now:
+            if job.misfire == CATCHUP:
+                logger.info(f"任务 {job.name} 错过了 {datetime.fromtimestamp(run_at):%Y-%m-%d %H:%M} 的运行，立即补跑")
+                run_at = now
+            else:
+                logger.info(f"任务 {job.name} 错过了 {datetime.fromtimestamp(run_at):%Y-%m-%d %H:%M} 的运行，跳过")
+                run_at = job.next_run_after(now)
+
+        with self._lock:
+            self.jobs[job.name] = job
+            self._push(run_at, job.name)
+        self._wake.set()
+        logger.info(f"已添加任务 {job.name}: {job.describe()}，"
+                    f"下次运行 {datetime.fromtimestamp(run_at):%Y-%m-%d %H:%M:%S}")
+
+    def _run_job(self, job: Job, scheduled_at: float):
+        # 高频的间隔任务只在调试日志中记录开始和结束
+        log = logger.info if job.at else logger.debug
+        start = time.time()
+        status = 'ok'
+        try:
+            log(f"▶️ 任务 {job.name} 开始运行")
+            job.func()
+        except Exception as e:
+            status = f'error: {e}'
+            logger.error(f"任务 {job.name} 运行失败: {e}", exc_info=True)
+        finally:
+            duration = time.time() - start
+            with self._lock:
+                self._running.discard(job.name)
+                self.state[job.name] = {
+                    'last_run': scheduled_at,
+                    'finished_at': time.time(),
+                    'duration': round(duration, 1),
+                    'status': status,
+                }
+                try:
+                    self._save_state()
+                except OSError as e:
+                    logger.warning(f"保存调度状态失败: {e}")
+            log(f"⏹️ 任务 {job.name} 结束，耗时 {duration:.1f} 秒")
+
+    def _dispatch_due(self, now: float):
+        """提交所有到期的任务，并排入各自的下一次运行"""
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                run_at, _, name = heapq.heappop(self._heap)
+                job = self.jobs[name]
+                self._push(job.next_run_after(now), name)
+
+                if name in self._running:
+                    logger.warning(f"任务 {name} 上一次运行尚未结束，跳过本次")
+                    continue
+                self._running.add(name)
+                self._executor.submit(self._run_job, job, run_at)
+
+    def run_forever(self):
+        """主循环：等待到最早到期的任务，直到 stop()"""
+        logger.info(f"调度器已启动，共 {len(self.jobs)} 个任务")
+        while not self._stop.is_set():
+            now = time.time()
+            self._dispatch_due(now)
+            with self._lock:
+                next_run = self._heap[0][0] if self._heap else None
+            timeout = MAX_WAIT if next_run is None else min(max(next_run - time.time(), 0), MAX_WAIT)
+            self._wake.wait(timeout)
+            self._wake.clear()
+
+    def stop(self, wait: bool = True):
+        self._stop.set()
+        self._wake.set()
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,106 @@
+"""
+分片采集模块
+
+多台机器分别采集一部分RSS源：
+- 按URL的稳定哈希把源分配到分片（与进程、机器、Python版本无关）
+- 每个分片把规范化、去重后的新闻按去重键排序写入JSONL文件
+- 合并时对各分片文件做多路归并，边读边去重，不会把全部分片读进内存
+"""
+
+import glob
+import hashlib
+import heapq
+import json
+import logging
+import os
+from typing import Dict, Iterable, Iterator, List, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+logger = logging.getLogger(__name__)
+
+
+def parse_shard_spec(spec: str) -> Tuple[int, int]:
+    """解析 'i/N' 格式的分片参数，i从0开始"""
+    try:
+        index, count = (int(part) for part in spec.split('/'))
+    except ValueError:
+        raise ValueError(f"分片参数格式应为 i/N，例如 0/4: {spec}")
+    if count <= 0 or not 0 <= index < count:
+        raise ValueError(f"分片编号超出范围: {spec}")
+    return index, count
+
+
+def shard_for(key: str, shard_count: int) -> int:
+    """稳定哈希分片（不使用内置hash，避免随机化）"""
+    digest = hashlib.sha1(key.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % shard_count
+
+
+def in_shard(key: str, shard: Tuple[int, int]) -> bool:
+    index, count = shard
+    return shard_for(key, count) == index
+
+
+def dedup_key(news: Dict) -> str:
+    """新闻去重键：规范化后的链接（协议/主机小写，去掉片段和末尾斜杠）"""
+    link = (news.get('link') or '').strip()
+    if not link:
+        return ''
+    parts = urlsplit(link)
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, parts.query, ''))
+
+
+def shard_file_path(shard_dir: str, run_date: str, shard: Tuple[int, int]) -> str:
+    index, count = shard
+    return os.path.join(shard_dir, f"news_{run_date}_{index}of{count}.jsonl")
+
+
+def write_shard(news_list: Iterable[Dict], output_file: str) -> int:
+    """按去重键排序后写出分片文件，返回写入条数"""
+    items = {}
+    for news in news_list:
+        key = dedup_key(news)
+        if key and key not in items:
+            items[key] = news
+
+    os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
+    tmp_file = output_file + '.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        for key in sorted(items):
+            record = {'key': key, 'news': items[key]}
+            f.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+    # 原子替换，避免合并时读到写了一半的文件
+    os.replace(tmp_file, output_file)
+
+    logger.info(f"分片已写入 {output_file}，共 {len(items)} 条")
+    return len(items)
+
+
+def _read_shard(path: str) -> Iterator[Tuple[str, Dict]]:
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                yield record['key'], record['news']
+
+
+def find_shard_files(pattern: str) -> List[str]:
+    """按通配符或目录查找分片文件，结果排序以保证合并顺序确定"""
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, '*.jsonl')
+    return sorted(glob.glob(pattern))
+
+
+def merge_shards(paths: List[str]) -> Iterator[Dict]:
+    """
+    流式合并多个分片文件
+    每个文件已按去重键排序，多路归并后相同键相邻，保留第一个出现的
+    """
+    streams = [_read_shard(path) for path in sorted(paths)]
+    last_key = None
+    for key, news in heapq.merge(*streams, key=lambda record: record[0]):
+        if key == last_key:
+            continue
+        last_key = key
+        yield news
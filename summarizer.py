@@ -2,56 +2,115 @@
 AI摘要生成模块（可选）
 """
 
+import json
 import logging
-from typing import Dict, List
+import re
+import time
+from typing import Dict, List, Optional
 from config import AI_CONFIG
+from llm_client import get_llm_client, record_usage, stream_completion
+from prompt_builder import article_text, build_messages, clean_text, estimate_tokens
 
 logger = logging.getLogger(__name__)
 
+SYSTEM_PROMPT = "你是一个专业的财经和科技分析师，擅长用清晰易懂的语言解读新闻，并提供有价值的洞察和建议。你的分析客观理性，既不过度乐观也不过度悲观。重要：你会完整表达观点，确保每个部分都有完整的结论，不会突然截断。"
+
+# 每条摘要的输出token上限 = max_summary_length × 该系数（目标字数允许适当超出，中文约1字1个token）
+TOKENS_PER_SUMMARY_CHAR = 2
+# 批量输出中每条摘要额外的token：JSON键、引号和换行转义
+BATCH_ITEM_OVERHEAD_TOKENS = 60
+# 批量请求的输出token上限（多数模型单次输出不超过4096），装不下 batch_size 条时减少每批条数
+MAX_BATCH_TOKENS = 4096
+# 批量结果中短于此长度的摘要视为无效，改为单条请求
+MIN_SUMMARY_CHARS = 30
+
+SINGLE_OUTPUT = """请按上述结构输出，使用简洁的小标题（如💡核心、📊影响、💭建议）分隔。
+如果内容较复杂，可适当增加长度以确保完整性，但尽量控制在500字以内。
+"""
+
+BATCH_OUTPUT = """下面有多条新闻，每条以 [编号] 开头，请分别总结，每条摘要都按上述结构输出，
+使用简洁的小标题（如💡核心、📊影响、💭建议）分隔。
+只输出一个JSON对象，键为新闻编号（字符串），值为该条新闻的摘要（Markdown文本），例如:
+{"1": "💡核心 ...", "2": "💡核心 ..."}
+"""
+
 
 class NewsSummarizer:
     """新闻摘要生成器"""
 
     def __init__(self):
-        self.enabled = AI_CONFIG.get('enabled', False)
+        self.fallback_count = 0  # 上次批量摘要中因超时改用简单摘要的条数
 
-        if self.enabled:
-            try:
-                import openai
-                api_key = AI_CONFIG.get('api_key')
-                base_url = AI_CONFIG.get('base_url')
-
-                if base_url:
-                    # 使用自定义base_url（智谱AI、Deepseek等）
-                    self.client = openai.OpenAI(api_key=api_key, base_url=base_url)
-                else:
-                    # 使用OpenAI官方
-                    self.client = openai.OpenAI(api_key=api_key)
-
-                logger.info("AI摘要功能已启用")
-            except ImportError:
-                logger.warning("未安装openai库，AI摘要功能将禁用")
-                self.enabled = False
-            except Exception as e:
-                logger.error(f"初始化AI客户端失败: {e}")
-                self.enabled = False
-
-    def summarize_news(self, news: Dict) -> str:
-        """为单条新闻生成摘要"""
+    @property
+    def client(self):
+        """共享的AI客户端（首次使用时创建）"""
+        return get_llm_client()
+
+    @property
+    def enabled(self) -> bool:
+        """AI_CONFIG 启用且客户端创建成功"""
+        return self.client is not None
+
+    def summarize_news(self, news: Dict, timeout: Optional[float] = None) -> str:
+        """
+        为单条新闻生成摘要
+        timeout: 本次AI请求的超时时间（秒），默认使用客户端的超时设置
+        """
         if not self.enabled:
             # 如果未启用AI，返回原始摘要或截断标题
-            summary = news.get('summary', news.get('title', ''))
-            max_len = AI_CONFIG.get('max_summary_length', 200)
-            if len(summary) > max_len:
-                return summary[:max_len] + '...'
-            return summary
+            return self._raw_summary(news)
 
         try:
             title = news.get('title', '')
-            content = news.get('summary', '')
+            # 写作要求在前、新闻内容在后，多次请求共享相同的前缀
+            messages = build_messages(SYSTEM_PROMPT, self._instructions() + '\n' + SINGLE_OUTPUT,
+                                      article_text(news))
+
+            request_kwargs = {'timeout': timeout} if timeout else {}
+            request_kwargs.update(
+                model=AI_CONFIG.get('model', 'gpt-3.5-turbo'),
+                messages=messages,
+                max_tokens=self._summary_tokens(),  # 按目标字数留足空间，确保完整
+                temperature=0.6
+            )
+            if AI_CONFIG.get('stream', False):
+                # 达到目标字数后在段落/句子边界停止，不等模型写完
+                summary = stream_completion(self.client, 'summary', AI_CONFIG.get('max_summary_length', 400),
+                                            self._estimate(messages), **request_kwargs)
+            else:
+                response = self.client.chat.completions.create(**request_kwargs)
+                record_usage('summary', response, self._estimate(messages))
+                summary = response.choices[0].message.content.strip()
+            logger.info(f"为新闻生成了AI摘要: {title[:30]}...")
+            return summary
+
+        except Exception as e:
+            logger.error(f"生成AI摘要失败: {e}")
+            # 降级到简单摘要
+            return self._raw_summary(news)
+
+    @staticmethod
+    def _summary_tokens() -> int:
+        return AI_CONFIG.get('max_summary_length', 400) * TOKENS_PER_SUMMARY_CHAR
 
-            prompt = f"""
-请用清晰专业的中文总结以下新闻，要求：
+    def _batch_size(self) -> int:
+        """每批条数：batch_size，且所有摘要的输出token不超过 MAX_BATCH_TOKENS"""
+        per_item = self._summary_tokens() + BATCH_ITEM_OVERHEAD_TOKENS
+        return max(min(AI_CONFIG.get('batch_size', 1), MAX_BATCH_TOKENS // per_item), 1)
+
+    @staticmethod
+    def _raw_summary(news: Dict) -> str:
+        """原始摘要或标题，超长时截断"""
+        summary = clean_text(news.get('summary', '')) or news.get('title', '')
+        max_len = AI_CONFIG.get('max_summary_length', 200)
+        if len(summary) > max_len:
+            return summary[:max_len] + '...'
+        return summary
+
+    @staticmethod
+    def _instructions() -> str:
+        """单条和批量摘要共用的写作要求"""
+        return f"""请用清晰专业的中文总结以下新闻，要求：
 
 【内容要求】
 1. 目标字数约{AI_CONFIG.get('max_summary_length', 400)}字（可适当超出以保证完整性）
@@ -77,46 +136,130 @@ class NewsSummarizer:
 - 投资者角度：关注点、机会/风险
 - 从业者角度：需要关注的趋势、可能的行动方向
 - 保持客观，避免断言式判断
+"""
 
-标题: {title}
-内容: {content}
+    def summarize_batch(self, news_batch: List[Dict], timeout: Optional[float] = None) -> Dict[str, str]:
+        """
+        一次请求为多条新闻生成摘要，写作要求只发送一次
+        返回 编号 -> 摘要（编号为新闻在本批中的序号 "1", "2", ...），只包含通过校验的摘要
+        """
+        articles = '\n\n'.join(f"[{idx}]\n{article_text(news)}" for idx, news in enumerate(news_batch, 1))
+        messages = build_messages(SYSTEM_PROMPT, self._instructions() + '\n' + BATCH_OUTPUT, articles)
 
-请按上述结构输出，使用简洁的小标题（如💡核心、📊影响、💭建议）分隔。
-如果内容较复杂，可适当增加长度以确保完整性，但尽量控制在500字以内。
-"""
+        request_kwargs = {'timeout': timeout} if timeout else {}
+        if AI_CONFIG.get('json_mode', True):
+            # 服务商保证输出合法JSON（不支持的服务商在配置中关闭 json_mode）
+            request_kwargs['response_format'] = {'type': 'json_object'}
+        response = self.client.chat.completions.create(
+            **request_kwargs,
+            model=AI_CONFIG.get('model', 'gpt-3.5-turbo'),
+            messages=messages,
+            max_tokens=(self._summary_tokens() + BATCH_ITEM_OVERHEAD_TOKENS) * len(news_batch),
+            temperature=0.6
+        )
+        record_usage('summary_batch', response, self._estimate(messages))
+        return self._parse_batch(response.choices[0].message.content, len(news_batch))
 
-            response = self.client.chat.completions.create(
-                model=AI_CONFIG.get('model', 'gpt-3.5-turbo'),
-                messages=[
-                    {"role": "system", "content": "你是一个专业的财经和科技分析师，擅长用清晰易懂的语言解读新闻，并提供有价值的洞察和建议。你的分析客观理性，既不过度乐观也不过度悲观。重要：你会完整表达观点，确保每个部分都有完整的结论，不会突然截断。"},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=800,  # 增加token限制，确保有足够空间
-                temperature=0.6
-            )
+    @staticmethod
+    def _estimate(messages: List[Dict]) -> int:
+        return sum(estimate_tokens(message['content']) for message in messages)
 
-            summary = response.choices[0].message.content.strip()
-            logger.info(f"为新闻生成了AI摘要: {title[:30]}...")
-            return summary
+    @staticmethod
+    def _parse_batch(text: str, count: int) -> Dict[str, str]:
+        """
+        解析批量摘要的JSON输出，丢弃缺失、多余或过短的条目
+        允许字符串中直接出现换行（模型常这样输出Markdown）；
+        输出被截断或后面有多余内容时，保留其中完整的条目
+        """
+        text = (text or '').strip()
+        # 去掉 ```json 代码块标记及JSON前后的说明文字
+        start = text.find('{')
+        if start == -1:
+            return {}
+        match = re.search(r'\{.*\}', text, re.S)
+        try:
+            data = json.loads(match.group(0), strict=False) if match else None
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            data = NewsSummarizer._salvage_entries(text, start)
 
-        except Exception as e:
-            logger.error(f"生成AI摘要失败: {e}")
-            # 降级到简单摘要
-            summary = news.get('summary', news.get('title', ''))
-            max_len = AI_CONFIG.get('max_summary_length', 200)
-            if len(summary) > max_len:
-                return summary[:max_len] + '...'
-            return summary
+        summaries = {}
+        for idx in range(1, count + 1):
+            summary = data.get(str(idx))
+            if isinstance(summary, str) and len(summary.strip()) >= MIN_SUMMARY_CHARS:
+                summaries[str(idx)] = summary.strip()
+        return summaries
 
-    def batch_summarize(self, news_list: List[Dict]) -> List[Dict]:
-        """批量生成摘要"""
+    @staticmethod
+    def _salvage_entries(text: str, start: int) -> Dict:
+        """从 start 处的 '{' 开始逐个解析 "键": 值，遇到不完整或无效的内容时停止"""
+        decoder = json.JSONDecoder(strict=False)
+        entries = {}
+        pos = start + 1
+        while True:
+            pos = NewsSummarizer._skip(text, pos, ' \t\r\n,')
+            try:
+                key, pos = decoder.raw_decode(text, pos)
+                pos = NewsSummarizer._skip(text, pos, ' \t\r\n')
+                if not isinstance(key, str) or text[pos:pos + 1] != ':':
+                    break
+                pos = NewsSummarizer._skip(text, pos + 1, ' \t\r\n')
+                value, pos = decoder.raw_decode(text, pos)
+            except ValueError:
+                break
+            entries[key] = value
+        return entries
+
+    @staticmethod
+    def _skip(text: str, pos: int, chars: str) -> int:
+        while pos < len(text) and text[pos] in chars:
+            pos += 1
+        return pos
+
+    def batch_summarize(self, news_list: List[Dict], deadline: Optional[float] = None) -> List[Dict]:
+        """
+        批量生成摘要
+        AI_CONFIG['batch_size'] 大于1时每次请求总结多条新闻，批量结果中缺失或无效的条目再逐条请求
+        deadline: 截止时间（time.monotonic 时钟），到期后剩余新闻改用简单摘要，
+                  降级的条数记录在 self.fallback_count
+        """
         logger.info(f"开始为 {len(news_list)} 条新闻生成摘要...")
 
-        for news in news_list:
-            news['ai_summary'] = self.summarize_news(news)
+        self.fallback_count = 0
+        batch_size = self._batch_size() if self.enabled else 1
+        for start in range(0, len(news_list), batch_size):
+            batch = news_list[start:start + batch_size]
+
+            summaries = {}
+            remaining = self._remaining(deadline)
+            if len(batch) > 1 and (remaining is None or remaining > 1):
+                try:
+                    summaries = self.summarize_batch(batch, timeout=remaining)
+                    logger.info(f"批量生成了 {len(summaries)}/{len(batch)} 条AI摘要")
+                except Exception as e:
+                    logger.error(f"批量生成AI摘要失败: {e}")
 
+            for idx, news in enumerate(batch, 1):
+                if str(idx) in summaries:
+                    news['ai_summary'] = summaries[str(idx)]
+                    continue
+                remaining = self._remaining(deadline)
+                if remaining is not None and remaining <= 1:
+                    text = clean_text(news.get('summary', '')) or news.get('title', '')
+                    news['ai_summary'] = self.simple_summarize(text, AI_CONFIG.get('max_summary_length', 200))
+                    self.fallback_count += 1
+                    continue
+                news['ai_summary'] = self.summarize_news(news, timeout=remaining)
+
+        if self.fallback_count:
+            logger.warning(f"摘要时间预算用尽，{self.fallback_count} 条新闻使用简单摘要")
         return news_list
 
+    @staticmethod
+    def _remaining(deadline: Optional[float]) -> Optional[float]:
+        return deadline - time.monotonic() if deadline is not None else None
+
     def simple_summarize(self, text: str, max_length: int = 200) -> str:
         """简单截断摘要（不使用AI）"""
         if len(text) <= max_length:
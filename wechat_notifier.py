@@ -2,54 +2,94 @@
 微信推送模块
 """
 
-import requests
 import logging
-from typing import List, Dict
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, List, Dict, Optional
 from config import WECHAT_CONFIG
+from entity_linker import format_ticker
+from message_packer import pack_pages
+import http_client
 
 logger = logging.getLogger(__name__)
 
+# 未配置 targets 时，Server酱/企业微信备用链路整体视为一个目标
+DEFAULT_TARGET = 'default'
+
+# 各渠道单条消息的字节上限
+CHANNEL_MAX_BYTES = {
+    'serverchan': 32 * 1024,
+    'work_wechat': 4096,
+}
+# 企业微信分页页码 "**(12/34)**\n" 预留的字节数
+PAGE_MARKER_BYTES = 32
+
+
+def page_key(target: str, idx: int, total: int) -> str:
+    """
+    已送达分页的记录: "目标名#page3/5"
+    带上总页数：分页结果变化（如修改了字节上限）时旧记录不再匹配，整条消息重新推送
+    """
+    return f"{target}#page{idx + 1}/{total}"
+
+
+def has_pages(delivered: set, target: str) -> bool:
+    """该目标是否已有分页送达"""
+    prefix = f"{target}#page"
+    return any(key.startswith(prefix) for key in delivered)
+
 
 class WeChatNotifier:
     """微信推送通知器"""
 
-    def __init__(self):
-        self.serverchan_enabled = WECHAT_CONFIG.get('serverchan', {}).get('enabled', False)
-        self.work_wechat_enabled = WECHAT_CONFIG.get('work_wechat', {}).get('enabled', False)
+    def __init__(self, config: Optional[Dict] = None):
+        """config: 推送配置，结构同 WECHAT_CONFIG，默认使用 WECHAT_CONFIG"""
+        self.config = config if config is not None else WECHAT_CONFIG
+        self.serverchan_enabled = self.config.get('serverchan', {}).get('enabled', False)
+        self.work_wechat_enabled = self.config.get('work_wechat', {}).get('enabled', False)
 
-    def send_via_serverchan(self, title: str, content: str) -> bool:
+    def send_via_serverchan(self, title: str, content: str, sendkey: Optional[str] = None,
+                            timeout: Optional[float] = None, retries: int = 0,
+                            delivered: Optional[set] = None, target: str = DEFAULT_TARGET) -> bool:
         """
         通过Server酱推送消息
         注册地址: https://sct.ftqq.com/
+        sendkey: 指定推送目标的SendKey，默认使用配置中的 serverchan.sendkey
+        内容超过单条上限时按新闻条目分页，分多条按顺序推送
+        delivered / target: 见 _send_pages
         """
-        if not self.serverchan_enabled:
-            logger.info("Server酱未启用")
-            return False
+        if sendkey is None:
+            if not self.serverchan_enabled:
+                logger.info("Server酱未启用")
+                return False
+            sendkey = self.config['serverchan'].get('sendkey', '')
 
-        sendkey = WECHAT_CONFIG['serverchan'].get('sendkey', '')
         if not sendkey or sendkey == 'YOUR_SERVERCHAN_KEY':
             logger.error("未配置Server酱SendKey")
             return False
 
-        try:
-            url = f"https://sctapi.ftqq.com/{sendkey}.send"
+        url = f"https://sctapi.ftqq.com/{sendkey}.send"
+
+        # Server酱限制：标题最长256字符，内容最长64KB
+        # 但微信卡片预览约4KB，过长会被截断
+        # 我们限制单条在32KB以内，确保良好体验
+        pages = pack_pages(content, self._max_bytes('serverchan'))
+        total = len(pages)
 
-            # Server酱限制：标题最长256字符，内容最长64KB
-            # 但微信卡片预览约4KB，过长会被截断
-            # 我们限制总长度在32KB以内，确保良好体验
-            MAX_CONTENT_LENGTH = 32 * 1024  # 32KB
+        def send_page(idx: int, page: str) -> bool:
+            page_title = title if total == 1 else f"{title} ({idx + 1}/{total})"
+            return self._post_serverchan(url, page_title, page, timeout)
 
-            if len(content.encode('utf-8')) > MAX_CONTENT_LENGTH:
-                logger.warning(f"内容过长({len(content)} 字符)，将会被截断")
-                # 截断时保留完整的新闻条目，不在句子中间截断
-                content = self._smart_truncate_markdown(content, MAX_CONTENT_LENGTH)
+        return self._send_pages(pages, send_page, retries, delivered, target)
 
+    def _post_serverchan(self, url: str, title: str, content: str, timeout: Optional[float]) -> bool:
+        try:
             data = {
                 'title': title[:256],  # 标题限制256字符
                 'desp': content
             }
 
-            response = requests.post(url, data=data, timeout=10)
+            response = http_client.post(url, data=data, **self._timeout_kwargs(timeout))
             result = response.json()
 
             if result.get('code') == 0:
@@ -63,40 +103,37 @@ class WeChatNotifier:
             logger.error(f"Server酱推送异常: {e}")
             return False
 
-    def _smart_truncate_markdown(self, content: str, max_bytes: int) -> str:
-        """
-        智能截断Markdown内容，保持完整性
-        在新闻条目边界截断，而不是句子中间
-        """
-        lines = content.split('\n')
-        truncated_lines = []
-        current_size = 0
-
-        for line in lines:
-            line_size = len(line.encode('utf-8')) + 1  # +1 for newline
-            if current_size + line_size > max_bytes:
-                # 添加截断提示
-                truncated_lines.append('\n...\n')
-                truncated_lines.append('📌 内容过长，部分新闻未显示。请查看HTML文件获取完整内容。')
-                break
-            truncated_lines.append(line)
-            current_size += line_size
-
-        return '\n'.join(truncated_lines)
-
-    def send_via_work_wechat(self, content: str) -> bool:
+    def send_via_work_wechat(self, content: str, webhook_url: Optional[str] = None,
+                             timeout: Optional[float] = None, retries: int = 0,
+                             delivered: Optional[set] = None, target: str = DEFAULT_TARGET) -> bool:
         """
         通过企业微信机器人推送
+        webhook_url: 指定推送目标的Webhook，默认使用配置中的 work_wechat.webhook_url
+        企业微信markdown消息上限4096字节，超出时按新闻条目分页推送
+        delivered / target: 见 _send_pages
         """
-        if not self.work_wechat_enabled:
-            logger.info("企业微信未启用")
-            return False
+        if webhook_url is None:
+            if not self.work_wechat_enabled:
+                logger.info("企业微信未启用")
+                return False
+            webhook_url = self.config['work_wechat'].get('webhook_url', '')
 
-        webhook_url = WECHAT_CONFIG['work_wechat'].get('webhook_url', '')
         if not webhook_url or webhook_url == 'YOUR_WEBHOOK_URL':
             logger.error("未配置企业微信Webhook URL")
             return False
 
+        # 企业微信没有标题字段，页码写在正文开头，预留其字节数
+        pages = pack_pages(content, self._max_bytes('work_wechat') - PAGE_MARKER_BYTES)
+        total = len(pages)
+
+        def send_page(idx: int, page: str) -> bool:
+            if total > 1:
+                page = f"**({idx + 1}/{total})**\n" + page
+            return self._post_work_wechat(webhook_url, page, timeout)
+
+        return self._send_pages(pages, send_page, retries, delivered, target)
+
+    def _post_work_wechat(self, webhook_url: str, content: str, timeout: Optional[float]) -> bool:
         try:
             data = {
                 "msgtype": "markdown",
@@ -105,7 +142,7 @@ class WeChatNotifier:
                 }
             }
 
-            response = requests.post(webhook_url, json=data, timeout=10)
+            response = http_client.post(webhook_url, json=data, **self._timeout_kwargs(timeout))
             result = response.json()
 
             if result.get('errcode') == 0:
@@ -119,17 +156,171 @@ class WeChatNotifier:
             logger.error(f"企业微信推送异常: {e}")
             return False
 
-    def format_news_markdown(self, news_list: List[Dict]) -> str:
+    def _max_bytes(self, channel: str) -> int:
+        limits = self.config.get('delivery', {}).get('max_bytes', {})
+        return limits.get(channel, CHANNEL_MAX_BYTES[channel])
+
+    def _with_retries(self, send: Callable[[], bool], retries: int) -> bool:
+        """失败后按指数退避重试"""
+        backoff = self.config.get('delivery', {}).get('retry_backoff', 1.0)
+        for attempt in range(retries + 1):
+            if send():
+                return True
+            if attempt < retries:
+                time.sleep(backoff * (2 ** attempt))
+        return False
+
+    def _send_pages(self, pages: List[str], send_page: Callable[[int, str], bool], retries: int,
+                    delivered: Optional[set] = None, target: str = DEFAULT_TARGET) -> bool:
+        """
+        按顺序推送分页，每页独立重试
+        同时在途的分页不超过 page_window 个：第 i 页完成后才开始第 i+window 页
+        某一页重试后仍失败时不再发送后面的分页（已在途的最多 page_window-1 页除外），
+        避免用户收到中间缺页的消息；下次重试从第一个未送达的分页继续
+        delivered: 已送达的分页记录（page_key），跳过其中的分页，本次送达的分页也加入该集合；
+        由发件箱持久化后，之后的重试只补发未送达的分页
+        """
+        if len(pages) == 1:
+            return self._with_retries(lambda: send_page(0, pages[0]), retries)
+
+        delivered = delivered if delivered is not None else set()
+        total = len(pages)
+        todo = [idx for idx in range(total) if page_key(target, idx, total) not in delivered]
+        if len(todo) < total:
+            logger.info(f"{target}: 已送达 {total - len(todo)}/{total} 页，补发其余分页")
+        else:
+            logger.info(f"内容较长，分 {total} 条消息推送")
+
+        def send(idx: int) -> bool:
+            ok = self._with_retries(lambda: send_page(idx, pages[idx]), retries)
+            if ok:
+                delivered.add(page_key(target, idx, total))
+            return ok
+
+        window = max(1, self.config.get('delivery', {}).get('page_window', 2))
+        futures = []
+
+        with ThreadPoolExecutor(max_workers=window) as pool:
+            for n, idx in enumerate(todo):
+                if n >= window and not futures[n - window].result():
+                    logger.warning(f"{target}: 第 {todo[n - window] + 1}/{total} 页推送失败，停止发送后续分页")
+                    break
+                if any(future.done() and not future.result() for future in futures):
+                    logger.warning(f"{target}: 有分页推送失败，停止发送后续分页")
+                    break
+                futures.append(pool.submit(send, idx))
+            results = [future.result() for future in futures]
+
+        return len(futures) == len(todo) and all(results)
+
+    @staticmethod
+    def _timeout_kwargs(timeout: Optional[float]) -> Dict:
+        """未指定超时时使用 http_client 的统一超时"""
+        return {'timeout': timeout} if timeout else {}
+
+    def get_targets(self) -> List[Dict]:
+        """
+        配置中启用的推送目标列表（targets），每个目标都带有稳定且唯一的 name
+        推送结果、发件箱的送达记录和分页记录都按 name 区分目标，重名时在后面加上配置中的序号
+        """
+        targets = []
+        seen = set()
+        for idx, target in enumerate(self.config.get('targets', [])):
+            if not target.get('enabled', True):
+                continue
+            name = self._target_name(target, idx)
+            if name in seen:
+                unique = f"{name}#{idx}"
+                while unique in seen:
+                    unique += f"#{idx}"
+                logger.warning(f"推送目标重名: {name}，第 {idx + 1} 个目标改用 {unique}")
+                name = unique
+            seen.add(name)
+            targets.append(dict(target, name=name))
+        return targets
+
+    @staticmethod
+    def _target_name(target: Dict, idx: int) -> str:
+        return target.get('name') or f"{target.get('type', 'serverchan')}#{idx}"
+
+    def send_to_target(self, target: Dict, title: str, content: str,
+                       delivered: Optional[set] = None) -> bool:
+        """
+        推送到单个目标，按目标配置（或 delivery 默认值）重试和超时
+        delivered: 已送达的分页记录，见 _send_pages
+        """
+        delivery = self.config.get('delivery', {})
+        retries = target.get('retries', delivery.get('retries', 2))
+        timeout = target.get('timeout', delivery.get('timeout', 10))
+        name = target.get('name') or target.get('type', 'serverchan')
+
+        target_type = target.get('type', 'serverchan')
+        if target_type == 'serverchan':
+            return self.send_via_serverchan(title, content, sendkey=target.get('sendkey', ''),
+                                            timeout=timeout, retries=retries,
+                                            delivered=delivered, target=name)
+        elif target_type == 'work_wechat':
+            return self.send_via_work_wechat(content, webhook_url=target.get('webhook_url', ''),
+                                             timeout=timeout, retries=retries,
+                                             delivered=delivered, target=name)
+
+        logger.error(f"未知的推送类型: {target_type}")
+        return False
+
+    def send_to_targets(self, title: str, content: str, targets: Optional[List[Dict]] = None,
+                        delivered: Optional[set] = None) -> Dict[str, bool]:
+        """
+        并发推送到多个目标
+        使用有界线程池，每个目标独立重试和超时，返回 目标名 -> 是否成功
+        delivered: 已送达的分页记录，见 _send_pages
+        """
+        if targets is None:
+            targets = self.get_targets()
+        if not targets:
+            return {}
+
+        max_workers = min(self.config.get('delivery', {}).get('max_workers', 16), len(targets))
+        results = {}
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            named = [dict(target, name=target.get('name') or self._target_name(target, idx))
+                     for idx, target in enumerate(targets)]
+            futures = {
+                pool.submit(self.send_to_target, target, title, content, delivered): target['name']
+                for target in named
+            }
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    logger.error(f"推送到 {name} 异常: {e}")
+                    results[name] = False
+
+        failed = [name for name, ok in results.items() if not ok]
+        logger.info(f"多目标推送完成: 成功 {len(results) - len(failed)}/{len(results)}")
+        if failed:
+            logger.warning(f"推送失败的目标: {', '.join(failed)}")
+        return results
+
+    def format_news_markdown(self, news_list: List[Dict], start_index: int = 1,
+                             total: Optional[int] = None) -> str:
         """
         格式化新闻列表为Markdown
+        渐进推送时 start_index / total 表示本条消息在全部精选中的位置
         """
         from datetime import datetime
 
+        total = total or len(news_list)
         markdown = f"# 📰 每日新闻精选 ({datetime.now().strftime('%Y-%m-%d')})\n\n"
-        markdown += f"今日为您精选了 **{len(news_list)}** 条高质量新闻\n\n"
+        if start_index == 1:
+            markdown += f"今日为您精选了 **{total}** 条高质量新闻\n\n"
+        else:
+            end_index = start_index + len(news_list) - 1
+            markdown += f"今日精选（续）：第 **{start_index}-{end_index}** 条，共 {total} 条\n\n"
         markdown += "---\n\n"
 
-        for idx, news in enumerate(news_list, 1):
+        for idx, news in enumerate(news_list, start_index):
             title = news.get('title', '无标题')
             link = news.get('link', '')
             categories = ' | '.join(news.get('categories', []))
@@ -143,7 +334,11 @@ class WeChatNotifier:
 
             markdown += f"## {idx}. {title}\n\n"
             markdown += f"**分类**: {categories}  \n"
-            markdown += f"**来源**: {source} | **评分**: {score:.1f}  \n\n"
+            markdown += f"**来源**: {source} | **评分**: {score:.1f}  \n"
+            tickers = news.get('tickers')
+            if tickers:
+                markdown += f"**相关股票**: {' | '.join(format_ticker(t) for t in tickers)}  \n"
+            markdown += "\n"
 
             if summary:
                 markdown += f"{summary}\n\n"
@@ -155,33 +350,74 @@ class WeChatNotifier:
 
         return markdown
 
-    def send_news_notification(self, news_list: List[Dict]) -> bool:
-        """发送新闻通知"""
-        if not news_list:
-            logger.warning("没有新闻需要推送")
-            return False
-
+    def build_notification(self, news_list: List[Dict], part: Optional[str] = None,
+                           start_index: int = 1, total: Optional[int] = None) -> tuple:
+        """
+        生成推送的 (标题, Markdown内容)
+        part: 渐进推送时的分段，'first' 为首批速递，'rest' 为后续内容
+        """
         from datetime import datetime
         title = f"📰 每日新闻精选 {datetime.now().strftime('%Y-%m-%d')}"
-        content = self.format_news_markdown(news_list)
+        if part == 'first':
+            title += " · 速递"
+        elif part == 'rest':
+            title += " · 续"
+        return title, self.format_news_markdown(news_list, start_index=start_index, total=total)
 
-        # 尝试通过Server酱推送
+    def deliver(self, title: str, content: str, delivered: Optional[set] = None) -> Dict[str, bool]:
+        """
+        推送一条已渲染的消息，返回 目标名 -> 是否成功
+        delivered: 已送达的目标名和分页记录（page_key），重试时跳过；
+        本次送达的分页会加入该集合，由调用方持久化
+        """
+        delivered = delivered if delivered is not None else set()
+
+        # 配置了推送目标列表时，并发推送到所有目标
+        targets = self.get_targets()
+        if targets:
+            pending = [target for target in targets if target['name'] not in delivered]
+            return self.send_to_targets(title, content, pending, delivered)
+
+        if DEFAULT_TARGET in delivered:
+            return {}
+
+        serverchan = f"{DEFAULT_TARGET}/serverchan"
+        work_wechat = f"{DEFAULT_TARGET}/work_wechat"
+
+        # 尝试通过Server酱推送（上次已切换到企业微信时不再使用Server酱）
         success = False
-        if self.serverchan_enabled:
-            success = self.send_via_serverchan(title, content)
+        if self.serverchan_enabled and not has_pages(delivered, work_wechat):
+            success = self.send_via_serverchan(title, content, delivered=delivered, target=serverchan)
 
-        # 如果Server酱失败，尝试企业微信
+        # 如果Server酱失败，尝试企业微信；Server酱已送达部分分页时不切换，避免用户收到两份
         if not success and self.work_wechat_enabled:
-            success = self.send_via_work_wechat(content)
+            if has_pages(delivered, serverchan):
+                logger.warning("Server酱已送达部分分页，不切换到企业微信，稍后重试剩余分页")
+            else:
+                success = self.send_via_work_wechat(content, delivered=delivered, target=work_wechat)
+
+        return {DEFAULT_TARGET: success}
+
+    def send_news_notification(self, news_list: List[Dict]) -> bool:
+        """发送新闻通知"""
+        if not news_list:
+            logger.warning("没有新闻需要推送")
+            return False
 
-        return success
+        title, content = self.build_notification(news_list)
+        results = self.deliver(title, content)
+        return bool(results) and all(results.values())
 
     def test_connection(self) -> bool:
         """测试推送连接"""
         test_content = "这是一条测试消息，如果你收到了这条消息，说明配置正确！\n\n发送时间: " + \
                       str(__import__('datetime').datetime.now())
 
-        if self.serverchan_enabled:
+        targets = self.get_targets()
+        if targets:
+            results = self.send_to_targets("新闻收集器测试", test_content, targets)
+            return all(results.values())
+        elif self.serverchan_enabled:
             return self.send_via_serverchan("新闻收集器测试", test_content)
         elif self.work_wechat_enabled:
             return self.send_via_work_wechat(test_content)